@@ -0,0 +1,94 @@
+"""Wall time of `Reader.get_physical_samples` against channel count
+
+Compares the batched read path (`edfpy.blob.read_slices`) with reading
+every channel separately through `Channel.__getitem__`, on a memory map
+and on a `Stream` whose block cache is smaller than the window read.  On
+a memory map the batched path reads channel by channel as well, and both
+take about as long, mostly allocating and scaling the physical samples.
+On a stream, every channel read separately fetches all blocks of the
+window again, whereas the batched path fetches each block once.
+
+    python benchmarks/bench_batch_read.py
+"""
+from os.path import join
+from tempfile import TemporaryDirectory
+from timeit import repeat
+from typing import Tuple
+
+import numpy as np
+
+from edfpy import Reader
+from edfpy.header import Header
+from edfpy.channel import Channel
+from edfpy.blob import write_blob
+
+
+def write_edf(filepath: str, num_channels: int, num_records: int,
+              num_samples_per_record: int = 256):
+    header = Header(
+        version='0', patient_id='', recording_id='',
+        startdate='01.01.00', starttime='00.00.00',
+        num_header_bytes=256 * (num_channels + 1), reserved='',
+        num_records=num_records, record_duration=1,
+        num_channels=num_channels)
+    channels = [
+        Channel(label=f"C{i}", channel_type='EEG', physical_dimension='uV',
+                physical_minimum=-500.0, physical_maximum=500.0,
+                digital_minimum=-32768, digital_maximum=32767,
+                prefiltering='', reserved='',
+                num_samples_per_record=num_samples_per_record)
+        for i in range(num_channels)
+    ]
+    n = num_records * num_samples_per_record
+    rng = np.random.default_rng(42)
+    arrs = [rng.integers(-32768, 32767, n, dtype=np.int16)
+            for _ in range(num_channels)]
+    with open(filepath, 'wb') as fp:
+        header.write(fp)
+        Channel.write(fp, channels)
+        write_blob(fp, arrs, [num_samples_per_record] * num_channels)
+
+
+def per_channel(reader: Reader, t0: float, dt: float):
+    """the former read path: one `Channel.__getitem__` per channel"""
+    rd = reader.header.record_duration
+    signals = {}
+    for label, channel in reader.channel_by_label.items():
+        sr = channel.num_samples_per_record / rd
+        a = int(np.round(t0 * sr))
+        b = int(np.round((t0 + dt) * sr))
+        signals[label] = channel[a:b]
+
+    return signals
+
+
+def timings(reader: Reader, t0: float, dt: float) -> Tuple[float, float]:
+    """returns the best wall times of the per-channel and batched paths"""
+    loop = min(repeat(lambda: per_channel(reader, t0, dt),
+                      number=1, repeat=5))
+    batch = min(repeat(lambda: reader.get_physical_samples(t0, dt),
+                       number=1, repeat=5))
+    return loop, batch
+
+
+def main(num_records: int = 600, t0: float = 10.0, dt: float = 300.0):
+    print(f"{'':>8} {'memory map (ms)':>24} {'stream (ms)':>24}")
+    print(f"{'channels':>8} "
+          + " ".join(2 * [f"{'per-channel':>12} {'batched':>11}"]))
+    with TemporaryDirectory() as tmpdir:
+        for num_channels in [1, 4, 16, 64, 128]:
+            filepath = join(tmpdir, f"{num_channels}.edf")
+            write_edf(filepath, num_channels, num_records)
+            mapped = timings(Reader.open(filepath), t0, dt)
+            with open(filepath, 'rb') as fp:
+                reader = Reader.from_stream(fp, block_records=16,
+                                            max_blocks=4)
+                streamed = timings(reader, t0, dt)
+
+            print(f"{num_channels:>8} " + " ".join(
+                f"{1e3 * loop:>12.2f} {1e3 * batch:>11.2f}"
+                for loop, batch in (mapped, streamed)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Memory of channel metadata held as `Channel` objects vs. `ChannelTable`
+
+    python benchmarks/bench_memory.py
+"""
+import tracemalloc
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from edfpy.header import Header
+from edfpy.channel import Channel, ChannelTable
+from synthetic import write_synthetic
+
+
+def measure(load, blocks):
+    """returns bytes allocated by `load` of all header `blocks`"""
+    tracemalloc.start()
+    kept = [load(block) for block in blocks]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def objects(block):
+    fp = BytesIO(block)
+    header = Header.read(fp)
+    return header, Channel.read(fp, header.num_channels, header.filetype)
+
+
+def table(block):
+    fp = BytesIO(block)
+    header = Header.read(fp)
+    return header, ChannelTable.read(fp, header.num_channels,
+                                     header.filetype)
+
+
+def main(num_files: int = 1000, num_channels: int = 64):
+    with TemporaryDirectory() as edfs:
+        filepath = join(edfs, "0.edf")
+        write_synthetic(filepath, num_channels, duration=1.0,
+                        chunk_records=1)
+        with open(filepath, 'rb') as fp:
+            block = fp.read(256 * (num_channels + 1))
+
+    blocks = [bytes(block) for _ in range(num_files)]
+    total = num_files * num_channels
+    for name, load in [('Header, Channel', objects),
+                       ('Header, ChannelTable', table)]:
+        size = measure(load, blocks)
+        print(f"{name:>24}: {size / 2**20:8.1f} MiB, "
+              f"{size / total:6.0f} bytes per channel")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""pytest-benchmark cases of `Reader` on synthetic recordings
+
+Cases cover open latency, full-channel reads, random windows, derivations,
+montages and annotation parsing over channel count, sampling rate, record
+size and duration.  `EDFPY_BENCH_SCALE=full` adds recordings of 8 h and 72 h.
+Results are saved to `.benchmarks/` for comparison across commits:
+
+    make bench
+    pytest-benchmark compare --group-by=name
+"""
+import os
+
+import numpy as np
+import pytest
+
+from edfpy import Reader
+from edfpy.montage import Montage
+from synthetic import write_synthetic, labels
+
+# num_channels, sample_rate, record_duration, duration in seconds
+configs = [
+    (8, 256, 1.0, 600.0),
+    (64, 256, 1.0, 600.0),
+    (256, 256, 1.0, 600.0),
+    (16, 512, 0.5, 3600.0),
+    (32, 200, 30.0, 3600.0),
+]
+if os.environ.get('EDFPY_BENCH_SCALE') == 'full':
+    configs += [
+        (64, 256, 1.0, 8 * 3600.0),
+        (256, 256, 1.0, 8 * 3600.0),
+        (8, 256, 1.0, 72 * 3600.0),
+    ]
+
+window = 30.0  # seconds
+
+
+def config_id(config) -> str:
+    num_channels, sample_rate, record_duration, duration = config
+    span = f"{duration / 3600:g}h" if duration >= 3600 \
+        else f"{duration / 60:g}min"
+    return f"{num_channels}ch-{sample_rate:g}Hz-{record_duration:g}s-{span}"
+
+
+@pytest.fixture(scope='module', params=configs, ids=config_id)
+def edf(request, tmp_path_factory):
+    filepath = str(tmp_path_factory.mktemp('edfs') / 'synthetic.edf')
+    write_synthetic(filepath, *request.param, annotations_every=30)
+    return filepath, request.param
+
+
+def test_open(benchmark, edf):
+    filepath, _ = edf
+    benchmark(Reader.open, filepath)
+
+
+def test_read_all(benchmark, edf):
+    """read up to ten minutes of all channels"""
+    filepath, (*_, duration) = edf
+    reader = Reader.open(filepath)
+    labels1 = [c.label for c in reader.derivation_by_label.channels]
+    benchmark(reader.get_physical_samples, 0.0, min(duration, 600.0),
+              labels1)
+
+
+def test_random_windows(benchmark, edf):
+    """read 100 windows at random onsets"""
+    filepath, (num_channels, *_, duration) = edf
+    reader = Reader.open(filepath)
+    labels1 = labels(num_channels)
+    rng = np.random.default_rng(0)
+    onsets = rng.uniform(0.0, duration - window, 100)
+
+    def read():
+        for t0 in onsets:
+            reader.get_physical_samples(t0, window, labels1)
+
+    benchmark(read)
+
+
+def test_derivations(benchmark, edf):
+    """derive neighbouring pairs of electrodes over ten minutes"""
+    filepath, (num_channels, *_, duration) = edf
+    reader = Reader.open(filepath)
+    electrodes = [ll.split('-')[0] for ll in labels(num_channels)]
+    derived = [f"{a}-{b}" for a, b in zip(electrodes, electrodes[1:])]
+    benchmark(reader.get_physical_samples, 0.0, min(duration, 600.0),
+              derived)
+
+
+@pytest.mark.parametrize('name', ['double_banana', 'average'])
+def test_montage(benchmark, edf, name):
+    """compute a montage of the 10-20 electrodes over ten minutes"""
+    filepath, (num_channels, *_, duration) = edf
+    if num_channels < 19:
+        pytest.skip("montages need all 19 electrodes")
+
+    reader = Reader.open(filepath)
+    montage = Montage.builtin(name)
+    benchmark(montage.apply, reader, 0.0, min(duration, 600.0), np.float32)
+
+
+def test_annotations(benchmark, edf):
+    """index and parse all annotations of a freshly opened file"""
+    filepath, _ = edf
+
+    def parse(reader):
+        return reader.annotation_channel.annotations
+
+    def setup():
+        return (Reader.open(filepath),), {}
+
+    benchmark.pedantic(parse, setup=setup, rounds=10)
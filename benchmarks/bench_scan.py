@@ -0,0 +1,37 @@
+"""Header catalog of a directory with `scan_headers` vs. `Reader.read_header`
+
+    python benchmarks/bench_scan.py
+"""
+from os import listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from edfpy import Reader, scan_headers
+from synthetic import write_synthetic
+
+
+def read_all(directory: str):
+    for name in sorted(listdir(directory)):
+        with open(join(directory, name), 'rb') as fp:
+            Reader.read_header(fp)
+
+
+def main(num_files: int = 2000, num_channels: int = 64):
+    with TemporaryDirectory() as edfs:
+        for i in range(num_files):
+            write_synthetic(join(edfs, f"{i}.edf"), num_channels,
+                            duration=1.0, chunk_records=1)
+
+        for name, scan in [
+            ('Reader.read_header', lambda: read_all(edfs)),
+            ('scan_headers', lambda: scan_headers([edfs])),
+            ('scan_headers, 8 threads', lambda: scan_headers([edfs], 8)),
+        ]:
+            t0 = perf_counter()
+            scan()
+            print(f"{name:>24}: {1e3 * (perf_counter() - t0):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
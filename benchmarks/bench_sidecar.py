@@ -0,0 +1,75 @@
+"""Cold vs. warm `Reader.open` over a directory of files
+
+Cold opens parse every header and channel block and, for EDF+, scan the
+annotation channel.  Warm opens load the metadata from a `Sidecar`.
+
+    python benchmarks/bench_sidecar.py
+"""
+from os import listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import numpy as np
+
+from edfpy import Reader
+from edfpy.header import Header
+from edfpy.writer import Writer
+from edfpy.sidecar import Sidecar
+from edfpy.channel import Channel, AnnotationChannel
+
+
+def write_edfp(filepath: str, num_channels: int, num_records: int):
+    """write EDF+ file with an annotation in every tenth record"""
+    header = Header(version='0', patient_id='', recording_id='',
+                    startdate='01.01.00', starttime='00.00.00',
+                    num_header_bytes=0, reserved='EDF+C', num_records=0,
+                    record_duration=1, num_channels=0)
+    props = dict(channel_type='EEG', physical_dimension='uV',
+                 physical_minimum=-500.0, physical_maximum=500.0,
+                 digital_minimum=-32768, digital_maximum=32767,
+                 prefiltering='', reserved='', num_samples_per_record=8)
+    channels = [Channel(label=f"C{i}-M2", **props)
+                for i in range(num_channels - 1)]
+    channels.append(AnnotationChannel(**dict(
+        props, label='EDF Annotations', physical_dimension='',
+        num_samples_per_record=32)))
+    samples = [np.zeros(8, dtype=np.int16)] * (num_channels - 1)
+    with Writer.open(filepath, header, channels) as writer:
+        for i in range(num_records):
+            tal = f"+{i}\x14\x14\x00".encode()
+            if i % 10 == 0:
+                tal += f"+{i}.5\x151\x14Event {i}\x14\x00".encode()
+
+            annotations = np.frombuffer(tal.ljust(64, b'\x00'), '<i2')
+            writer.write_digital(samples + [annotations])
+
+
+def open_all(directory: str, sidecar=None) -> float:
+    t0 = perf_counter()
+    for name in sorted(listdir(directory)):
+        reader = Reader.open(join(directory, name), sidecar=sidecar)
+        reader.channel_by_label['ANNOTATIONS'].annotations_between(0, 10)
+
+    return perf_counter() - t0
+
+
+def main(num_files: int = 100, num_channels: int = 64,
+         num_records: int = 3600):
+    with TemporaryDirectory() as edfs, TemporaryDirectory() as cache:
+        for i in range(num_files):
+            write_edfp(join(edfs, f"{i}.edf"), num_channels, num_records)
+
+        sidecar = Sidecar(cache)
+        plain = open_all(edfs)
+        cold = open_all(edfs, sidecar)
+        warm = open_all(edfs, sidecar)
+        print(f"{num_files} files, {num_channels} channels, "
+              f"{num_records} records")
+        print(f"without sidecar: {1e3 * plain / num_files:.2f} ms per file")
+        print(f"cold sidecar:    {1e3 * cold / num_files:.2f} ms per file")
+        print(f"warm sidecar:    {1e3 * warm / num_files:.2f} ms per file")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Synthetic EDF and EDF+ files at production scale
+
+Files are written in chunks of records with `Header.write`,
+`Channel.write` and `write_blob`, such that even 72 h recordings of 256
+channels never need to fit into memory.
+
+    python benchmarks/synthetic.py out.edf --channels 64 --rate 256 \\
+        --duration 28800 --annotations 30
+"""
+from argparse import ArgumentParser
+from typing import List
+
+import numpy as np
+
+from edfpy.header import Header
+from edfpy.channel import Channel, AnnotationChannel
+from edfpy.blob import write_blob
+
+electrodes = ['Fp1', 'Fp2', 'F7', 'F3', 'Fz', 'F4', 'F8', 'T3', 'C3', 'Cz',
+              'C4', 'T4', 'T5', 'P3', 'Pz', 'P4', 'T6', 'O1', 'O2']
+annotation_bytes = 64  # per record
+
+
+def labels(num_channels: int) -> List[str]:
+    """returns 10-20 electrodes referenced to M2, then numbered ones"""
+    names = electrodes + [f"E{i}" for i in range(num_channels)]
+    return [f"{name}-M2" for name in names[:num_channels]]
+
+
+def tals(first: int, num_records: int, record_duration: float,
+         annotations_every: int) -> np.ndarray:
+    """returns the annotation signal of records `first:first+num_records`"""
+    records = []
+    for i in range(first, first + num_records):
+        onset = i * record_duration
+        tal = f"+{onset:g}\x14\x14\x00"
+        if annotations_every and i % annotations_every == 0:
+            tal += f"+{onset + 0.5:g}\x15{record_duration:g}\x14" \
+                   f"Event {i}\x14\x00"
+
+        records.append(tal.encode().ljust(annotation_bytes, b'\x00'))
+
+    return np.frombuffer(b''.join(records), '<i2')
+
+
+def write_synthetic(filepath: str, num_channels: int = 8,
+                    sample_rate: float = 256, record_duration: float = 1.0,
+                    duration: float = 600.0, annotations_every: int = 0,
+                    chunk_records: int = 64, seed: int = 0) -> str:
+    """write an EDF file of `num_channels` random signals, an EDF+ file
+    with an annotation every `annotations_every` records if non-zero"""
+    num_samples_per_record = int(round(sample_rate * record_duration))
+    num_records = int(duration // record_duration)
+    channels = [
+        Channel(label=label, channel_type='EEG', physical_dimension='uV',
+                physical_minimum=-500.0, physical_maximum=500.0,
+                digital_minimum=-32768, digital_maximum=32767,
+                prefiltering='', reserved='',
+                num_samples_per_record=num_samples_per_record)
+        for label in labels(num_channels)
+    ]
+    if annotations_every:
+        channels.append(AnnotationChannel(
+            label='EDF Annotations', channel_type='', physical_dimension='',
+            physical_minimum=-1.0, physical_maximum=1.0,
+            digital_minimum=-32768, digital_maximum=32767, prefiltering='',
+            reserved='', num_samples_per_record=annotation_bytes // 2))
+
+    header = Header(
+        version='0', patient_id='X X X X', recording_id='Startdate X X X X',
+        startdate='01.01.20', starttime='22.00.00',
+        num_header_bytes=256 * (len(channels) + 1),
+        reserved='EDF+C' if annotations_every else '',
+        num_records=num_records, record_duration=record_duration,
+        num_channels=len(channels))
+    record_lengths = [c.num_samples_per_record for c in channels]
+
+    # one random chunk, shifted per chunk of records
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(-32768, 32767, (num_channels,
+                         chunk_records * num_samples_per_record),
+                         dtype=np.int16)
+    with open(filepath, 'wb') as fp:
+        header.write(fp)
+        Channel.write(fp, channels)
+        for first in range(0, num_records, chunk_records):
+            n = min(chunk_records, num_records - first)
+            shift = first // chunk_records
+            arrs = list(noise[:, :n * num_samples_per_record] + shift)
+            if annotations_every:
+                arrs.append(tals(first, n, record_duration,
+                                 annotations_every))
+
+            write_blob(fp, arrs, record_lengths, chunk_records=chunk_records)
+
+    return filepath
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('filepath')
+    parser.add_argument('--channels', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=256)
+    parser.add_argument('--record-duration', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=600.0,
+                        help="seconds")
+    parser.add_argument('--annotations', type=int, default=0,
+                        help="records between annotations, EDF+ if set")
+    args = parser.parse_args()
+    write_synthetic(args.filepath, args.channels, args.rate,
+                    args.record_duration, args.duration, args.annotations)
+
+
+if __name__ == '__main__':
+    main()
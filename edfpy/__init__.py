@@ -1,3 +1,5 @@
 from .reader import Reader
+from .writer import Writer
+from .scan import scan_headers
 
-__all__ = ['Reader']
+__all__ = ['Reader', 'Writer', 'scan_headers']
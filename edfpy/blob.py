@@ -1,56 +1,336 @@
-from typing import List, Tuple
+from io import SEEK_END
+from mmap import mmap
+from threading import Lock
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Optional, BinaryIO
 
 import numpy as np
 
+from . import instrument
+
 
 class BlobSlice:
+    width = 1  # blob columns per sample
+
     def __init__(self, blob: np.memmap, locs: Tuple[int, int]):
         self.blob = blob
         self.block_size = locs[1] - locs[0]
         self.length = blob.shape[0] * self.block_size
-        self.locs = slice(*locs)
+        self.locs = slice(locs[0] * self.width, locs[1] * self.width)
 
-    def __getitem__(self, sl: slice) -> np.ndarray:
+    @property
+    def dtype(self) -> np.dtype:
+        """dtype of the decoded digital samples"""
+        return self.blob.dtype
+
+    @property
+    def sample_bytes(self) -> int:
+        """number of bytes of a sample as stored in the blob"""
+        return self.width * self.blob.dtype.itemsize
+
+    def decode(self, block: np.ndarray,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """returns digital samples of a `(records, columns)` blob block"""
+        if out is None:
+            return np.array(block)
+
+        out[...] = block
+        return out
+
+    def locate(self, sl: slice) -> Tuple[int, int, int, Optional[int]]:
+        """returns record range `A:B` and in-block range `a:b` of `sl`"""
         if sl.step and sl.step != 1:
             raise ValueError('slicing only with step width 1')
 
         q = self.block_size
         i = sl.start if sl.start else 0
         j = sl.stop if sl.stop else self.length
-        j = self.length + j if j < 0 else j
+        i = max(self.length + i, 0) if i < 0 else min(i, self.length)
+        j = max(self.length + j, 0) if j < 0 else min(j, self.length)
         A = i // q
         B = int(np.ceil(j / q))
         a = i - A * q
         b = j - B * q or None
-        block = self.blob[A:B, self.locs].flatten()
-        return block[a:b]
+        return A, B, a, b
+
+    @instrument.timed('blob.getitem')
+    def __getitem__(self, sl: slice) -> np.ndarray:
+        A, B, a, b = self.locate(sl)
+        block = self.decode(self.blob[A:B, self.locs])
+        if instrument.profiles:
+            instrument.count('blob.getitem', records=max(B - A, 0),
+                             bytes=block.nbytes)
+
+        return block.reshape(-1)[a:b]
+
+    def records(self, A: int = 0, B: Optional[int] = None) -> np.ndarray:
+        """returns digital samples of records `A:B` as `(records, samples)`
+        view into the blob"""
+        return np.asarray(self.blob[A:B, self.locs])
+
+    def raw(self, A: int = 0, B: Optional[int] = None) -> np.ndarray:
+        """returns bytes of records `A:B` as stored, one row per record"""
+        block = np.ascontiguousarray(self.blob[A:B, self.locs])
+        return block.view(np.uint8)
+
+    def tobytes(self) -> bytes:
+        """returns the raw bytes of the signal as stored in the file"""
+        return self.raw().tobytes()
 
     def __eq__(self, other):
         return self[:] == other
 
     def __repr__(self):
-        return f"BlobSlice({self[:]})"
+        return f"{type(self).__name__}({self[:]})"
+
+
+class BdfBlobSlice(BlobSlice):
+    """BlobSlice over a byte blob of little-endian 24-bit samples"""
+
+    width = 3
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(np.int32)
+
+    def decode(self, block: np.ndarray,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        return decode_int24(block, out)
+
+    def records(self, A: int = 0, B: Optional[int] = None) -> np.ndarray:
+        """returns digital samples of records `A:B` as `(records, samples)`
+
+        24-bit samples have no integer view and are decoded into a copy.
+        """
+        return self.decode(self.blob[A:B, self.locs])
+
+
+def decode_int24(raw: np.ndarray,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """returns int32 samples of little-endian int24 bytes `raw`
+
+    The last axis of `raw` holds three bytes per sample.  The most
+    significant byte is sign-extended and the lower two bytes are shifted
+    in, all as whole-array operations.
+    """
+    shape = raw.shape[:-1] + (raw.shape[-1] // 3,)
+    triplets = raw.reshape(shape + (3,))
+    if out is None:
+        out = np.empty(shape, dtype=np.int32)
+
+    out[...] = triplets[..., 2].view(np.int8)
+    for k in (1, 0):
+        np.left_shift(out, 8, out=out)
+        np.bitwise_or(out, triplets[..., k], out=out)
+
+    return out
+
+
+def encode_int24(arr: np.ndarray) -> np.ndarray:
+    """returns little-endian int24 bytes of integer samples `arr`"""
+    arr = np.asarray(arr, dtype='<i4')
+    raw = arr.reshape(arr.shape + (1,)).view(np.uint8)
+    return raw[..., :3].reshape(arr.shape[:-1] + (-1,))
+
+
+@instrument.timed('blob.read_slices')
+def read_slices(requests: List[Tuple[BlobSlice, slice]],
+                chunk_bytes: int = 1 << 22) -> List[np.ndarray]:
+    """returns samples for several `(blob_slice, slice)` pairs at once
+
+    Requests sharing a blob are served in a single pass over the union of
+    their record ranges.  The records are fetched in chunks of
+    `chunk_bytes`, and every request's columns are scattered into a
+    preallocated output array while the chunk is at hand, so that each
+    record is fetched only once, e.g. from a `Stream`, no matter how many
+    channels are requested.  Memory maps and arrays are copied from request
+    by request, since visiting their records in chunks gains nothing.
+    """
+    located = [(bs, bs.locate(sl)) for bs, sl in requests]
+    outputs: List[np.ndarray] = [np.empty(0)] * len(located)
+    by_blob: Dict[int, List[int]] = {}
+    for idx, (bs, _) in enumerate(located):
+        by_blob.setdefault(id(bs.blob), []).append(idx)
+
+    for indices in by_blob.values():
+        blob = located[indices[0]][0].blob
+        A = min(located[idx][1][0] for idx in indices)
+        B = max(located[idx][1][1] for idx in indices)
+        blocks = {
+            idx: np.empty((max(located[idx][1][1] - located[idx][1][0], 0),
+                           located[idx][0].block_size),
+                          dtype=located[idx][0].dtype)
+            for idx in indices
+        }
+        record_bytes = blob.shape[1] * blob.dtype.itemsize
+        step = max(B - A, 1) if isinstance(blob, np.ndarray) else \
+            max(1, chunk_bytes // record_bytes)
+        if instrument.profiles:
+            instrument.count('blob.read_slices', records=max(B - A, 0),
+                             bytes=max(B - A, 0) * record_bytes)
+
+        for c0 in range(A, B, step):
+            c1 = min(c0 + step, B)
+            records = blob[c0:c1]
+            for idx in indices:
+                bs, (Ai, Bi, _, _) = located[idx]
+                r0, r1 = max(Ai, c0), min(Bi, c1)
+                if r0 < r1:
+                    bs.decode(records[r0 - c0:r1 - c0, bs.locs],
+                              out=blocks[idx][r0 - Ai:r1 - Ai])
+
+        for idx in indices:
+            _, (_, _, a, b) = located[idx]
+            outputs[idx] = blocks[idx].reshape(-1)[a:b]
+
+    return outputs
+
+
+class Stream:
+    """seekable binary stream from which records are read on demand
+
+    `fileobj` needs `read`, `seek` and `tell`, e.g. a GridFS file.  Records
+    are fetched in blocks of `block_records`, and the `max_blocks` most
+    recently used blocks are cached.
+    """
+
+    def __init__(self, fileobj: BinaryIO, block_records: int = 64,
+                 max_blocks: int = 16):
+        self.fileobj = fileobj
+        self.block_records = block_records
+        self.max_blocks = max_blocks
+
+
+class StreamBlob:
+    """`(records, columns)` record matrix of a `Stream`
+
+    Supports the row (and column) slicing `BlobSlice` applies to memory
+    maps, reading only the blocks of records that a slice covers.
+    """
+
+    def __init__(self, stream: Stream, dtype, offset: int, num_columns: int):
+        self.stream = stream
+        self.dtype = np.dtype(dtype)
+        self.offset = offset
+        self.record_bytes = num_columns * self.dtype.itemsize
+        fileobj = stream.fileobj
+        fileobj.seek(0, SEEK_END)
+        num_records = (fileobj.tell() - offset) // self.record_bytes
+        self.shape = (num_records, num_columns)
+        self.blocks: 'OrderedDict[int, np.ndarray]' = OrderedDict()
+        self.lock = Lock()
+        self.num_reads = 0
+
+    def block(self, k: int) -> np.ndarray:
+        """returns block `k` of records from cache or stream"""
+        with self.lock:
+            if k in self.blocks:
+                self.blocks.move_to_end(k)
+                return self.blocks[k]
+
+            n = self.stream.block_records
+            fileobj = self.stream.fileobj
+            fileobj.seek(self.offset + k * n * self.record_bytes)
+            size = min(n, self.shape[0] - k * n) * self.record_bytes
+            data = read_exactly(fileobj, size)
+            self.num_reads += 1
+            block = np.frombuffer(data, dtype=self.dtype)
+            block = block.reshape(-1, self.shape[1])
+            self.blocks[k] = block
+            while len(self.blocks) > self.stream.max_blocks:
+                self.blocks.popitem(last=False)
+
+            return block
+
+    def __getitem__(self, key) -> np.ndarray:
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        start, stop, _ = rows.indices(self.shape[0])
+        stop = max(start, stop)
+        n = self.stream.block_records
+        first, last = start // n, -(-stop // n)
+        blocks = [self.block(k) for k in range(first, last)]
+        if not blocks:
+            return np.empty((0, self.shape[1]), self.dtype)[:, cols]
+
+        records = np.concatenate(blocks) if len(blocks) > 1 else blocks[0]
+        return records[start - first * n:stop - first * n, cols]
+
+
+def read_exactly(fileobj: BinaryIO, size: int) -> bytes:
+    """returns `size` bytes of `fileobj`, read in as many calls as needed"""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        part = fileobj.read(remaining)
+        if not part:
+            raise EOFError(f"stream ended {remaining} of {size} bytes short "
+                           f"at offset {fileobj.tell()}")
+
+        parts.append(part)
+        remaining -= len(part)
+
+    return b''.join(parts)
+
+
+def map_blob(file, dtype, offset: int, num_columns: int):
+    """returns the `(records, columns)` record matrix of `file`
+
+    `file` is a path or file object to memory-map, a buffer (`bytes`,
+    `memoryview`, `mmap`) to wrap without copy, or a `Stream`.
+    """
+    if isinstance(file, Stream):
+        return StreamBlob(file, dtype, offset, num_columns)
+
+    if isinstance(file, (bytes, bytearray, memoryview, mmap)):
+        memarr = np.frombuffer(file, dtype=dtype, offset=offset)
+    else:
+        memarr = np.memmap(file, dtype=dtype,  # type: ignore
+                           mode='r', offset=offset)
+
+    memarr.shape = (-1, num_columns)
+    return memarr
 
 
 def read_blob(file, offset: int, record_lengths: List[int],
               filetype: str) -> List[BlobSlice]:
     if filetype.startswith('EDF'):
         return read_edf_blob(file, offset, record_lengths)
+    elif filetype.startswith('BDF'):
+        return read_bdf_blob(file, offset, record_lengths)
 
     raise ValueError(f"File of type {filetype} not supported")
 
 
 def read_edf_blob(file, offset: int,
                   record_lengths: List[int]) -> List[BlobSlice]:
-    memarr = np.memmap(file, dtype='<i2',  # type: ignore
-                       mode='r', offset=offset)
     pos = np.cumsum([0] + record_lengths).astype(int)
-    memarr.shape = (-1, pos[-1])
+    memarr = map_blob(file, '<i2', offset, pos[-1])
     locs = zip(pos[:-1], pos[1:])
     return [BlobSlice(memarr, loc) for loc in locs]
 
 
-def write_blob(file, arrs: List[np.ndarray], record_lengths: List[int]):
+def read_bdf_blob(file, offset: int,
+                  record_lengths: List[int]) -> List[BlobSlice]:
+    pos = np.cumsum([0] + record_lengths).astype(int)
+    memarr = map_blob(file, np.uint8, offset, BdfBlobSlice.width * pos[-1])
+    locs = zip(pos[:-1], pos[1:])
+    return [BdfBlobSlice(memarr, loc) for loc in locs]
+
+
+def write_blob(file, arrs: List[np.ndarray], record_lengths: List[int],
+               filetype: str = 'EDF', chunk_records: int = 1024):
+    """write digital samples `arrs` record by record to `file`
+
+    At most `chunk_records` records are interleaved at a time, so that the
+    memory needed besides `arrs` is bounded by the chunk size.
+    """
     reshaped = [arr.reshape((-1, n)) for arr, n in zip(arrs, record_lengths)]
-    blob = np.concatenate(reshaped, axis=1).tobytes()
-    file.write(blob)
+    num_records = reshaped[0].shape[0] if reshaped else 0
+    for r0 in range(0, num_records, chunk_records):
+        records = [arr[r0:r0 + chunk_records] for arr in reshaped]
+        if filetype.startswith('BDF'):
+            blob = encode_int24(np.concatenate(records, axis=1))
+        else:
+            blob = np.concatenate(records, axis=1).astype('<i2', copy=False)
+
+        file.write(np.ascontiguousarray(blob).data)
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+class BlockCache:
+    """LRU cache of physical samples in blocks of records
+
+    Blocks of `block_records` records are decoded and scaled once per
+    channel and dtype, and are kept read-only until the cache exceeds
+    `max_bytes`, when the least recently used blocks are evicted.  One
+    cache may be shared by several readers and threads.
+
+        cache = BlockCache(max_bytes=1 << 28)
+        reader = Reader.open(filepath, block_cache=cache)
+    """
+
+    def __init__(self, max_bytes: int = 1 << 28, block_records: int = 64):
+        self.max_bytes = max_bytes
+        self.block_records = block_records
+        self.blocks: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self.lock = Lock()
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def block(self, channel, k: int, dtype) -> np.ndarray:
+        """returns physical samples of block `k` of records of `channel`"""
+        key = (channel.cache_key, k, dtype.str)
+        with self.lock:
+            if key in self.blocks:
+                self.hits += 1
+                self.blocks.move_to_end(key)
+                return self.blocks[key]
+
+            self.misses += 1
+
+        q = channel.signal.block_size * self.block_records
+        block = channel.to_physical(channel.signal[k * q:(k + 1) * q], dtype)
+        block.flags.writeable = False
+        with self.lock:
+            if key not in self.blocks:
+                self.blocks[key] = block
+                self.num_bytes += block.nbytes
+
+            while self.num_bytes > self.max_bytes and len(self.blocks) > 1:
+                _, evicted = self.blocks.popitem(last=False)
+                self.num_bytes -= evicted.nbytes
+
+        return block
+
+    def get(self, channel, sli: slice, dtype=np.float64,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        """returns slice `sli` of `channel` as `dtype` assembled from blocks"""
+        dtype = np.dtype(dtype if out is None else out.dtype)
+        A, B, a, b = channel.signal.locate(sli)
+        q = channel.signal.block_size
+        length = max(0, (B - A) * q - a + (b or 0))
+        if out is None:
+            out = np.empty(length, dtype=dtype)
+
+        if length == 0:
+            return out
+
+        n = self.block_records
+        start = (A % n) * q + a  # in the first block
+        i = 0
+        for k in range(A // n, -(-B // n)):
+            block = self.block(channel, k, dtype)[start:start + length - i]
+            out[i:i + block.size] = block
+            i += block.size
+            start = 0
+
+        return out
+
+    def clear(self):
+        with self.lock:
+            self.blocks.clear()
+            self.num_bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        """returns hit and miss counts and the size of the cache"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'num_blocks': len(self.blocks),
+                    'num_bytes': self.num_bytes,
+                    'max_bytes': self.max_bytes}
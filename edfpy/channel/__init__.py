@@ -1,6 +1,9 @@
 from .label import Label
 from .channel import Channel
-from .derivation import Derivation
+from .derivation import Derivation, Inversion
 from .annotation_channel import AnnotationChannel, Annotation
+from .derivation_graph import DerivationGraph
+from .channel_table import ChannelTable
 
-__all__ = ['Channel', 'Derivation', 'AnnotationChannel', 'Annotation', 'Label']
+__all__ = ['Channel', 'Derivation', 'Inversion', 'DerivationGraph',
+           'AnnotationChannel', 'Annotation', 'Label', 'ChannelTable']
@@ -1,9 +1,57 @@
+from typing import List, Optional, Dict
 from collections import namedtuple
+
+import numpy as np
+
+from .. import instrument
 from ..cached_property import cached_property
 from .channel import Channel
 
 
 Annotation = namedtuple('Annotation', 'start duration label')
+TalIndex = namedtuple('TalIndex', 'record_onsets records starts stops onsets')
+
+
+def scan_tals(raw: np.ndarray) -> TalIndex:
+    """returns the index of all TALs in `(records, bytes)` array `raw`
+
+    A time-stamped annotation list (TAL) starts with '+' or '-' at the
+    beginning of a record or after a null byte, its onset runs up to the
+    first '\\x14' or '\\x15', and it is terminated by '\\x14\\x00'.  All
+    separators are located and all onsets are decoded with whole-array
+    operations.  The first TAL of each record holds the record onset.
+    """
+    num_records, width = raw.shape
+    flat = raw.reshape(-1)
+    after_null = np.ones(flat.size, dtype=bool)
+    after_null[1:] = flat[:-1] == 0
+    after_null[::width] = True
+    is_sign = (flat == ord('+')) | (flat == ord('-'))
+    starts = np.flatnonzero(is_sign & after_null)
+
+    terminators = np.flatnonzero((flat[:-1] == 0x14) & (flat[1:] == 0))
+    stops = terminators[np.searchsorted(terminators, starts)
+                        .clip(max=terminators.size - 1)] \
+        if terminators.size else np.full_like(starts, flat.size)
+    marks = np.flatnonzero((flat == 0x14) | (flat == 0x15))
+    onset_stops = marks[np.searchsorted(marks, starts)
+                        .clip(max=marks.size - 1)] \
+        if marks.size else np.full_like(starts, flat.size)
+
+    lengths = onset_stops - starts
+    max_length = int(lengths.max()) if lengths.size else 1
+    offsets = np.arange(max_length)
+    chars = flat[np.minimum(starts[:, None] + offsets, flat.size - 1)]
+    chars[offsets >= lengths[:, None]] = 0
+    onsets = chars.view(f'S{max_length}').reshape(-1).astype(float)
+
+    records = starts // width
+    first = starts % width == 0
+    record_onsets = np.full(num_records, np.nan)
+    record_onsets[records[first]] = onsets[first]
+    rest = ~first
+    return TalIndex(record_onsets, records[rest], starts[rest], stops[rest],
+                    onsets[rest])
 
 
 class AnnotationChannel(Channel):
@@ -12,32 +60,104 @@ class AnnotationChannel(Channel):
     sep_timestamp = b'\x15'  # between duration and label (optional)
     sep_duration = b'\x14'  # after timestamp
 
+    scan_records = 1024  # records scanned at a time for the TAL index
+
+    @property
+    def record_bytes(self) -> int:
+        """returns the number of bytes of the signal per data record"""
+        assert self.signal is not None
+        return self.signal.raw(0, 0).shape[1]
+
+    @cached_property
+    @instrument.timed('annotations.index')
+    def index(self) -> TalIndex:
+        """returns the TAL index of the annotation signal
+
+        The signal is scanned in blocks of `scan_records` records, such
+        that it is never held in memory as a whole.
+        """
+        signal = self.signal
+        assert signal is not None
+        num_records = signal.length // signal.block_size
+        width = self.record_bytes
+        parts = []
+        for A in range(0, max(num_records, 1), self.scan_records):
+            part = scan_tals(signal.raw(A, A + self.scan_records))
+            parts.append(part._replace(records=part.records + A,
+                                       starts=part.starts + A * width,
+                                       stops=part.stops + A * width))
+
+        return TalIndex(*(np.concatenate(field) for field in zip(*parts)))
+
+    @cached_property
+    def parsed(self) -> Dict[int, Optional[Annotation]]:
+        """returns annotations parsed so far by TAL position"""
+        return {}
+
+    @property
+    def record_onsets(self) -> np.ndarray:
+        """returns the onset of each data record in seconds"""
+        return self.index.record_onsets
+
+    @cached_property
+    def order(self) -> np.ndarray:
+        """returns TAL positions in the index sorted by onset"""
+        return np.argsort(self.index.onsets, kind='stable')
+
+    @cached_property
+    def sorted_onsets(self) -> np.ndarray:
+        """returns onsets in the index sorted, in `order`"""
+        return self.index.onsets[self.order]
+
+    def parse(self, i: int) -> Optional[Annotation]:
+        """returns the annotation of TAL `i` in the index"""
+        if i not in self.parsed:
+            assert self.signal is not None
+            start, stop = self.index.starts[i], self.index.stops[i]
+            record, offset = divmod(int(start), self.record_bytes)
+            raw = self.signal.raw(record, record + 1).reshape(-1)
+            tal = raw[offset:offset + stop - start].tobytes()
+            self.parsed[i] = self.parse_tal(tal)
+
+        return self.parsed[i]
+
+    @classmethod
+    def parse_tal(cls, tal: bytes) -> Optional[Annotation]:
+        event = tal.rstrip(cls.sep_timestamp)
+        if len(event.split(cls.sep_timestamp)) < 2:
+            return None
+
+        timestamp_str, event = event.split(cls.sep_timestamp)
+        timestamp = float(timestamp_str)
+        optional = event.split(cls.sep_duration)
+        duration: Optional[float] = None
+        if len(optional) == 2:
+            duration_bytes, label_bytes = optional
+            duration = float(duration_bytes)
+        else:
+            label_bytes = optional[0]
+
+        label = label_bytes.decode('ascii')
+        return Annotation(timestamp, duration, label)
+
+    def select(self, positions) -> List[Annotation]:
+        annotations = (self.parse(int(i)) for i in positions)
+        return [a for a in annotations if a is not None]
+
+    def annotations_in_record(self, record: int) -> List[Annotation]:
+        """returns the annotations stored in data record `record`"""
+        records = self.index.records
+        lo = np.searchsorted(records, record, side='left')
+        hi = np.searchsorted(records, record, side='right')
+        return self.select(range(lo, hi))
+
+    def annotations_between(self, t0: float, t1: float) -> List[Annotation]:
+        """returns annotations starting in `[t0, t1)` sorted by onset"""
+        lo = np.searchsorted(self.sorted_onsets, t0, side='left')
+        hi = np.searchsorted(self.sorted_onsets, t1, side='left')
+        return self.select(self.order[lo:hi])
+
     @cached_property
-    def annotations(self):
-
-        def strip_trash(event):
-            return event.lstrip(b'\x00').rstrip(self.sep_timestamp)
-
-        def is_true_event(event):
-            return len(event.split(self.sep_timestamp)) > 1
-
-        def parse_event(event):
-            timestamp_str, event = event.split(self.sep_timestamp)
-            timestamp = float(timestamp_str)
-            optional = event.split(self.sep_duration)
-            duration = None
-            if len(optional) == 2:
-                duration, label = optional
-                duration = float(duration)
-            else:
-                label = optional[0]
-
-            label = label.decode('ascii')
-            return Annotation(timestamp, duration, label)
-
-        events = self.signal[:].tobytes()
-        events = events.split(self.sep_annotations)
-        events = map(strip_trash, events)
-        events = filter(is_true_event, events)
-        events = map(parse_event, events)
-        return list(events)
+    @instrument.timed('annotations.parse')
+    def annotations(self) -> List[Annotation]:
+        return self.select(range(len(self.index.starts)))
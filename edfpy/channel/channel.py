@@ -1,15 +1,24 @@
-from typing import List, BinaryIO, Optional, Dict
+from typing import List, BinaryIO, Optional, Dict, Tuple, Hashable
 from struct import Struct
+from functools import lru_cache
 
 import numpy as np
 
+from .. import instrument
 from ..blob import BlobSlice
+from ..block_cache import BlockCache
 from ..field import Field, normalize, serialize
 from .label import Label
 from .derivation import Derivation
 from .channel_base import ChannelBase
 
 
+@lru_cache(maxsize=None)
+def field_struct(size: int, num_channels: int) -> Struct:
+    """returns the struct of one field of `num_channels` channels"""
+    return Struct(f"{size}s" * num_channels)
+
+
 class Channel(ChannelBase):
     fields = [
         Field('label', str, 16),
@@ -23,23 +32,112 @@ class Channel(ChannelBase):
         Field('num_samples_per_record', int, 8),
         Field('reserved', str, 32)
     ]
+    __slots__ = ('signal', 'cache', 'cache_key', '_coefficients',
+                 '_channel_type', '_physical_dimension', 'physmin', 'physmax',
+                 'digimin', 'digimax', '_prefiltering',
+                 '_num_samples_per_record', '_reserved')
 
     def __init__(self, *args, **kwargs):
         self.signal: Optional[BlobSlice] = None
+        self.cache: Optional[BlockCache] = None
+        self.cache_key: Optional[Hashable] = None
+        self._coefficients: Optional[Tuple[float, float]] = None
         for k, v in kwargs.items():
             getattr(type(self), k).fset(self, v)
 
     def __getitem__(self, sli: slice) -> np.ndarray:
         """return a slice of the signal"""
+        return self.get(sli)
+
+    def get(self, sli: slice, dtype=np.float64,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        """return a slice of the signal as `dtype`, optionally into `out`"""
+        if self.signal is None:
+            raise RuntimeError(f"channel {self} uninitialized")
+
+        if self.cache is not None and \
+                np.dtype(dtype if out is None else out.dtype).kind == 'f':
+            return self.cache.get(self, sli, dtype, out)
+
+        return self.to_physical(self.signal[sli], dtype, out)
+
+    def records(self, A: int = 0, B: Optional[int] = None) -> np.ndarray:
+        """return digital samples of records `A:B` as `(records, samples)`
+        view into the file, see `BlobSlice.records`"""
         if self.signal is None:
             raise RuntimeError(f"channel {self} uninitialized")
 
-        scale = (self.physmax - self.physmin) / (self.digimax - self.digimin)
-        offset = self.physmax / scale - self.digimax
-        return scale * (self.signal[sli] + offset)
+        return self.signal.records(A, B)
 
-    def from_dict(self, signals: Dict[Label, np.ndarray]) -> np.ndarray:
-        return signals[self.label]
+    def digital(self, sli: slice = slice(None),
+                copy: bool = False) -> np.ndarray:
+        """return digital samples `sli` without scaling
+
+        Samples within a single record are a view into the file unless
+        `copy` is set; samples across records are always a copy.
+        """
+        if self.signal is None:
+            raise RuntimeError(f"channel {self} uninitialized")
+
+        A, B, a, b = self.signal.locate(sli)
+        records = self.signal.records(A, B)
+        samples = records.reshape(-1)[a:b]
+        if copy and np.may_share_memory(samples, records):
+            return samples.copy()
+
+        return samples
+
+    @property
+    def coefficients(self) -> Tuple[float, float]:
+        """return `(gain, bias)` with physical = gain * digital + bias"""
+        if self._coefficients is None:
+            gain = (self.physmax - self.physmin) \
+                / (self.digimax - self.digimin)
+            bias = self.physmax - gain * self.digimax
+            self._coefficients = (gain, bias)
+
+        return self._coefficients
+
+    @instrument.timed('channel.scale')
+    def to_physical(self, digital: np.ndarray, dtype=np.float64,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+        """return physical values of `digital` samples
+
+        The values are computed as `dtype` by one multiplication and one
+        in-place addition, optionally into a preallocated `out`.  With an
+        integer `dtype`, the digital samples are returned unscaled, and
+        ValueError is raised unless `dtype` holds all of them.
+        """
+        dtype = np.dtype(dtype if out is None else out.dtype)
+        if dtype.kind in 'iu':
+            if not np.can_cast(digital.dtype, dtype):
+                raise ValueError(f"digital samples of {digital.dtype} "
+                                 f"exceed {dtype}")
+
+            if out is None:
+                return digital.astype(dtype, copy=False)
+
+            out[...] = digital
+            return out
+
+        gain, bias = self.coefficients
+        out = np.multiply(digital, dtype.type(gain), out=out, dtype=dtype)
+        out += dtype.type(bias)
+        return out
+
+    def to_digital(self, physical: np.ndarray) -> np.ndarray:
+        """return digital samples of `physical` values clipped to range"""
+        gain, bias = self.coefficients
+        digital = np.round((np.asarray(physical) - bias) / gain)
+        return np.clip(digital, self.digimin, self.digimax).astype(np.int32)
+
+    def from_dict(self, signals: Dict[Label, np.ndarray],
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            return signals[self.label]
+
+        out[...] = signals[self.label]
+        return out
 
     @property
     def channel_type(self) -> str:
@@ -64,6 +162,7 @@ class Channel(ChannelBase):
     @physical_minimum.setter
     def physical_minimum(self, v: float):
         self.physmin = v
+        self._coefficients = None
 
     @property
     def physical_maximum(self) -> float:
@@ -72,6 +171,7 @@ class Channel(ChannelBase):
     @physical_maximum.setter
     def physical_maximum(self, v: float):
         self.physmax = v
+        self._coefficients = None
 
     @property
     def digital_minimum(self) -> int:
@@ -80,6 +180,7 @@ class Channel(ChannelBase):
     @digital_minimum.setter
     def digital_minimum(self, v: int):
         self.digimin = v
+        self._coefficients = None
 
     @property
     def digital_maximum(self) -> int:
@@ -88,6 +189,7 @@ class Channel(ChannelBase):
     @digital_maximum.setter
     def digital_maximum(self, v: int):
         self.digimax = v
+        self._coefficients = None
 
     @property
     def prefiltering(self) -> str:
@@ -124,17 +226,17 @@ class Channel(ChannelBase):
         return [self.label]
 
     @classmethod
+    @instrument.timed('channel.read')
     def read(cls, file: BinaryIO, num_channels: int,
              filetype: str = 'EDF') -> List['Channel']:
         channels = [cls() for _ in range(num_channels)]
-        if filetype.startswith('EDF+'):
+        if filetype.startswith(('EDF+', 'BDF+')):
             channels.pop()
             channels.append(AnnotationChannel())
 
         for field in cls.fields:
             data = file.read(field.size * num_channels)
-            format_str = (str(field.size) + 's') * num_channels
-            values = Struct(format_str).unpack(data)
+            values = field_struct(field.size, num_channels).unpack(data)
             normalized = (normalize(field.type, v) for v in values)
             for c, v in zip(channels, normalized):
                 setattr(c, field.name, v)
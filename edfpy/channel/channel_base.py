@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 import numpy as np
 
@@ -7,6 +7,8 @@ from ..field import normalize
 
 
 class ChannelBase:
+    __slots__ = ('_label',)
+
     @property
     def label(self) -> Label:
         return self._label
@@ -28,11 +30,19 @@ class ChannelBase:
     def num_samples_per_record(self) -> int:
         raise NotImplementedError
 
-    def is_compatible(self, other: 'ChannelBase') -> bool:
+    def is_compatible(self, other: 'ChannelBase',
+                      same_rate: bool = True) -> bool:
+        """returns whether `self` and `other` can be derived"""
         compat_label = self.label.is_compatible(other.label)
         same_units = self.physical_dimension == other.physical_dimension
-        same_sr = self.num_samples_per_record == other.num_samples_per_record
+        same_sr = not same_rate or \
+            self.num_samples_per_record == other.num_samples_per_record
         return same_units and same_sr and compat_label
 
-    def from_dict(self, signals_dict: Dict[Label, np.ndarray]) -> np.ndarray:
+    def get(self, sli: slice, dtype=np.float64,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        raise NotImplementedError
+
+    def from_dict(self, signals_dict: Dict[Label, np.ndarray],
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
         raise NotImplementedError
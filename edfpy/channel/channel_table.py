@@ -0,0 +1,92 @@
+from typing import BinaryIO, List, Iterator
+
+import numpy as np
+
+from ..field import normalize
+from .label import Label
+from .channel import Channel
+from .annotation_channel import AnnotationChannel
+
+numeric = {int: np.int64, float: np.float64}
+
+
+class ChannelTable:
+    """channel fields of one file as structured array
+
+    Strings are kept as fixed-width latin1 bytes of their size in the
+    header, and numbers as 64-bit integers and floats, such that a channel
+    takes 256 bytes however many files are held in memory.  `Channel`s are
+    constructed on access; with `annotations`, the last one is the
+    `AnnotationChannel` of an EDF+/BDF+ file.
+
+        with open(filepath, 'rb') as fp:
+            header = Header.read(fp)
+            table = ChannelTable.read(fp, header.num_channels,
+                                      header.filetype)
+    """
+
+    dtype = np.dtype([
+        (f.name, f"S{f.size}" if f.type is str else numeric[f.type])
+        for f in Channel.fields
+    ])
+
+    def __init__(self, rows: np.ndarray, annotations: bool = False):
+        self.rows = rows
+        self.annotations = annotations
+
+    @classmethod
+    def from_channels(cls, channels: List[Channel]) -> 'ChannelTable':
+        rows = np.zeros(len(channels), dtype=cls.dtype)
+        for f in Channel.fields:
+            # labels are kept as read from the file, see `Label.original`
+            values = [c.label.original if f.name == 'label'
+                      else getattr(c, f.name) for c in channels]
+            rows[f.name] = [v.encode('latin1') for v in values] \
+                if f.type is str else values
+
+        annotations = bool(channels) \
+            and isinstance(channels[-1], AnnotationChannel)
+        return cls(rows, annotations)
+
+    @classmethod
+    def read(cls, file: BinaryIO, num_channels: int,
+             filetype: str = 'EDF') -> 'ChannelTable':
+        """returns the table of `num_channels` channels read from `file`,
+        see `Channel.read`"""
+        rows = np.zeros(num_channels, dtype=cls.dtype)
+        for f in Channel.fields:
+            data = file.read(f.size * num_channels)
+            column = np.char.strip(np.frombuffer(data, f"S{f.size}"),
+                                   b' \x00')
+            if f.type is str:
+                rows[f.name] = column
+                continue
+
+            try:
+                rows[f.name] = column.astype(numeric[f.type])
+            except ValueError:
+                rows[f.name] = [normalize(f.type, v) for v in column]
+
+        return cls(rows, filetype.startswith(('EDF+', 'BDF+')))
+
+    def __len__(self) -> int:
+        return self.rows.size
+
+    @property
+    def labels(self) -> List[Label]:
+        return [Label(v.decode('latin1')) for v in self.rows['label']]
+
+    def __getitem__(self, i: int) -> Channel:
+        """returns channel `i` with the fields of its row"""
+        row = self.rows[i]
+        fields = {f.name: normalize(f.type, row[f.name]) if f.type is str
+                  else f.type(row[f.name]) for f in Channel.fields}
+        last = i in (-1, len(self) - 1)
+        cls = AnnotationChannel if self.annotations and last else Channel
+        return cls(**fields)
+
+    def __iter__(self) -> Iterator[Channel]:
+        return (self[i] for i in range(len(self)))
+
+    def channels(self) -> List[Channel]:
+        return list(self)
@@ -1,33 +1,81 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 
+from ..resample import ratio, resample, get_resampled
 from .channel_base import ChannelBase
 from .label import Label
 
 
+def check_dtype(dtype):
+    if np.dtype(dtype).kind not in 'fc':
+        raise ValueError(f"derivations need floating point type, not {dtype}")
+
+
 class Derivation(ChannelBase):
     operations = {
-        '+': lambda l, r: l + r,
-        '-': lambda l, r: l - r,
+        '+': np.add,
+        '-': np.subtract,
     }
 
-    def __init__(self, left, right):
+    def __init__(self, left, right, operation: Optional[str] = None):
         self.left = left
         self.right = right
-        self.label, operation = left.label.derive(right.label)
+        if operation is None:
+            self.label, operation = left.label.derive(right.label)
+        elif operation == '+':
+            self.label = left.label + right.label
+        else:
+            self.label = left.label - right.label
+
         self.op = self.operations[operation]
 
     def __getitem__(self, sli: slice) -> np.ndarray:
         """return a slice of the derivation"""
-        left = self.left[sli]
-        right = self.right[sli]
-        return self.op(left, right)
+        return self.get(sli)
+
+    def get(self, sli: slice, dtype=np.float64,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        """return a slice of the derivation as `dtype`, optionally in `out`"""
+        dtype = dtype if out is None else out.dtype
+        check_dtype(dtype)
+        if self.left.num_samples_per_record \
+                == self.right.num_samples_per_record:
+            left = self.left.get(sli, dtype, out)
+            right = self.right.get(sli, dtype)
+            return self.op(left, right, out=left)
+
+        # children of lower rate are resampled to the rate of the derivation
+        rate = self.num_samples_per_record
+        left = get_resampled(self.left, sli, rate, dtype)
+        right = get_resampled(self.right, sli, rate, dtype)
+        n = min(left.size, right.size)
+        return self.op(left[:n], right[:n], out=out)
 
-    def from_dict(self, signals: Dict[Label, np.ndarray]) -> np.ndarray:
+    def from_dict(self, signals: Dict[Label, np.ndarray],
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        """returns the derivation of `signals` by label
+
+        Signals of children at a lower rate are resampled to the rate of the
+        derivation, unless they already match it in length.  Resampling here
+        counts samples beyond their ends as zero, which is why the reader
+        passes signals resampled from a margin around the requested span.
+        """
         left = self.left.from_dict(signals)
         right = self.right.from_dict(signals)
-        return self.op(left, right)
+        if left.size != right.size:
+            left, right = self.aligned(left, right)
+
+        return self.op(left, right, out=out)
+
+    def aligned(self, left: np.ndarray, right: np.ndarray):
+        """returns `left` and `right` at the rate of the derivation"""
+        rate = self.num_samples_per_record
+        left = resample(left, *ratio(self.left.num_samples_per_record, rate))
+        right = resample(right,
+                         *ratio(self.right.num_samples_per_record, rate))
+        n = min(left.size, right.size)
+        return left[:n], right[:n]
 
     @property
     def channel_type(self):
@@ -39,7 +87,8 @@ class Derivation(ChannelBase):
 
     @property
     def num_samples_per_record(self):
-        return self.left.num_samples_per_record
+        return max(self.left.num_samples_per_record,
+                   self.right.num_samples_per_record)
 
     @property
     def children(self) -> List[Label]:
@@ -52,3 +101,47 @@ class Derivation(ChannelBase):
             raise ValueError(f"cannot derive {self} and {other}")
 
         return Derivation(self, other)
+
+
+class Inversion(ChannelBase):
+    """channel with reversed polarity, e.g. `M2-F3` from `F3-M2`"""
+
+    def __init__(self, child):
+        self.child = child
+        self.label = -child.label
+
+    def __getitem__(self, sli: slice) -> np.ndarray:
+        return self.get(sli)
+
+    def get(self, sli: slice, dtype=np.float64,
+            out: Optional[np.ndarray] = None) -> np.ndarray:
+        dtype = dtype if out is None else out.dtype
+        check_dtype(dtype)
+        child = self.child.get(sli, dtype, out)
+        return np.negative(child, out=child)
+
+    def from_dict(self, signals: Dict[Label, np.ndarray],
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.negative(self.child.from_dict(signals), out=out)
+
+    @property
+    def channel_type(self):
+        return self.child.channel_type
+
+    @property
+    def physical_dimension(self) -> str:
+        return self.child.physical_dimension
+
+    @property
+    def num_samples_per_record(self):
+        return self.child.num_samples_per_record
+
+    @property
+    def children(self) -> List[Label]:
+        return self.child.children
+
+    def derive(self, other: ChannelBase) -> ChannelBase:
+        if not self.is_compatible(other):
+            raise ValueError(f"cannot derive {self} and {other}")
+
+        return Derivation(self, other)
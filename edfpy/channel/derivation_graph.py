@@ -0,0 +1,145 @@
+from typing import List, Dict, Optional, Sequence, Tuple, Iterator
+from collections import deque
+from itertools import product
+
+from .. import instrument
+from .label import Label
+from .channel_base import ChannelBase
+from .derivation import Derivation, Inversion
+from .annotation_channel import AnnotationChannel
+
+# an edge is a channel traversed from left to right (True) or reversed
+Edge = Tuple[ChannelBase, bool]
+Node = Optional[str]
+
+
+class DerivationGraph:
+    """resolve labels to channels and derivations on demand
+
+    Every channel `L-R` is an edge between electrodes `L` and `R`, and a
+    monopolar channel `L` connects its electrode to the common reference
+    `None`.  A requested label `A-B` is resolved by a breadth-first search
+    for the shortest path from `A` to `B` over edges of equal physical
+    dimension and sampling rate, or, failing that, of equal physical
+    dimension, in which case the derivation resamples its channels to the
+    highest rate.  The derivation along the path is memoized, such that
+    repeated requests are dictionary lookups.
+    """
+
+    def __init__(self, channels: Sequence[ChannelBase]):
+        self.channels = [c for c in channels
+                         if not isinstance(c, AnnotationChannel)]
+        self.resolved: Dict[Label, ChannelBase] = {
+            c.label: c for c in channels
+        }
+        self._edges: Dict[bool, Dict[tuple, Dict[Node, List[Edge]]]] = {}
+
+    def edges(self, same_rate: bool = True
+              ) -> Dict[tuple, Dict[Node, List[Edge]]]:
+        """returns adjacency lists by physical dimension and, with
+        `same_rate`, sampling rate"""
+        if same_rate not in self._edges:
+            groups = self._edges[same_rate] = {}
+            for c in self.channels:
+                key = (c.physical_dimension,
+                       c.num_samples_per_record if same_rate else None)
+                adjacency = groups.setdefault(key, {})
+                left, right = c.label.parts[:2]
+                adjacency.setdefault(left, []).append((c, True))
+                adjacency.setdefault(right, []).append((c, False))
+
+        return self._edges[same_rate]
+
+    def __getitem__(self, label: Label) -> ChannelBase:
+        label = label if isinstance(label, Label) else Label(label)
+        try:
+            return self.resolved[label]
+        except KeyError:
+            pass
+
+        with instrument.stage('derivation.resolve'):
+            path = self.shortest_path(label.left, label.right)
+            if path is None:
+                raise KeyError(label)
+
+            derivation = self.build(path)
+
+        self.resolved[label] = derivation
+        return derivation
+
+    def __contains__(self, label: Label) -> bool:
+        try:
+            self[label]
+        except KeyError:
+            return False
+
+        return True
+
+    def __iter__(self) -> Iterator[Label]:
+        return iter(self.labels())
+
+    def shortest_path(self, source: Node,
+                      target: Node) -> Optional[List[Edge]]:
+        """returns the shortest list of edges from `source` to `target`"""
+        best: Optional[List[Edge]] = None
+        if source == target:
+            return best
+
+        for same_rate in (True, False):
+            for adjacency in self.edges(same_rate).values():
+                if source not in adjacency or target not in adjacency:
+                    continue
+
+                path = self.search(adjacency, source, target)
+                if path is not None and \
+                        (best is None or len(path) < len(best)):
+                    best = path
+
+            if best is not None:
+                break
+
+        return best
+
+    @staticmethod
+    def search(adjacency: Dict[Node, List[Edge]], source: Node,
+               target: Node) -> Optional[List[Edge]]:
+        previous: Dict[Node, Tuple[Node, Edge]] = {}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path: List[Edge] = []
+                while node != source:
+                    node, edge = previous[node]
+                    path.append(edge)
+
+                return path[::-1]
+
+            for channel, forward in adjacency[node]:
+                left, right = channel.label.parts[:2]
+                neighbor = right if forward else left
+                if neighbor != source and neighbor not in previous:
+                    previous[neighbor] = (node, (channel, forward))
+                    queue.append(neighbor)
+
+        return None
+
+    @staticmethod
+    def build(path: List[Edge]) -> ChannelBase:
+        """returns the derivation summing up channels along `path`"""
+        channel, forward = path[0]
+        derivation = channel if forward else Inversion(channel)
+        for channel, forward in path[1:]:
+            operation = '+' if forward else '-'
+            derivation = Derivation(derivation, channel, operation)
+
+        return derivation
+
+    def labels(self) -> List[Label]:
+        """returns basic labels, their pairwise and resolved derivations"""
+        labels = dict.fromkeys(self.resolved)
+        for left, right in product(self.channels, self.channels):
+            if left is not right and left.is_compatible(right):
+                labels.setdefault(left.label.derive(right.label)[0])
+
+        return list(labels)
@@ -1,46 +1,90 @@
-from typing import Optional, Tuple
-from ...cached_property import cached_property
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Tuple
 from .notation import synonyms
 
+# synonyms by upper-case label part, compiled from `notation.synonyms` and
+# extended by `register_synonyms`
+part_synonyms: Dict[str, str] = {
+    part: synonym for part, synonym in synonyms.items() if '-' not in part
+}
+
+
+def register_synonyms(mapping: Mapping[str, str]):
+    """add site-specific synonyms of label parts, e.g. `{'EEGC3': 'C3'}`
+
+    Parts are matched case-insensitively between dashes and replaced by
+    their synonym, which may span parts such as `C3-M2`.  Each part of a
+    synonym is normalized like a label part, so `{'LMAST': 'A1'}` yields
+    the built-in `M1`.  Labels normalized before are evicted from the cache
+    of `Label`.
+    """
+    invalid = [part for part in mapping if '-' in part or ' ' in part]
+    if invalid:
+        raise ValueError(f"synonyms of label parts without '-' or ' ': "
+                         f"{invalid}")
+
+    invalid = [v for v in mapping.values() if not v or ' ' in v]
+    if invalid:
+        raise ValueError(f"synonyms must be non-empty without ' ': "
+                         f"{invalid}")
+
+    part_synonyms.update({
+        k.upper(): '-'.join(part_synonyms.get(p, p)
+                            for p in v.upper().split('-'))
+        for k, v in mapping.items()
+    })
+    Label.cache_clear()
+
 
 class Label(str):
-    def __init__(self, original: str):
-        """initialize Label with `.original` storing input str"""
-        self.original = original
+    """normalized channel label such as `C3-M2`
+
+    Labels are interned: constructing a label from an original string seen
+    before returns the same instance from a bounded cache, with its `parts`
+    computed once at construction.
+    """
 
-    def __new__(cls, original: str):
-        """normalize original input str in new instance"""
-        normalized = cls.normalize(original)
-        return super().__new__(cls, normalized)
+    original: str
+    parts: List[Optional[str]]
+    left: Optional[str]
+    right: Optional[str]
+
+    def __new__(cls, original: str) -> 'Label':
+        """returns the interned label of normalized `original` input str"""
+        return intern(cls, original)
+
+    @classmethod
+    def create(cls, original: str) -> 'Label':
+        """returns a new label with `.original` storing input str"""
+        label = super().__new__(cls, cls.normalize(original))
+        label.original = original
+        parts: List[Optional[str]] = list(label.split('-'))
+        if len(parts) == 1:
+            parts.append(None)
+        elif parts[0] == '':
+            parts[0] = None
+
+        label.parts = parts
+        label.left, label.right = parts[0], parts[1]
+        return label
+
+    @staticmethod
+    def cache_clear():
+        intern.cache_clear()
+
+    def __reduce__(self):
+        return type(self), (self.original,)
 
     @classmethod
     def normalize(cls, original: str) -> str:
         split = original.replace('/', '-').upper().split(' ')
         label = split[1] if 1 < len(split) else split[0]
         synonym_tuple = (
-            synonyms.get(part, part)
+            part_synonyms.get(part, part)
             for part in label.split('-')
         )
         return '-'.join(synonym_tuple)
 
-    @property
-    def left(self) -> Optional[str]:
-        return self.parts[0]
-
-    @cached_property
-    def right(self) -> Optional[str]:
-        return self.parts[1]
-
-    @cached_property
-    def parts(self):
-        parts = self.split('-')
-        if len(parts) == 1:
-            return parts + [None]
-        elif parts[0] == '':
-            parts[0] = None
-
-        return parts
-
     def derive(self, other: 'Label') -> Tuple['Label', str]:
         if not self.is_compatible(other):
             raise ValueError(f"Unable to derive {self} with {other}")
@@ -78,3 +122,9 @@ class Label(str):
         left: str = ls or ''
         right: str = f"-{rs}" if rs else ''
         return cls(f"{left}{right}")
+
+
+@lru_cache(maxsize=1 << 14)
+def intern(cls, original: str) -> Label:
+    """returns `cls.create(original)`, cached by class and input str"""
+    return cls.create(original)
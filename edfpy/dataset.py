@@ -0,0 +1,248 @@
+import os
+from threading import local
+from collections import namedtuple, deque, OrderedDict
+from concurrent.futures import (Executor, Future, ThreadPoolExecutor,
+                                ProcessPoolExecutor, wait, FIRST_COMPLETED)
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .reader import Reader
+from .channel import Label
+
+Request = namedtuple('Request', 'path labels t0 dt')
+Signals = Dict[Label, np.ndarray]
+# name of the shared memory block and (label, dtype, shape, offset) layout
+Shared = Tuple[str, List[Tuple[str, str, Tuple[int, ...], int]]]
+
+# readers of the current worker thread or process, see `start_worker`
+worker = local()
+max_readers = 64
+
+
+def start_worker():
+    worker.readers = OrderedDict()
+
+
+def open_reader(path: str) -> Reader:
+    """returns a reader of `path`, memory-mapped once per worker
+
+    A worker keeps its `max_readers` most recently used readers, which are
+    released together with the worker when its pool shuts down.
+    """
+    readers = getattr(worker, 'readers', None)
+    if readers is None:
+        return Reader.open(path)
+
+    if path in readers:
+        readers.move_to_end(path)
+        return readers[path]
+
+    readers[path] = Reader.open(path)
+    while len(readers) > max_readers:
+        readers.popitem(last=False)
+
+    return readers[path]
+
+
+def read(request: Request, dtype) -> Signals:
+    reader = open_reader(request.path)
+    return reader.get_physical_samples(request.t0, request.dt,
+                                       request.labels, dtype)
+
+
+def read_shared(request: Request, dtype) -> Shared:
+    """read `request` into a new shared memory block
+
+    The layout is sized by `Reader.num_samples` before reading, so samples
+    are scaled straight into views of the block.
+    """
+    reader = open_reader(request.path)
+    labels = list(dict.fromkeys(map(Label, request.labels))) \
+        if request.labels else reader.basic_labels
+    dtype = np.dtype(dtype)
+    layout: List[Tuple[str, str, Tuple[int, ...], int]] = []
+    offset = 0
+    for label in labels:
+        shape: Tuple[int, ...] = \
+            (reader.num_samples(label, request.t0, request.dt),)
+        layout.append((str(label), dtype.str, shape, offset))
+        offset += shape[0] * dtype.itemsize
+
+    shm = SharedMemory(create=True, size=max(offset, 1))
+    try:
+        out = {label: np.ndarray(shape, dtype, shm.buf, offset)
+               for label, (_, _, shape, offset) in zip(labels, layout)}
+        signals = reader.get_physical_samples(request.t0, request.dt,
+                                              labels, dtype, out)
+        for label, signal in signals.items():
+            if signal is not out[label]:
+                out[label][...] = signal
+
+        # views of the block must be released before it is closed
+        del out, signals
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+    shm.close()
+    return shm.name, layout
+
+
+def collect(shared: Shared) -> Signals:
+    """copy signals out of a shared memory block and release the block
+
+    The copy is what lets the block be closed and unlinked right away:
+    arrays viewing it would keep the mapping exported, and the block alive
+    and listed in `/dev/shm` for as long as any of them is referenced.
+    """
+    name, layout = shared
+    shm = SharedMemory(name=name)
+    try:
+        signals = {
+            Label(label): np.ndarray(shape, dtype, shm.buf, offset).copy()
+            for label, dtype, shape, offset in layout
+        }
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return signals
+
+
+def release(shared: Shared):
+    """release a shared memory block without reading it"""
+    shm = SharedMemory(name=shared[0])
+    shm.close()
+    shm.unlink()
+
+
+class Dataset:
+    """read windows from many EDF files on a thread or process pool
+
+    Each `Request(path, labels, t0, dt)` is read with
+    `Reader.get_physical_samples`.  Workers keep their readers, so every
+    file is memory-mapped once per worker and shares the page cache.  With
+    `executor='process'`, workers hand their samples back through shared
+    memory instead of pickling arrays through a pipe.  Requests still in
+    flight when iteration stops early are cancelled, or waited for and
+    their shared memory released.
+
+        requests = [Request(path, ['C3-M2'], 30.0, 30.0) for path in paths]
+        for request, signals in Dataset(requests).as_completed():
+            ...
+    """
+
+    def __init__(self, requests: Iterable[Request], executor: str = 'thread',
+                 max_workers: Optional[int] = None, dtype=np.float64):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"unknown executor {executor}")
+
+        self.requests = [Request(*r) for r in requests]
+        self.executor = executor
+        self.max_workers = max_workers
+        self.dtype = dtype
+
+    @property
+    def num_workers(self) -> int:
+        """returns `max_workers` or the default of the executor"""
+        if self.max_workers is not None:
+            return self.max_workers
+
+        num_cpus = os.cpu_count() or 1
+        return min(32, num_cpus + 4) if self.executor == 'thread' \
+            else num_cpus
+
+    def pool(self) -> Executor:
+        if self.executor == 'thread':
+            return ThreadPoolExecutor(self.num_workers,
+                                      initializer=start_worker)
+
+        # workers register their shared memory blocks with the resource
+        # tracker of this process, which forgets them when they are
+        # unlinked here, instead of with trackers of their own that would
+        # report them as leaked on exit
+        resource_tracker.ensure_running()
+        return ProcessPoolExecutor(self.num_workers,
+                                   initializer=start_worker)
+
+    def submit(self, pool: Executor, request: Request) -> Future:
+        if self.executor == 'thread':
+            return pool.submit(read, request, self.dtype)
+
+        return pool.submit(read_shared, request, self.dtype)
+
+    def result(self, future: Future) -> Signals:
+        if self.executor == 'thread':
+            return future.result()
+
+        return collect(future.result())
+
+    def discard(self, futures: Iterable[Future]):
+        """cancel `futures` or wait for them and release their samples"""
+        for future in futures:
+            if future.cancel() or self.executor == 'thread':
+                continue
+
+            try:
+                shared = future.result()
+            except Exception:
+                continue
+
+            release(shared)
+
+    @property
+    def window(self) -> int:
+        """returns the number of requests to keep in flight"""
+        return 2 * self.num_workers
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def __iter__(self) -> Iterator[Signals]:
+        """yields samples of requests in order"""
+        with self.pool() as pool:
+            pending: deque = deque()
+            requests = iter(self.requests)
+            try:
+                for request in requests:
+                    pending.append(self.submit(pool, request))
+                    if len(pending) >= self.window:
+                        break
+
+                while pending:
+                    future = pending.popleft()
+                    for request in requests:
+                        pending.append(self.submit(pool, request))
+                        break
+
+                    yield self.result(future)
+            finally:
+                self.discard(pending)
+
+    def as_completed(self) -> Iterator[Tuple[Request, Signals]]:
+        """yields requests with their samples as soon as they are read"""
+        with self.pool() as pool:
+            pending: Dict[Future, Request] = {}
+            requests = iter(self.requests)
+            try:
+                for request in requests:
+                    pending[self.submit(pool, request)] = request
+                    if len(pending) >= self.window:
+                        break
+
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        request = pending.pop(future)
+                        for next_request in requests:
+                            pending[self.submit(pool, next_request)] = \
+                                next_request
+                            break
+
+                        yield request, self.result(future)
+            finally:
+                self.discard(pending)
@@ -0,0 +1,153 @@
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .channel import Label
+
+# start times of blocks and their minimum, maximum and mean
+Summary = namedtuple('Summary', 't min max mean')
+
+
+class Envelope:
+    """min/max/mean pyramid of a signal for overview plots
+
+    Level 0 summarizes blocks of `base` samples, and every further level
+    blocks of `factor` entries of the level below, up to a level of at most
+    `factor` entries.  Each level is a `(3, blocks)` array of minimum,
+    maximum and mean; the last block of a level may be partial.
+    """
+
+    def __init__(self, levels: List[np.ndarray], num_samples: int,
+                 base: int = 64, factor: int = 4):
+        self.levels = levels
+        self.num_samples = num_samples
+        self.base = base
+        self.factor = factor
+
+    def block_size(self, level: int) -> int:
+        """returns the number of samples per block of `level`"""
+        return self.base * self.factor ** level
+
+    def select(self, start: int, stop: int,
+               max_points: int) -> Tuple[int, np.ndarray]:
+        """returns the finest level with at most `max_points` blocks
+        covering samples `start:stop`, and its blocks as view"""
+        stop = min(stop, self.num_samples)
+        for level, blocks in enumerate(self.levels):
+            size = self.block_size(level)
+            a, b = start // size, -(-stop // size)
+            if b - a <= max_points or level == len(self.levels) - 1:
+                return level, blocks[:, a:b]
+
+        raise ValueError("empty envelope")
+
+    def summary(self, start: int, stop: int, max_points: int,
+                rate: float) -> Summary:
+        """returns the summary of samples `start:stop` at `rate`"""
+        level, blocks = self.select(start, stop, max_points)
+        size = self.block_size(level)
+        first = start // size
+        t = (first + np.arange(blocks.shape[1])) * size / rate
+        return Summary(t, *blocks)
+
+    @staticmethod
+    def reduce(blocks: np.ndarray, counts: np.ndarray,
+               factor: int) -> Tuple[np.ndarray, np.ndarray]:
+        """returns the next level of `blocks` with `counts` samples each"""
+        idx = np.arange(0, blocks.shape[1], factor)
+        weighted = blocks[2] * counts
+        counts = np.add.reduceat(counts, idx)
+        reduced = np.stack([
+            np.minimum.reduceat(blocks[0], idx),
+            np.maximum.reduceat(blocks[1], idx),
+            np.add.reduceat(weighted, idx) / counts,
+        ]).astype(blocks.dtype)
+        return reduced, counts
+
+
+class EnvelopeBuilder:
+    """build an envelope from consecutive chunks of a signal"""
+
+    def __init__(self, base: int = 64, factor: int = 4, dtype=np.float32):
+        self.base = base
+        self.factor = factor
+        self.dtype = dtype
+        self.blocks: List[np.ndarray] = []
+        self.rest = np.empty(0)
+        self.num_samples = 0
+
+    def update(self, chunk: np.ndarray):
+        """summarize the complete blocks of `chunk` after leftover samples"""
+        self.num_samples += chunk.size
+        if self.rest.size:
+            chunk = np.concatenate([self.rest, chunk])
+
+        n = chunk.size // self.base * self.base
+        if n:
+            self.blocks.append(self.summarize(chunk[:n]))
+
+        self.rest = chunk[n:]
+
+    def summarize(self, samples: np.ndarray) -> np.ndarray:
+        idx = np.arange(0, samples.size, self.base)
+        counts = np.diff(np.append(idx, samples.size))
+        return np.stack([
+            np.minimum.reduceat(samples, idx),
+            np.maximum.reduceat(samples, idx),
+            np.add.reduceat(samples, idx) / counts,
+        ]).astype(self.dtype)
+
+    def finish(self) -> Envelope:
+        """returns the envelope of all samples so far"""
+        blocks = self.blocks
+        if self.rest.size:
+            blocks = blocks + [self.summarize(self.rest)]
+
+        level = np.concatenate(blocks, axis=1) if blocks else \
+            np.empty((3, 0), dtype=self.dtype)
+        counts = np.full(level.shape[1], self.base)
+        if counts.size:
+            counts[-1] = self.num_samples - self.base * (counts.size - 1)
+
+        levels = [level]
+        while levels[-1].shape[1] > self.factor:
+            level, counts = Envelope.reduce(level, counts, self.factor)
+            levels.append(level)
+
+        return Envelope(levels, self.num_samples, self.base, self.factor)
+
+
+def save_envelopes(filepath: str, envelopes: Dict[Label, Envelope]):
+    """write `envelopes` by label to `.npz` file `filepath`"""
+    arrays: Dict[str, Any] = {}
+    for label, envelope in envelopes.items():
+        arrays[f"{label}/meta"] = np.array(
+            [envelope.num_samples, envelope.base, envelope.factor])
+        for k, level in enumerate(envelope.levels):
+            arrays[f"{label}/{k}"] = level
+
+    with open(filepath, 'wb') as fp:
+        np.savez(fp, **arrays)
+
+
+def load_envelopes(filepath: str,
+                   labels: Optional[List[str]] = None
+                   ) -> Dict[Label, Envelope]:
+    """returns envelopes by label read from `filepath`"""
+    with np.load(filepath, allow_pickle=False) as npz:
+        keys = [k.rsplit('/', 1) for k in npz.files]
+        names = dict.fromkeys(name for name, key in keys if key == 'meta')
+        wanted = None if labels is None else set(map(Label, labels))
+        envelopes = {}
+        for name in names:
+            label = Label(name)
+            if wanted is not None and label not in wanted:
+                continue
+
+            num_samples, base, factor = map(int, npz[f"{name}/meta"])
+            num_levels = sum(1 for n, k in keys if n == name and k != 'meta')
+            levels = [npz[f"{name}/{k}"] for k in range(num_levels)]
+            envelopes[label] = Envelope(levels, num_samples, base, factor)
+
+    return envelopes
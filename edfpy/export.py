@@ -0,0 +1,251 @@
+import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .header import Header
+from .channel import Channel, Label
+
+
+def filename(label: str) -> str:
+    """returns `label` as name of a file or zarr array, with characters
+    other than letters, digits, `.`, `+` and `-` replaced by `_`"""
+    name = re.sub(r'[^\w.+-]', '_', label)
+    return f"_{name}" if name.startswith('.') or not name else name
+
+
+def metadata(reader, labels: Sequence[str]) -> Dict[str, Any]:
+    """returns header and channel fields, sampling rates and annotations of
+    `reader` as JSON-serializable dict"""
+    rd = reader.header.record_duration
+    basic = {c.label: c for c in reader.channels}
+    meta: Dict[str, Any] = {
+        'header': {f.name: getattr(reader.header, f.name)
+                   for f in Header.fields},
+        'labels': list(labels),
+        'sample_rates': [
+            reader.derivation_by_label[ll].num_samples_per_record / rd
+            for ll in labels
+        ],
+        'channels': {
+            ll: {f.name: getattr(basic[ll], f.name) for f in Channel.fields}
+            for ll in labels if ll in basic
+        },
+        'annotations': [],
+    }
+    if reader.annotation_channel is not None:
+        meta['annotations'] = [
+            list(a) for a in reader.annotation_channel.annotations
+        ]
+        if reader.discontinuous:
+            meta['record_onsets'] = reader.record_onsets.tolist()
+
+    return meta
+
+
+class NpyStore:
+    """one `.npy` file per channel and `meta.json` in `directory`
+
+    Arrays are created as memory maps, such that chunks are written in
+    place without holding a channel in memory, and can be read back with
+    `np.load(..., mmap_mode='r')` for random access.
+    """
+
+    def __init__(self, directory: str):
+        self.path = directory
+        self.arrays: Dict[str, np.ndarray] = {}
+        self.files: Dict[str, str] = {}
+
+    def filepath(self, label: str) -> str:
+        return os.path.join(self.path, f"{filename(label)}.npy")
+
+    def create(self, label: str, num_samples: int, dtype, chunk_samples: int,
+               resume: bool = False) -> bool:
+        """create, or with `resume` reopen, the array of channel `label`;
+        returns whether an existing array was reopened"""
+        os.makedirs(self.path, exist_ok=True)
+        filepath = self.filepath(label)
+        check_unique(self.files, label, filepath)
+        if resume and os.path.exists(filepath):
+            arr = np.load(filepath, mmap_mode='r+')
+            if arr.shape == (num_samples,) and arr.dtype == dtype:
+                self.arrays[label] = arr
+                return True
+
+        self.arrays[label] = np.lib.format.open_memmap(
+            filepath, mode='w+', dtype=dtype, shape=(num_samples,))
+        return False
+
+    def write(self, label: str, sli: slice, samples: np.ndarray):
+        self.arrays[label][sli] = samples
+
+    def set_metadata(self, meta: Dict[str, Any]):
+        meta = dict(meta, files={
+            ll: os.path.basename(fp) for ll, fp in self.files.items()})
+        with open(os.path.join(self.path, 'meta.json'), 'w') as fp:
+            json.dump(meta, fp)
+
+    def flush(self):
+        for arr in self.arrays.values():
+            arr.flush()
+
+
+class ZarrStore:
+    """one zarr array per channel in the group at `path`, chunked along
+    time, with metadata in the attributes of the group; requires `zarr`"""
+
+    def __init__(self, path: str):
+        import zarr
+        self.zarr = zarr
+        self.path = path
+        self.arrays: Dict[str, Any] = {}
+        self.files: Dict[str, str] = {}
+
+    def create(self, label: str, num_samples: int, dtype, chunk_samples: int,
+               resume: bool = False) -> bool:
+        """create, or with `resume` reopen, the array of channel `label`;
+        returns whether an existing array was reopened"""
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, filename(label))
+        check_unique(self.files, label, path)
+        if resume and os.path.exists(path):
+            arr = self.zarr.open_array(path, mode='r+')
+            if arr.shape == (num_samples,) and arr.dtype == dtype:
+                self.arrays[label] = arr
+                return True
+
+        self.arrays[label] = self.zarr.open_array(
+            path, mode='w', shape=(num_samples,), chunks=(chunk_samples,),
+            dtype=dtype)
+        return False
+
+    def write(self, label: str, sli: slice, samples: np.ndarray):
+        self.arrays[label][sli] = samples
+
+    def set_metadata(self, meta: Dict[str, Any]):
+        meta = dict(meta, files={
+            ll: os.path.basename(p) for ll, p in self.files.items()})
+        self.zarr.open_group(self.path, mode='a').attrs.update(meta)
+
+    def flush(self):
+        pass
+
+
+def check_unique(files: Dict[str, str], label: str, path: str):
+    """record `path` of `label` in `files`, unless taken by another label"""
+    taken = [ll for ll, p in files.items() if p == path and ll != label]
+    if taken:
+        raise ValueError(f"labels {taken[0]!r} and {label!r} map to the "
+                         f"same file {path!r}")
+
+    files[label] = path
+
+
+class Manifest:
+    """chunks written so far, saved to `manifest.json` of the store
+
+    A conversion is resumed only if it was started with equal `params`.
+    """
+
+    def __init__(self, path: str, params: Dict[str, Any]):
+        self.filepath = os.path.join(path, 'manifest.json')
+        self.params = params
+        self.done: set = set()
+
+    def load(self) -> bool:
+        """returns whether a manifest of equal parameters was loaded"""
+        try:
+            with open(self.filepath) as fp:
+                saved = json.load(fp)
+        except (OSError, ValueError):
+            return False
+
+        if saved.get('params') != self.params:
+            return False
+
+        self.done = set(saved['done'])
+        return True
+
+    def save(self):
+        tmp = self.filepath + '.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump({'params': self.params, 'done': sorted(self.done)}, fp)
+
+        os.replace(tmp, self.filepath)
+
+
+def export(reader, store, labels: List[str] = None, chunk_records: int = 64,
+           dtype=np.float32, workers: Optional[int] = None,
+           resume: bool = True):
+    """write `labels` of `reader`, by default all signals, to `store` in
+    chunks of records
+
+    Chunks of `chunk_records` records are read with `Reader.read_span` and
+    written into per-channel arrays on `workers` threads, with at most two
+    chunks per worker in flight.  Every finished chunk is recorded in the
+    manifest of the store, such that an interrupted export is resumed from
+    the missing chunks.  Discontinuous recordings are written in the
+    sequence of records with `record_onsets` in the metadata.
+
+        export(Reader.open('psg.edf'), NpyStore('psg'), workers=8)
+        x = np.load('psg/C3-M2.npy', mmap_mode='r')
+    """
+    labels = [Label(ll) for ll in labels] if labels else \
+        [c.label for c in reader.basic_channels()]
+    reader.check_dtype(labels, dtype)
+    dtype = np.dtype(dtype)
+    rd = reader.header.record_duration
+    num_records = reader.header.num_records
+    rates = {ll: reader.derivation_by_label[ll].num_samples_per_record
+             for ll in labels}
+    num_chunks = -(-num_records // chunk_records)
+    manifest = Manifest(store.path, {
+        'labels': list(labels), 'num_records': num_records,
+        'chunk_records': chunk_records, 'num_chunks': num_chunks,
+        'dtype': dtype.str,
+    })
+    resume = resume and manifest.load()
+    reopened = [store.create(label, num_records * n, dtype, chunk_records * n,
+                             resume=resume)
+                for label, n in rates.items()]
+    if not all(reopened):
+        # chunks are recorded for all channels, such that an array created
+        # anew invalidates every chunk of the manifest
+        manifest.done.clear()
+
+    store.set_metadata(metadata(reader, labels))
+
+    def convert(k: int) -> int:
+        A = k * chunk_records
+        B = min(A + chunk_records, num_records)
+        signals = reader.read_span(A * rd, B * rd, labels, dtype)
+        for label, n in rates.items():
+            store.write(label, slice(A * n, B * n), signals[label])
+
+        return k
+
+    chunks = [k for k in range(num_chunks) if k not in manifest.done]
+    if not workers:
+        for k in chunks:
+            manifest.done.add(convert(k))
+            manifest.save()
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            pending: set = set()
+            for k in chunks:
+                if len(pending) >= 2 * workers:
+                    finished, pending = wait(pending,
+                                             return_when=FIRST_COMPLETED)
+                    manifest.done.update(f.result() for f in finished)
+                    manifest.save()
+
+                pending.add(pool.submit(convert, k))
+
+            manifest.done.update(f.result() for f in wait(pending)[0])
+
+    store.flush()
+    manifest.save()
+    return store
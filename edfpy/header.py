@@ -3,7 +3,7 @@ from struct import Struct
 from typing import BinaryIO
 from datetime import datetime
 
-from .cached_property import cached_property
+from . import instrument
 from .field import Field, normalize, serialize
 
 
@@ -23,8 +23,12 @@ class Header:
     # format_str = ''.join(str(size) + 's'
     #                      for _, _, size in fields_rec.bytesize)
     format_str = '8s80s80s8s8s8s44s8s8s4s'
+    struct = Struct(format_str)
     # _num_header_bytes = sum(field.size for field in fields)
     default_num_header_bytes = 256
+    # BioSemi's BDF marks its version with a leading 0xFF byte
+    bdf_version = '\xffBIOSEMI'
+    __slots__ = tuple(f"_{field.name}" for field in fields)
 
     @property
     def version(self) -> str:
@@ -86,6 +90,9 @@ class Header:
 
     @property
     def filetype(self) -> str:
+        if self.version == self.bdf_version:
+            return self.reserved if self.reserved.startswith('BDF+') else 'BDF'
+
         return 'EDF' if self.reserved == '' else self.reserved
 
     @property
@@ -119,7 +126,7 @@ class Header:
         for k, v in kwargs.items():
             getattr(type(self), k).fset(self, v)
 
-    @cached_property
+    @property
     def startdatetime(self) -> datetime:
         datetime_str = f"{self.startdate}-{self.starttime}"
         try:
@@ -129,9 +136,10 @@ class Header:
             return datetime.strptime(datetime_str, '%m.%d.%y-%H.%M.%S')
 
     @classmethod
+    @instrument.timed('header.read')
     def read(cls, file: BinaryIO):
         data = file.read(cls.default_num_header_bytes)
-        values = Struct(cls.format_str).unpack(data)
+        values = cls.struct.unpack(data)
         named_content = {
             field.name: normalize(field.type, value)
             for field, value in zip(cls.fields, values)
@@ -141,6 +149,6 @@ class Header:
     def write(self, file: BinaryIO):
         blob = [serialize(getattr(self, field.name), field.size)
                 for field in self.fields]
-        packed = Struct(self.format_str).pack(*blob)
+        packed = self.struct.pack(*blob)
         file.seek(0, SEEK_SET)
         file.write(packed)
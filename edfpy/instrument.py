@@ -0,0 +1,115 @@
+import json
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional
+
+# profiles being recorded; instrumented code does nothing else if empty
+profiles: List['Profile'] = []
+
+Callback = Callable[[str, Dict[str, float]], None]
+
+
+class Profile:
+    """timings and counters of instrumented stages by name
+
+    Each stage counts its `calls` and `seconds`, plus counters such as
+    `bytes` and `records` reported by the instrumented code, and net
+    `allocated` bytes if allocations are traced.  Every record is also
+    passed to `callback`.
+
+        with instrument.profile() as prof:
+            reader = Reader.open(filepath)
+            reader.get_physical_samples(0.0, 30.0)
+        print(prof.to_json())
+    """
+
+    def __init__(self, callback: Optional[Callback] = None,
+                 trace_allocations: bool = False):
+        self.callback = callback
+        self.trace_allocations = trace_allocations
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.lock = Lock()
+
+    def record(self, name: str, **counters: float):
+        """add `counters` to stage `name`"""
+        with self.lock:
+            stats = self.stages.setdefault(name, {})
+            for key, value in counters.items():
+                stats[key] = stats.get(key, 0) + value
+
+        if self.callback is not None:
+            self.callback(name, counters)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {name: dict(stats) for name, stats in self.stages.items()}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+@contextmanager
+def profile(callback: Optional[Callback] = None,
+            trace_allocations: bool = False) -> Iterator[Profile]:
+    """record instrumented stages while in context"""
+    prof = Profile(callback, trace_allocations)
+    tracing = trace_allocations and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    profiles.append(prof)
+    try:
+        yield prof
+    finally:
+        profiles.remove(prof)
+        if tracing:
+            tracemalloc.stop()
+
+
+def count(name: str, **counters: float):
+    """add `counters` to stage `name` of all active profiles"""
+    for prof in profiles:
+        prof.record(name, **counters)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """time the block in context as stage `name`"""
+    if not profiles:
+        yield
+        return
+
+    traced = any(p.trace_allocations for p in profiles) \
+        and tracemalloc.is_tracing()
+    memory = tracemalloc.get_traced_memory()[0] if traced else 0
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        seconds = perf_counter() - start
+        for prof in profiles:
+            if prof.trace_allocations and traced:
+                allocated = tracemalloc.get_traced_memory()[0] - memory
+                prof.record(name, calls=1, seconds=seconds,
+                            allocated=allocated)
+            else:
+                prof.record(name, calls=1, seconds=seconds)
+
+
+def timed(name: str) -> Callable:
+    """decorate a function to time its calls as stage `name`"""
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not profiles:
+                return f(*args, **kwargs)
+
+            with stage(name):
+                return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
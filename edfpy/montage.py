@@ -0,0 +1,204 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from .channel import Label
+
+# rows of a montage: weights of electrodes by output label
+Rows = Dict[Label, Dict[Optional[str], float]]
+
+double_banana = [
+    'Fp1-F7', 'F7-T3', 'T3-T5', 'T5-O1',
+    'Fp2-F8', 'F8-T4', 'T4-T6', 'T6-O2',
+    'Fp1-F3', 'F3-C3', 'C3-P3', 'P3-O1',
+    'Fp2-F4', 'F4-C4', 'C4-P4', 'P4-O2',
+    'Fz-Cz', 'Cz-Pz',
+]
+transverse = [
+    'F7-Fp1', 'Fp1-Fp2', 'Fp2-F8',
+    'F7-F3', 'F3-Fz', 'Fz-F4', 'F4-F8',
+    'T3-C3', 'C3-Cz', 'Cz-C4', 'C4-T4',
+    'T5-P3', 'P3-Pz', 'Pz-P4', 'P4-T6',
+    'O1-O2',
+]
+# nearest neighbours of the 10-20 electrodes
+neighbours = {
+    'Fp1': ['Fp2', 'F7', 'F3'], 'Fp2': ['Fp1', 'F4', 'F8'],
+    'F7': ['Fp1', 'F3', 'T3'], 'F3': ['Fp1', 'F7', 'Fz', 'C3'],
+    'Fz': ['F3', 'F4', 'Cz'], 'F4': ['Fp2', 'Fz', 'F8', 'C4'],
+    'F8': ['Fp2', 'F4', 'T4'], 'T3': ['F7', 'C3', 'T5'],
+    'C3': ['F3', 'T3', 'Cz', 'P3'], 'Cz': ['Fz', 'C3', 'C4', 'Pz'],
+    'C4': ['F4', 'Cz', 'T4', 'P4'], 'T4': ['F8', 'C4', 'T6'],
+    'T5': ['T3', 'P3', 'O1'], 'P3': ['C3', 'T5', 'Pz', 'O1'],
+    'Pz': ['Cz', 'P3', 'P4'], 'P4': ['C4', 'Pz', 'T6', 'O2'],
+    'T6': ['T4', 'P4', 'O2'], 'O1': ['T5', 'P3', 'O2'],
+    'O2': ['O1', 'P4', 'T6'],
+}
+
+
+def electrode(name: str) -> str:
+    """returns the normalized electrode `name`, e.g. `FZ` of `Fz`"""
+    left = Label(name).left
+    if left is None:
+        raise ValueError(f"no electrode in {name!r}")
+
+    return left
+
+
+class Montage:
+    """linear combinations of electrodes evaluated as one matrix product
+
+    Each row maps an output label to weights of electrodes, such that the
+    bipolar `Fp1-F7` is `{'Fp1': 1, 'F7': -1}`.  `compile` expresses all
+    rows in the basic channels of a reader, along the shortest paths of
+    channels between the electrodes of a row, and `apply` multiplies the
+    resulting `(rows, channels)` weights with one `(channels, samples)`
+    block read of the channels.
+
+        montage = Montage.builtin('double_banana')
+        arr = montage.apply(reader, t0=0.0, dt=30.0, dtype=np.float32)
+    """
+
+    def __init__(self, rows: Mapping[str, Mapping[Optional[str], float]]):
+        self.rows: Rows = {
+            Label(label): {
+                electrode(e) if e else None: float(w)
+                for e, w in weights.items()
+            }
+            for label, weights in rows.items()
+        }
+        self.compiled: WeakKeyDictionary = WeakKeyDictionary()
+
+    @property
+    def labels(self) -> List[Label]:
+        return list(self.rows)
+
+    @property
+    def electrodes(self) -> List[Optional[str]]:
+        return list(dict.fromkeys(e for weights in self.rows.values()
+                                  for e in weights))
+
+    @classmethod
+    def bipolar(cls, labels: Sequence[str]) -> 'Montage':
+        """returns the montage of bipolar `labels` such as `Fp1-F7`"""
+        rows: Dict[str, Dict[Optional[str], float]] = {}
+        for label in map(Label, labels):
+            rows[label] = {label.left: 1.0}
+            rows[label][label.right] = rows[label].get(label.right, 0) - 1.0
+
+        return cls(rows)
+
+    @classmethod
+    def average(cls, electrodes: Sequence[str],
+                suffix: str = 'AVG') -> 'Montage':
+        """returns every electrode referenced to the mean of `electrodes`"""
+        electrodes = [electrode(e) for e in electrodes]
+        mean = -1.0 / len(electrodes)
+        rows: Dict[str, Dict[Optional[str], float]] = {}
+        for e in electrodes:
+            weights: Dict[Optional[str], float] = \
+                dict.fromkeys(electrodes, mean)
+            weights[e] += 1.0
+            rows[f"{e}-{suffix}"] = weights
+
+        return cls(rows)
+
+    @classmethod
+    def laplacian(cls, neighbours: Mapping[str, Sequence[str]],
+                  suffix: str = 'LAP') -> 'Montage':
+        """returns every electrode referenced to the mean of its
+        `neighbours`"""
+        rows: Dict[str, Dict[Optional[str], float]] = {}
+        for e, others in neighbours.items():
+            weights: Dict[Optional[str], float] = {electrode(e): 1.0}
+            for other in others:
+                weights[electrode(other)] = -1.0 / len(others)
+
+            rows[f"{electrode(e)}-{suffix}"] = weights
+
+        return cls(rows)
+
+    @classmethod
+    def builtin(cls, name: str) -> 'Montage':
+        """returns montage `name` of the 10-20 system: `double_banana`,
+        `transverse`, `average` or `laplacian`"""
+        if name == 'double_banana':
+            return cls.bipolar(double_banana)
+        elif name == 'transverse':
+            return cls.bipolar(transverse)
+        elif name == 'average':
+            return cls.average(list(neighbours))
+        elif name == 'laplacian':
+            return cls.laplacian(neighbours)
+
+        raise ValueError(f"unknown montage '{name}'")
+
+    def compile(self, reader) -> Tuple[List[Label], np.ndarray]:
+        """returns the basic channel labels of `reader` and the `(rows,
+        channels)` weights of the montage in these channels
+
+        The channels are the edges between electrodes of the first group of
+        equal physical dimension and sampling rate that contains all
+        electrodes of the montage, see `DerivationGraph.edges`.  Each
+        electrode of a row is referenced to the first one along the
+        shortest path of channels, as `DerivationGraph` resolves labels,
+        such that a bipolar row of a recorded channel is that channel, and
+        redundant channels are never blended.
+        """
+        if reader in self.compiled:
+            return self.compiled[reader]
+
+        electrodes = self.electrodes
+        graph = reader.derivation_by_label
+        for adjacency in graph.edges(same_rate=True).values():
+            if all(e in adjacency for e in electrodes):
+                break
+        else:
+            raise ValueError(f"no channels of equal dimension and rate "
+                             f"span electrodes {electrodes}")
+
+        channels = list(dict.fromkeys(c for edges in adjacency.values()
+                                      for c, _ in edges))
+        index = {c.label: j for j, c in enumerate(channels)}
+        solution = np.zeros((len(self.rows), len(channels)))
+        unresolved = []
+        for i, (label, weights) in enumerate(self.rows.items()):
+            terms = [(e, w) for e, w in weights.items() if w != 0.0]
+            if abs(sum(w for _, w in terms)) > 1e-9:
+                unresolved.append(label)
+                continue
+
+            # `sum(w_e * e) = sum(w_e * (e - pivot))` for weights summing
+            # to zero, and `e - pivot` sums the channels of a path
+            pivot = terms[0][0] if terms else None
+            for e, w in terms[1:]:
+                path = graph.search(adjacency, e, pivot)
+                if path is None:
+                    unresolved.append(label)
+                    break
+
+                for c, forward in path:
+                    solution[i, index[c.label]] += w if forward else -w
+
+        if unresolved:
+            raise ValueError(f"cannot derive {unresolved} from channels "
+                             f"{[c.label for c in channels]}")
+
+        # drop channels without weight and round off numerical noise
+        solution[np.abs(solution) < 1e-12] = 0.0
+        used = np.flatnonzero(np.any(solution != 0.0, axis=0))
+        compiled = [channels[j].label for j in used], solution[:, used]
+        self.compiled[reader] = compiled
+        return compiled
+
+    def apply(self, reader, t0: float = 0.0, dt: float = None,
+              dtype=np.float64) -> np.ndarray:
+        """returns the `(rows, samples)` montage of `reader` at time `t0`
+        for duration `dt` as `dtype`"""
+        if np.dtype(dtype).kind != 'f':
+            raise ValueError("montages are computed as floating point")
+
+        labels, weights = self.compile(reader)
+        block = reader.get_physical_array(t0, dt, labels, dtype)
+        return weights.astype(block.dtype) @ block
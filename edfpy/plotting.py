@@ -1,16 +1,19 @@
-
-import numpy as np
 import matplotlib.pyplot as plt
 
 
-def plot_physical_samples(fo, t0, dt):
+def plot_physical_samples(fo, t0, dt, labels=None, max_points=2000):
+    """plot signals from `t0` to `t0+dt`, spans exceeding `max_points`
+    samples as min/max envelope"""
     ax = None
-    X = fo.get_physical_samples(t0, dt)
+    X = fo.get_envelope(t0, dt, labels, max_points)
     plt.figure(figsize=(20, 10))
     for i, (c, x) in enumerate(X.items()):
-        ax = plt.subplot(fo.num_channels, 1, 1+i, frameon=False, sharex=ax)
-        t = np.linspace(t0, t0+dt, num=x.size)
-        plt.plot(t, x, 'k-')
+        ax = plt.subplot(len(X), 1, 1+i, frameon=False, sharex=ax)
+        if x.min is x.max:
+            plt.plot(x.t, x.mean, 'k-')
+        else:
+            plt.fill_between(x.t, x.min, x.max, step='post', color='k',
+                             linewidth=0)
         plt.xticks(fontsize=20)
         plt.setp(ax.get_xticklabels(), visible=False)
         plt.yticks(fontsize=20)
@@ -18,6 +21,6 @@ def plot_physical_samples(fo, t0, dt):
         plt.grid()
     plt.setp(ax.get_xticklabels(), visible=True)
     plt.xlabel('time (sec.)', fontsize=20)
-    plt.xlim(t[0], t[-1])
+    plt.xlim(t0, t0+dt)
     plt.tight_layout()
     plt.show()
@@ -1,82 +1,931 @@
-from typing import List, Dict, Iterable
+import os
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import functools
+from typing import (List, Dict, Iterable, Iterator, Optional, BinaryIO,
+                    Tuple, Hashable, Callable, Any, Sequence, cast)
 from datetime import datetime
-from itertools import product
 import numpy as np
-from .blob import read_blob
+from numpy.lib.stride_tricks import as_strided
+from .blob import BlobSlice, read_blob, read_slices, Stream
+from . import instrument
+from .block_cache import BlockCache
 from .header import Header
-from .channel import Channel, Label
+from .channel import (Channel, Label, DerivationGraph, AnnotationChannel,
+                      ChannelTable)
+from .channel.derivation import check_dtype
+from .sidecar import Sidecar
+from .cached_property import cached_property
+from .resample import ratio, resample, source_slice, half_width
+from .envelope import Envelope, EnvelopeBuilder, Summary
+from .stats import Stats, StatsBuilder, table, metrics as all_metrics
 
 
 class Reader:
     def __init__(self, header: Header, channels: List[Channel]):
         """initialize reader with a filepath"""
         self.header = header
+        self.channels = channels
         self.basic_labels = [c.label for c in channels]
         self.channel_by_label = {c.label: c for c in channels}
-        self.derivation_by_label = dict(self.channel_by_label.items())
-        self.compute_derivations()
+        self.derivation_by_label = DerivationGraph(channels)
+        self.envelopes: Dict[Label, Envelope] = {}
+        self._record_onsets: Optional[np.ndarray] = None
 
     @classmethod
-    def open(cls, filepath: str) -> 'Reader':
-        with open(filepath, 'rb') as fp:
-            header = Header.read(fp)
-            channels = Channel.read(fp, header.num_channels, header.filetype)
+    @instrument.timed('reader.open')
+    def open(cls, filepath: str, sidecar: Optional[Sidecar] = None,
+             block_cache: Optional[BlockCache] = None) -> 'Reader':
+        """open EDF file, optionally with metadata cached in `sidecar` and
+        samples cached in `block_cache`"""
+        cached = sidecar.load(filepath) if sidecar else None
+        if cached is None:
+            with open(filepath, 'rb') as fp:
+                header, channels = cls.read_header(fp)
+        else:
+            header, channels = Sidecar.restore(*cached)
 
+        reader = cls.attach(filepath, header, channels)
+        if block_cache is not None:
+            # a rewritten file differs in size, modification time or inode
+            stat = os.stat(filepath)
+            token = (os.path.abspath(filepath), stat.st_size,
+                     stat.st_mtime_ns, stat.st_ino)
+            reader.set_block_cache(block_cache, token)
+
+        if sidecar is None:
+            return reader
+
+        if cached is None:
+            for channel in channels:
+                if isinstance(channel, AnnotationChannel):
+                    channel.index  # build the TAL index to cache it
+
+            sidecar.dump(filepath, reader)
+
+        return reader
+
+    @classmethod
+    def from_buffer(cls, buffer) -> 'Reader':
+        """open EDF data in `bytes`, `memoryview` or `mmap` without copy"""
+        view = memoryview(buffer)
+        header = Header.read(BytesIO(view[:Header.default_num_header_bytes]))
+        channels_bytes = view[Header.default_num_header_bytes:
+                              header.num_header_bytes]
+        channels = Channel.read(BytesIO(channels_bytes), header.num_channels,
+                                header.filetype)
+        return cls.attach(buffer, header, channels)
+
+    @classmethod
+    def from_stream(cls, fileobj: BinaryIO, block_records: int = 64,
+                    max_blocks: int = 16) -> 'Reader':
+        """open EDF data in a seekable stream, e.g. a GridFS file
+
+        Only the blocks of `block_records` records a query covers are read,
+        and the `max_blocks` most recently used blocks are cached.
+        """
+        fileobj.seek(0)
+        header, channels = cls.read_header(fileobj)
+        stream = Stream(fileobj, block_records, max_blocks)
+        return cls.attach(stream, header, channels)
+
+    @staticmethod
+    def read_header(file: BinaryIO) -> Tuple[Header, List[Channel]]:
+        """returns header and channels read from `file`"""
+        header = Header.read(file)
+        channels = Channel.read(file, header.num_channels, header.filetype)
+        return header, channels
+
+    @classmethod
+    def attach(cls, file, header: Header,
+               channels: List[Channel]) -> 'Reader':
+        """returns reader of `channels` with signals from the blob of `file`"""
         offset = header.num_header_bytes
         record_lengths = [c.num_samples_per_record for c in channels]
-        blob_slices = read_blob(filepath, offset, record_lengths,
+        blob_slices = read_blob(file, offset, record_lengths,
                                 header.filetype)
         for channel, blob_slice in zip(channels, blob_slices):
             channel.signal = blob_slice
 
         return cls(header, channels)
 
-    def compute_derivations(self):
-        channels = list(self.derivation_by_label.values())
-        for left, right in product(channels, channels):
-            if left is right or not left.is_compatible(right):
-                continue
+    def set_block_cache(self, cache: Optional[BlockCache],
+                        token: Optional[Hashable] = None):
+        """read samples of all channels through `cache`
+
+        Blocks are cached under `token`, by default unique to this reader,
+        and the index of each channel.
+        """
+        token = id(self) if token is None else token
+        for i, channel in enumerate(self.channels):
+            channel.cache = cache
+            channel.cache_key = (token, i)
+
+    @property
+    def labels(self) -> List[Label]:
+        return self.derivation_by_label.labels()
+
+    @property
+    def duration(self) -> float:
+        """returns recording duration in seconds, up to the end of the last
+        record for discontinuous recordings"""
+        if not self.discontinuous:
+            return self.header.record_duration * self.header.num_records
 
-            derivation = left.derive(right)
-            if derivation.label not in self.derivation_by_label:
-                self.derivation_by_label[derivation.label] = derivation
+        onsets = self.record_onsets
+        return onsets[-1] + self.header.record_duration if onsets.size \
+            else 0.0
 
     @property
-    def labels(self):
-        return list(self.derivation_by_label.keys())
+    def discontinuous(self) -> bool:
+        """returns whether records carry their own onsets (EDF+D, BDF+D)"""
+        return self.annotation_channel is not None \
+            and self.header.filetype in ('EDF+D', 'BDF+D')
 
     @property
-    def duration(self) -> int:
-        """returns recording duration in seconds"""
-        return self.header.record_duration * self.header.num_records
+    def annotation_channel(self) -> Optional[AnnotationChannel]:
+        """returns the annotation channel of EDF+/BDF+ files, if any"""
+        for channel in self.channels:
+            if isinstance(channel, AnnotationChannel):
+                return channel
+
+        return None
+
+    @property
+    def record_onsets(self) -> np.ndarray:
+        """returns the onset of each data record in seconds
+
+        Onsets of discontinuous recordings come from the first TAL of each
+        record in the annotation channel.
+        """
+        if self._record_onsets is None:
+            annotation_channel = self.annotation_channel
+            if self.discontinuous and annotation_channel is not None:
+                self._record_onsets = annotation_channel.record_onsets
+            else:
+                self._record_onsets = self.header.record_duration \
+                    * np.arange(self.header.num_records, dtype=float)
+
+        return self._record_onsets
+
+    def record_at(self, t: float) -> int:
+        """returns the last record starting at or before `t`, -1 if none"""
+        return int(np.searchsorted(self.record_onsets, t, side='right')) - 1
+
+    def segments(self) -> List[Tuple[int, int]]:
+        """returns `(first, stop)` records of contiguous segments"""
+        onsets = self.record_onsets
+        rd = self.header.record_duration
+        gaps = np.flatnonzero(~np.isclose(np.diff(onsets), rd)) + 1
+        bounds = np.concatenate([[0], gaps, [onsets.size]]).astype(int)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])
+                if a < b]
+
+    def record_time(self, t: float) -> float:
+        """returns the time in the sequence of records of recording time
+        `t`, the end of the last record before `t` if it falls in a gap"""
+        if not self.discontinuous:
+            return t
+
+        rd = self.header.record_duration
+        r = self.record_at(t)
+        if r < 0:
+            return 0.0
+
+        return r * rd + min(t - self.record_onsets[r], rd)
+
+    def recording_time(self, t: np.ndarray) -> np.ndarray:
+        """returns the recording times of times `t` in the sequence of
+        records, the inverse of `record_time`"""
+        if not self.discontinuous:
+            return t
+
+        rd = self.header.record_duration
+        onsets = self.record_onsets
+        r = np.clip(np.floor(np.asarray(t) / rd).astype(int), 0,
+                    max(0, onsets.size - 1))
+        return onsets[r] + t - r * rd if onsets.size else t
+
+    @cached_property
+    def channel_table(self) -> ChannelTable:
+        """returns the fields of all channels as compact table, built once
+
+        The reader itself reads through its `Channel`s, to which blob
+        slices, caches and derivations attach; the table is the form to
+        keep once the reader is closed, e.g. of many files.
+        """
+        return ChannelTable.from_channels(self.channels)
 
     @property
     def startdatetime(self) -> datetime:
         """returns the time point of recording start"""
         return self.header.startdatetime
 
+    @instrument.timed('reader.get_physical_samples')
     def get_physical_samples(self, t0: float = 0.0, dt: float = None,
-                             labels: List[str] = None) -> Dict[Label, np.ndarray]:  # noqa: E501
-        """returns dict of samples by label from `t0` to `t0+dt`."""
+                             labels: List[str] = None, dtype=np.float64,
+                             out: Dict[str, np.ndarray] = None
+                             ) -> Dict[Label, np.ndarray]:
+        """returns dict of samples by label from `t0` to `t0+dt`.
+
+        Samples are computed as `dtype`, float64 by default; an integer
+        `dtype` returns the digital samples of basic channels.  Arrays in
+        `out` by label are filled in place instead of allocating new ones.
+        """
         dt = dt or self.duration
         t1 = t0 + dt
         labels1 = list(map(Label, labels)) if labels else self.basic_labels
-        required_labels = self.required_from_requested(labels1)
+        out1 = {Label(k): v for k, v in out.items()} if out else {}
+        self.check_dtype(labels1, dtype)
+        if not self.discontinuous:
+            return self.read_span(t0, t1, labels1, dtype, out1)
+
+        if np.dtype(dtype).kind not in 'fc':
+            raise ValueError("gaps need floating point samples")
+
+        # gaps between records are filled with NaN
         rd = self.header.record_duration
+        t1 = min(t1, self.duration)
         signals = {}
-        for label in required_labels:
-            channel = self.channel_by_label[label]
-            sr = channel.num_samples_per_record / rd
-            a = int(np.round(t0 * sr))
-            b = int(np.round(t1 * sr))
-            signals[label] = channel[a:b]
-
-        return {
-            ll: self.derivation_by_label[ll].from_dict(signals)
-            for ll in labels1
-        }
+        for ll in labels1:
+            n = self.num_samples(ll, t0, dt)
+            signals[ll] = out1[ll] if ll in out1 else \
+                np.empty(n, dtype=dtype)
+            signals[ll].fill(np.nan)
+
+        for start, segment in self.get_segments(t0, t1 - t0, labels1, dtype):
+            for ll, x in segment.items():
+                sr = self.derivation_by_label[ll].num_samples_per_record / rd
+                a = int(np.round(start * sr)) - int(np.round(t0 * sr))
+                x = x[:max(0, signals[ll].size - a)]
+                signals[ll][a:a + x.size] = x
+
+        return signals
+
+    def num_samples(self, label: str, t0: float = 0.0,
+                    dt: float = None) -> int:
+        """returns the number of samples of `label` that
+        `get_physical_samples` returns from `t0` to `t0+dt`"""
+        dt = dt or self.duration
+        signal = self.derivation_by_label[Label(label)]
+        rd = self.header.record_duration
+        sr = signal.num_samples_per_record / rd
+        if self.discontinuous:
+            t1 = min(t0 + dt, self.duration)
+            return max(0, int(np.round(t1 * sr)) - int(np.round(t0 * sr)))
+
+        total = self.header.num_records * signal.num_samples_per_record
+        return len(range(total)[int(np.round(t0 * sr)):
+                                int(np.round((t0 + dt) * sr))])
+
+    def get_segments(self, t0: float = 0.0, dt: float = None,
+                     labels: Sequence[str] = None, dtype=np.float64
+                     ) -> List[Tuple[float, Dict[Label, np.ndarray]]]:
+        """returns `(onset, samples by label)` of the contiguous segments
+        between `t0` and `t0+dt`"""
+        dt = dt or self.duration
+        t1 = t0 + dt
+        labels1 = list(map(Label, labels)) if labels else self.basic_labels
+        self.check_dtype(labels1, dtype)
+        onsets = self.record_onsets
+        rd = self.header.record_duration
+        segments = []
+        for first, stop in self.segments():
+            a = max(t0, onsets[first])
+            b = min(t1, onsets[stop - 1] + rd)
+            if a >= b:
+                continue
+
+            # time within the file of concatenated records
+            ta = first * rd + a - onsets[first]
+            signals = self.read_span(ta, ta + b - a, labels1, dtype)
+            segments.append((float(a), signals))
+
+        return segments
+
+    def read_span(self, t0: float, t1: float, labels: List[Label],
+                  dtype=np.float64, out: Dict[Label, np.ndarray] = None
+                  ) -> Dict[Label, np.ndarray]:
+        """returns samples of `labels` from `t0` to `t1` in the sequence of
+        records, regardless of record onsets"""
+        rd = self.header.record_duration
+        slices = {}
+        for label in self.required_from_requested(labels):
+            sr = self.channel_by_label[label].num_samples_per_record / rd
+            slices[label] = slice(int(np.round(t0 * sr)),
+                                  int(np.round(t1 * sr)))
+
+        return self.read_physical(labels, slices, dtype, out)
+
+    def get_physical_array(self, t0: float = 0.0, dt: float = None,
+                           labels: List[str] = None, dtype=np.float64,
+                           target_rate: Optional[float] = None
+                           ) -> np.ndarray:
+        """returns `(channels, samples)` array of `labels` from `t0` to `t0+dt`
+
+        Without `target_rate`, all labels need the same sampling rate.  With
+        `target_rate` in Hz, each basic channel is read with a margin for
+        the resampling filter and resampled onto the common time grid.
+        """
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        channels = self.matrix_channels(labels1)
+        if target_rate is None and channels and not self.discontinuous:
+            rd = self.header.record_duration
+            sr = channels[0].num_samples_per_record / rd
+            t1 = t0 + (dt or self.duration)
+            sli = slice(int(np.round(t0 * sr)), int(np.round(t1 * sr)))
+            return self.read_matrix(channels, sli, dtype)
+
+        if target_rate is None:
+            signals = self.get_physical_samples(t0, dt, labels1, dtype)
+            if len({signals[ll].size for ll in labels1}) > 1:
+                raise ValueError(f"labels {labels1} differ in sampling rate, "
+                                 "pass a target_rate")
+
+            return np.stack([signals[ll] for ll in labels1]) if labels1 \
+                else np.empty((0, 0), dtype=dtype)
+
+        check_dtype(dtype)
+        dt = dt or self.duration
+        if self.discontinuous:
+            return self.resampled_segments(t0, dt, labels1, dtype,
+                                           target_rate)
+
+        start = int(np.round(t0 * target_rate))
+        stop = int(np.round((t0 + dt) * target_rate))
+        rd = self.header.record_duration
+        required = dict.fromkeys(self.required_from_requested(labels1))
+        ratios, slices, offsets = {}, {}, {}
+        for label in required:
+            sr = self.channel_by_label[label].num_samples_per_record / rd
+            ratios[label] = ratio(sr, target_rate)
+            slices[label], offsets[label] = source_slice(
+                start, stop, *ratios[label])
+
+        signals = self.read_physical(list(required), slices, dtype)
+        for label, (up, down) in ratios.items():
+            offset = offsets[label]
+            signals[label] = resample(signals[label], up, down)[
+                offset:offset + stop - start]
+
+        num_samples = min((s.size for s in signals.values()), default=0)
+        arr = np.empty((len(labels1), num_samples), dtype=dtype)
+        signals = {ll: s[:num_samples] for ll, s in signals.items()}
+        for ll, row in zip(labels1, arr):
+            self.derivation_by_label[ll].from_dict(signals, row)
+
+        return arr
+
+    def resampled_segments(self, t0: float, dt: float, labels: List[Label],
+                           dtype, target_rate: float) -> np.ndarray:
+        """returns `(channels, samples)` array of `labels` from `t0` to
+        `t0+dt` resampled to `target_rate` segment by segment
+
+        Each contiguous segment is read with a margin for the resampling
+        filter and placed at the nearest sample of its onset, and gaps are
+        filled with NaN.
+        """
+        rd = self.header.record_duration
+        required = list(dict.fromkeys(self.required_from_requested(labels)))
+        rates = {ll: self.channel_by_label[ll].num_samples_per_record / rd
+                 for ll in required}
+        margin = (half_width + 1) / min(list(rates.values()) + [target_rate])
+        start = int(np.round(t0 * target_rate))
+        stop = int(np.round((t0 + dt) * target_rate))
+        arr = np.full((len(labels), max(0, stop - start)), np.nan, dtype=dtype)
+        segments = self.get_segments(t0 - margin, dt + 2 * margin, required,
+                                     dtype)
+        for onset, signals in segments:
+            resampled = {ll: resample(x, *ratio(rates[ll], target_rate))
+                         for ll, x in signals.items()}
+            n = min(x.size for x in resampled.values())
+            a = int(np.round(onset * target_rate)) - start
+            lo, hi = max(0, -a), min(n, arr.shape[1] - a)
+            if lo >= hi:
+                continue
+
+            trimmed = {ll: x[lo:hi] for ll, x in resampled.items()}
+            for ll, row in zip(labels, arr):
+                self.derivation_by_label[ll].from_dict(trimmed,
+                                                       row[a + lo:a + hi])
+
+        return arr
+
+    def build_envelopes(self, labels: Sequence[str] = None, base: int = 64,
+                        factor: int = 4, chunk_bytes: int = 1 << 22):
+        """build min/max/mean envelopes of `labels` in one streaming pass
+
+        The records are read in chunks of about `chunk_bytes` of data as
+        stored in the file.
+        Envelopes end up in `envelopes` by label and can be persisted with
+        `envelope.save_envelopes()`.
+        """
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        required = dict.fromkeys(self.required_from_requested(labels1))
+        record_lengths = {ll: self.channel_by_label[ll].num_samples_per_record
+                          for ll in required}
+        record_bytes = sum(n * self.sample_bytes(ll)
+                           for ll, n in record_lengths.items()) or 1
+        chunk_records = max(1, chunk_bytes // record_bytes)
+        builders = {ll: EnvelopeBuilder(base, factor) for ll in labels1}
+        for r0 in range(0, self.header.num_records, chunk_records):
+            r1 = min(r0 + chunk_records, self.header.num_records)
+            slices = {ll: slice(r0 * n, r1 * n)
+                      for ll, n in record_lengths.items()}
+            signals = self.read_physical(list(builders), slices)
+            for ll, builder in builders.items():
+                builder.update(signals[ll])
+
+        self.envelopes.update({ll: b.finish() for ll, b in builders.items()})
+
+    def stats(self, labels: List[str] = None,
+              metrics: Sequence[str] = all_metrics,
+              epoch: Optional[float] = None, line_frequency: float = 50.0,
+              flat_seconds: float = 1.0, chunk_bytes: int = 1 << 24
+              ) -> Stats:
+        """returns quality statistics of basic channels `labels` computed
+        in one streaming pass over their digital samples
+
+        The records are read in chunks of about `chunk_bytes` of digital
+        samples without scaling, see `StatsBuilder` for `metrics`.  With
+        `epoch` seconds, statistics of consecutive epochs are returned as
+        well, e.g. for heatmaps.  Epochs of discontinuous recordings follow
+        the record onsets, and runs of constant samples end at gaps.
+
+            qc = reader.stats(epoch=30.0, line_frequency=60.0)
+            clipped = qc.channels[qc.channels['clipped'] > 0.01]['label']
+        """
+        unknown = set(metrics) - set(all_metrics)
+        if unknown:
+            raise ValueError(f"unknown metrics {sorted(unknown)}")
+
+        channels = self.basic_channels(labels)
+        rd = self.header.record_duration
+        duration = self.duration
+        builders = []
+        for c in channels:
+            sr = c.num_samples_per_record / rd
+            if epoch:
+                epoch_samples = max(1, int(round(epoch * sr)))
+                num_epochs = max(1, int(np.ceil(duration / epoch)))
+            else:
+                epoch_samples = max(1, int(round(duration * sr)))
+                num_epochs = 1
+
+            flat_samples = max(1, int(np.ceil(flat_seconds * sr)))
+            builders.append(StatsBuilder(c, sr, epoch_samples, num_epochs,
+                                         line_frequency, flat_samples))
+
+        record_bytes = sum(
+            c.num_samples_per_record * self.sample_bytes(c.label)
+            for c in channels)
+        chunk_records = max(1, chunk_bytes // (record_bytes or 1))
+        onsets = self.record_onsets
+        for first, stop in self.segments():
+            for builder in builders:
+                onset = int(np.round(onsets[first] * builder.sample_rate))
+                builder.skip(onset - builder.num_samples)
+
+            for r0 in range(first, stop, chunk_records):
+                r1 = min(r0 + chunk_records, stop)
+                for channel, builder in zip(channels, builders):
+                    builder.update(channel.records(r0, r1).reshape(-1))
+
+        results = [b.finish() for b in builders]
+        labels1 = [c.label for c in channels]
+        return Stats(table(labels1, results, metrics),
+                     table(labels1, results, metrics, 'epochs.')
+                     if epoch else None)
+
+    def get_envelope(self, t0: float = 0.0, dt: float = None,
+                     labels: List[str] = None,
+                     max_points: int = 2000) -> Dict[Label, Summary]:
+        """returns at most about `max_points` summaries per label from `t0`
+        to `t0+dt`
+
+        Spans of at most `max_points` samples are returned as samples with
+        `min`, `max` and `mean` all equal.  Longer spans are answered from
+        the finest fitting level of the envelope of each label, which is
+        built on first use.
+        """
+        dt = dt or self.duration
+        t1 = t0 + dt
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        rd = self.header.record_duration
+        rates = {ll: self.derivation_by_label[ll].num_samples_per_record / rd
+                 for ll in labels1}
+        raw = [ll for ll, rate in rates.items() if
+               int(np.round(t1 * rate)) - int(np.round(t0 * rate))
+               <= max_points]
+        missing = [ll for ll in labels1
+                   if ll not in raw and ll not in self.envelopes]
+        if missing:
+            self.build_envelopes(missing)
+
+        samples = self.get_physical_samples(t0, dt, raw) if raw else {}
+        # envelopes summarize the samples in the sequence of records
+        r0, r1 = self.record_time(t0), self.record_time(t1)
+        summaries = {}
+        for ll, rate in rates.items():
+            if ll in samples:
+                x = samples[ll]
+                t = (int(np.round(t0 * rate)) + np.arange(x.size)) / rate
+                summaries[ll] = Summary(t, x, x, x)
+                continue
+
+            a, b = int(np.round(r0 * rate)), int(np.round(r1 * rate))
+            summary = self.envelopes[ll].summary(a, b, max_points, rate)
+            summaries[ll] = summary._replace(t=self.recording_time(summary.t))
+
+        return summaries
+
+    def matrix_channels(self, labels: List[Label]) -> Optional[List[Channel]]:
+        """returns the channels of `labels` if they can be read as one
+        record matrix: distinct basic channels of equal sampling rate with
+        16-bit samples and without block cache"""
+        found = [self.channel_by_label.get(ll) for ll in labels]
+        if not found or len(set(labels)) != len(labels) or \
+                not all(isinstance(c, Channel) for c in found):
+            return None
+
+        channels = cast(List[Channel], found)
+        blob = channels[0].signal.blob if channels[0].signal else None
+        for c in channels:
+            if type(c.signal) is not BlobSlice or c.signal.blob is not blob \
+                    or c.cache is not None \
+                    or isinstance(c, AnnotationChannel) \
+                    or c.num_samples_per_record \
+                    != channels[0].num_samples_per_record:
+                return None
+
+        return channels
+
+    def read_matrix(self, channels: List[Channel], sli: slice,
+                    dtype=np.float64) -> np.ndarray:
+        """returns samples `sli` of `matrix_channels` as `(channels,
+        samples)` array
+
+        The `(records, columns)` matrix of the file is viewed as `(channels,
+        records, samples)` and scaled by the gain and bias vectors of the
+        channels in one broadcast operation into the output.
+        """
+        signal = channels[0].signal
+        assert signal is not None
+        A, B, a, b = signal.locate(sli)
+        B = max(A, B)
+        q = signal.block_size
+        locs = [cast(BlobSlice, c.signal).locs for c in channels]
+        if all(l0.stop == l1.start for l0, l1 in zip(locs, locs[1:])):
+            columns = slice(locs[0].start, locs[-1].stop)
+            matrix = np.asarray(signal.blob[A:B, columns])
+        else:
+            index: np.ndarray = np.concatenate(
+                [np.arange(ll.start, ll.stop) for ll in locs])
+            matrix = signal.blob[A:B, index]
+
+        records = matrix.reshape(B - A, len(channels), q).transpose(1, 0, 2)
+        out = np.empty((len(channels), (B - A) * q), dtype=dtype)
+        out3 = out.reshape(len(channels), B - A, q)
+        if out.dtype.kind in 'iu':
+            if not np.can_cast(records.dtype, out.dtype):
+                raise ValueError(f"digital samples of {records.dtype} "
+                                 f"exceed {out.dtype}")
+
+            out3[...] = records
+        else:
+            gains, biases = self.coefficients([c.label for c in channels])
+            gains = gains.astype(out.dtype)[:, None, None]
+            np.multiply(records, gains, out=out3)
+            out += biases.astype(out.dtype)[:, None]
+
+        return out[:, a:b]
+
+    def basic_channels(self, labels: List[str] = None) -> List[Channel]:
+        """returns the basic channels of `labels`, by default all signals"""
+        if labels is None:
+            return [c for c in self.channels
+                    if not isinstance(c, AnnotationChannel)]
+
+        labels1 = list(map(Label, labels))
+        self.check_basic(labels1)
+        return [self.channel_by_label[ll] for ll in labels1]
+
+    def coefficients(self, labels: List[str] = None
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+        """returns vectors of gains and biases of basic channels `labels`
+
+        Physical samples of channel `i` are `gains[i] * digital + biases[i]`.
+        """
+        coefficients = [c.coefficients for c in self.basic_channels(labels)]
+        gains, biases = np.array(coefficients).reshape(-1, 2).T
+        return gains, biases
+
+    def get_digital_records(self, t0: float = 0.0, dt: float = None,
+                            labels: List[str] = None
+                            ) -> Dict[Label, np.ndarray]:
+        """returns digital samples of the records covering `t0` to `t0+dt`
+
+        Each channel's samples are a `(records, samples)` view into the
+        file, so nothing is copied or scaled.  Records are selected by their
+        onsets, which `record_onsets` holds for discontinuous recordings.
+        """
+        dt = dt or self.duration
+        onsets = self.record_onsets
+        ends = onsets + self.header.record_duration
+        A = int(np.searchsorted(ends, t0, side='right'))
+        B = int(np.searchsorted(onsets, t0 + dt, side='left'))
+        return {c.label: c.records(A, max(A, B))
+                for c in self.basic_channels(labels)}
+
+    def sample_bytes(self, label: Label) -> int:
+        """returns the number of bytes of a sample of basic channel `label`
+        in the file, 2 for EDF and 3 for BDF"""
+        signal = self.channel_by_label[label].signal
+        return signal.sample_bytes if signal is not None else 2
+
+    def check_basic(self, labels: List[Label]):
+        """raise ValueError for derived `labels`"""
+        derived = [ll for ll in labels if ll not in self.channel_by_label]
+        if derived:
+            raise ValueError(f"no digital samples of {derived}")
+
+    def check_dtype(self, labels: List[Label], dtype):
+        """raise ValueError for digital samples of derived `labels` or of
+        samples that `dtype` cannot hold, such as 24-bit samples of BDF
+        files as `np.int16`"""
+        dtype = np.dtype(dtype)
+        if dtype.kind not in 'iu':
+            return
+
+        self.check_basic(labels)
+        signals = [(ll, self.channel_by_label[ll].signal) for ll in labels]
+        wider = [ll for ll, s in signals
+                 if s is not None and not np.can_cast(s.dtype, dtype)]
+        if wider:
+            raise ValueError(f"digital samples of {wider} exceed {dtype}")
+
+    def read_physical(self, labels: List[Label], slices: Dict[Label, slice],
+                      dtype=np.float64, out: Dict[Label, np.ndarray] = None
+                      ) -> Dict[Label, np.ndarray]:
+        """returns samples of `labels` from sample `slices` of basic channels
+
+        The basic channels of a stream are read in one pass over the data
+        records, those of a memory map one by one, see `read_slices`.  The
+        channels of a derivation across sampling rates are read with a
+        margin for the resampling filter, resampled to the rate of the
+        derivation and trimmed to the slice of its fastest channel, as in
+        `get_physical_array`.
+        """
+        out = out or {}
+        # slices to read by basic label and bounds, and for each derivation
+        # across rates the read, ratio and offset of each of its channels
+        reads: Dict[Tuple[Label, int, Optional[int]], slice] = {}
+        resampled: Dict[Label, Dict[Label, Tuple[tuple, int, int, int]]] = {}
+        for ll in labels:
+            signal = self.derivation_by_label[ll]
+            rate = signal.num_samples_per_record
+            rates = {c: self.channel_by_label[c].num_samples_per_record
+                     for c in signal.children}
+            if all(r == rate for r in rates.values()):
+                reads.update({(c, slices[c].start, slices[c].stop): slices[c]
+                              for c in rates})
+                continue
+
+            fastest = slices[next(c for c, r in rates.items() if r == rate)]
+            resampled[ll] = {}
+            for c, r in rates.items():
+                up, down = ratio(r, rate)
+                source, offset = (fastest, 0) if up == down else \
+                    source_slice(fastest.start or 0, fastest.stop, up, down)
+                key = (c, source.start, source.stop)
+                reads[key] = source
+                resampled[ll][c] = (key, up, down, offset)
+
+        cached = np.dtype(dtype).kind == 'f'
+        signals: Dict[tuple, np.ndarray] = {}
+        channels = []
+        for key, sli in reads.items():
+            channel = self.channel_by_label[key[0]]
+            if channel.signal is None:
+                raise RuntimeError(f"channel {channel} uninitialized")
+
+            direct = slices.get(channel.label) == sli
+            target = out.get(channel.label) if direct else None
+            if cached and channel.cache is not None:
+                signals[key] = channel.get(sli, dtype, target)
+            else:
+                channels.append((key, channel, target))
+
+        # channels of memory maps are read one by one and scaled while their
+        # digital block is in cache, those of streams in one pass
+        mapped = [isinstance(getattr(c.signal, 'blob', None), np.ndarray)
+                  for _, c, _ in channels]
+        digital = read_slices([(c.signal, reads[key]) for (key, c, _), m
+                               in zip(channels, mapped) if not m])[::-1]
+        for (key, channel, target), m in zip(channels, mapped):
+            # scale and release digital blocks one at a time
+            block = read_slices([(channel.signal, reads[key])])[0] if m \
+                else digital.pop()
+            signals[key] = channel.to_physical(block, dtype, target)
+
+        results = {}
+        for ll in labels:
+            signal = self.derivation_by_label[ll]
+            if ll in resampled:
+                aligned = {c: resample(signals[key], up, down)[offset:]
+                           for c, (key, up, down, offset)
+                           in resampled[ll].items()}
+                n = min(x.size for x in aligned.values())
+                results[ll] = signal.from_dict(
+                    {c: x[:n] for c, x in aligned.items()}, out.get(ll))
+                continue
+
+            basic = {c: signals[(c, slices[c].start, slices[c].stop)]
+                     for c in signal.children}
+            results[ll] = signal.from_dict(
+                basic, None if ll in self.channel_by_label else out.get(ll))
+
+        return results
+
+    def window_grid(self, duration: float, step: Optional[float],
+                    labels: List[Label]
+                    ) -> Tuple[float, int, int, List[Tuple[int, int, float]]]:
+        """returns sampling rate, window and step in samples, and `(first
+        sample, number of windows, onset)` of each contiguous segment"""
+        rates = {self.derivation_by_label[ll].num_samples_per_record
+                 for ll in labels}
+        if len(rates) != 1:
+            raise ValueError(f"labels {labels} differ in sampling rate")
+
+        num_samples_per_record = rates.pop()
+        sr = num_samples_per_record / self.header.record_duration
+        width = int(np.round(duration * sr))
+        stride = int(np.round((step or duration) * sr))
+        if width < 1 or stride < 1:
+            raise ValueError("window and step must span at least one sample")
+
+        onsets = self.record_onsets
+        grid = []
+        for first, stop in self.segments():
+            num_samples = (stop - first) * num_samples_per_record
+            num_windows = max(0, (num_samples - width) // stride + 1)
+            grid.append((first * num_samples_per_record, num_windows,
+                         float(onsets[first])))
+
+        return sr, width, stride, grid
+
+    def window_onsets(self, duration: float, step: Optional[float] = None,
+                      labels: List[str] = None) -> np.ndarray:
+        """returns the onsets in seconds of the windows `iter_windows`
+        yields with the same arguments"""
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        sr, _, stride, grid = self.window_grid(duration, step, labels1)
+        return np.concatenate([onset + np.arange(n) * stride / sr
+                               for _, n, onset in grid] + [np.empty(0)])
+
+    def iter_windows(self, duration: float, step: Optional[float] = None,
+                     labels: List[str] = None, dtype=np.float64,
+                     batch_size: int = 64) -> Iterator[np.ndarray]:
+        """yields `(windows, channels, samples)` batches of sliding windows
+
+        Windows of `duration` seconds start every `step` seconds, by default
+        back to back.  All `labels` need the same sampling rate.  Each batch
+        is read in one pass over the records it covers, and its windows are
+        strided views into that block, so memory stays bounded by
+        `batch_size` windows however long the recording is.  Windows of
+        discontinuous recordings start anew at each contiguous segment and
+        never span a gap, see `window_onsets` for their onsets.
+        """
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        self.check_dtype(labels1, dtype)
+        _, width, stride, grid = self.window_grid(duration, step, labels1)
+        required = list(dict.fromkeys(self.required_from_requested(labels1)))
+        channels = self.matrix_channels(labels1)
+        for first, num_windows, _ in grid:
+            for k0 in range(0, num_windows, batch_size):
+                k1 = min(k0 + batch_size, num_windows)
+                a = first + k0 * stride
+                b = first + (k1 - 1) * stride + width
+                if channels:
+                    block = self.read_matrix(channels, slice(a, b), dtype)
+                    yield strided_windows(block, width, stride)
+                    continue
+
+                block = np.empty((len(labels1), b - a), dtype=dtype)
+                out = {ll: row for ll, row in zip(labels1, block)}
+                slices = dict.fromkeys(required, slice(a, b))
+                signals = self.read_physical(labels1, slices, dtype, out)
+                for ll, row in zip(labels1, block):
+                    if signals[ll] is not out[ll] or out[ll] is not row:
+                        row[...] = signals[ll]
+
+                yield strided_windows(block, width, stride)
+
+    def chunks(self, labels: List[Label], max_bytes: int,
+               dtype=np.float64) -> List[Tuple[int, int]]:
+        """returns `(first, stop)` records of chunks within `max_bytes`
+
+        A chunk holds the samples of `labels`, their basic channels as
+        `dtype` and the digital samples read, and never spans a gap of a
+        discontinuous recording.  Chunks hold at least one record.
+        """
+        itemsize = np.dtype(dtype).itemsize
+        required = set(self.required_from_requested(labels))
+        record_bytes = sum(
+            self.derivation_by_label[ll].num_samples_per_record * itemsize
+            for ll in labels if ll not in required
+        ) + sum(
+            self.channel_by_label[ll].num_samples_per_record * (itemsize + 4)
+            for ll in required
+        )
+        n = max(1, int(max_bytes // max(1, record_bytes)))
+        return [(A, min(A + n, stop)) for first, stop in self.segments()
+                for A in range(first, stop, n)]
+
+    def map_chunks(self, fn: Callable[[float, Dict[Label, np.ndarray]], Any],
+                   labels: List[str] = None, max_bytes: int = 1 << 28,
+                   dtype=np.float64, workers: Optional[int] = None
+                   ) -> Iterator[Any]:
+        """yields `fn(t0, signals)` of consecutive chunks of records
+
+        The recording is split into record-aligned chunks such that the
+        samples of all chunks in flight fit into `max_bytes`, see `chunks`.
+        With `workers`, chunks are read and passed to `fn` on a thread pool
+        of as many chunks in flight, and results are yielded in order, such
+        that `workers + 1` chunks are alive with the one yielded last.
+        `t0` is the onset of the chunk in seconds.
+
+            peak = max(reader.map_chunks(
+                lambda t0, s: max(np.abs(x).max() for x in s.values())))
+        """
+        labels1 = list(map(Label, labels)) if labels else \
+            [c.label for c in self.derivation_by_label.channels]
+        self.check_dtype(labels1, dtype)
+        rd = self.header.record_duration
+        onsets = self.record_onsets
+
+        def apply(A: int, B: int) -> Any:
+            return fn(float(onsets[A]),
+                      self.read_span(A * rd, B * rd, labels1, dtype))
+
+        if not workers:
+            for A, B in self.chunks(labels1, max_bytes, dtype):
+                yield apply(A, B)
+
+            return
+
+        chunks = iter(self.chunks(labels1, max_bytes // (workers + 1),
+                                  dtype))
+        with ThreadPoolExecutor(workers) as pool:
+            pending: deque = deque()
+            for A, B in chunks:
+                pending.append(pool.submit(apply, A, B))
+                if len(pending) >= workers:
+                    break
+
+            while pending:
+                future = pending.popleft()
+                for A, B in chunks:
+                    pending.append(pool.submit(apply, A, B))
+                    break
+
+                yield future.result()
+
+    def reduce(self, fn: Callable[[float, Dict[Label, np.ndarray]], Any],
+               combine: Callable[[Any, Any], Any], labels: List[str] = None,
+               max_bytes: int = 1 << 28, dtype=np.float64,
+               workers: Optional[int] = None, initial: Any = None) -> Any:
+        """returns the results of `map_chunks` folded with `combine`,
+        starting from `initial` unless it is None
+
+            total = reader.reduce(lambda t0, s: s['C3-M2'].sum(),
+                                  operator.add, ['C3-M2'], initial=0.0)
+
+        Without `initial`, a recording without records raises TypeError.
+        """
+        results = self.map_chunks(fn, labels, max_bytes, dtype, workers)
+        if initial is None:
+            return functools.reduce(combine, results)
+
+        return functools.reduce(combine, results, initial)
 
     def required_from_requested(self, labels: List[Label]) -> Iterable[Label]:
         """returns the labels required to construct the requested signals"""
         for label in labels:
             yield from self.derivation_by_label[label].children
+
+
+def strided_windows(block: np.ndarray, width: int, stride: int) -> np.ndarray:
+    """returns read-only `(windows, channels, width)` view of the windows of
+    `width` samples every `stride` samples of `(channels, samples)` block"""
+    num_windows = max(0, (block.shape[1] - width) // stride + 1)
+    channel_stride, sample_stride = block.strides
+    return as_strided(block, (num_windows, block.shape[0], width),
+                      (stride * sample_stride, channel_stride, sample_stride),
+                      writeable=False)
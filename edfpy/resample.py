@@ -0,0 +1,96 @@
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd
+from typing import Optional, Tuple
+
+import numpy as np
+
+half_width = 10  # filter half length in samples of the slower rate
+beta = 5.0  # shape of the Kaiser window
+
+
+def ratio(source: float, target: float,
+          max_denominator: int = 1000) -> Tuple[int, int]:
+    """returns `(up, down)` in lowest terms with `target/source = up/down`"""
+    fraction = (Fraction(target) / Fraction(source)) \
+        .limit_denominator(max_denominator)
+    return fraction.numerator, fraction.denominator
+
+
+@lru_cache(maxsize=64)
+def kernel(up: int, down: int) -> np.ndarray:
+    """returns the polyphase filter bank `(up, taps)` for `up/down`
+
+    The anti-aliasing lowpass is a Kaiser-windowed sinc at the Nyquist
+    frequency of the slower rate.  Phase `r` of the bank holds filter taps
+    `r, r + up, r + 2*up, ...` of the filter at the upsampled rate.
+    """
+    factor = max(up, down)
+    half = half_width * factor
+    taps = np.sinc(np.arange(-half, half + 1) / factor) \
+        * np.kaiser(2 * half + 1, beta)
+    taps *= up / taps.sum()
+    num_taps = -(-taps.size // up)
+    taps = np.concatenate([taps, np.zeros(num_taps * up - taps.size)])
+    bank = np.ascontiguousarray(taps.reshape(num_taps, up).T)
+    bank.flags.writeable = False
+    return bank
+
+
+def resample(x: np.ndarray, up: int, down: int) -> np.ndarray:
+    """returns `x` resampled by `up/down` along the last axis
+
+    Output sample `m` lies at input position `m*down/up`.  Only the taps
+    meeting non-zero samples of the upsampled signal are evaluated, one
+    vectorized pass per tap of the polyphase bank.  Samples beyond the
+    ends of `x` count as zero.
+    """
+    g = gcd(up, down)
+    up, down = up // g, down // g
+    if up == down:
+        return x
+
+    bank = kernel(up, down)
+    num_taps = bank.shape[1]
+    dtype = x.dtype if x.dtype.kind == 'f' else np.dtype(np.float64)
+    n = x.shape[-1]
+    m = np.arange(-(-n * up // down))
+    base, phase = np.divmod(m * down + half_width * max(up, down), up)
+    right = max(0, int(base[-1]) + 1 - n) if m.size else 0
+    padding = [(0, 0)] * (x.ndim - 1) + [(num_taps - 1, right)]
+    padded = np.pad(x.astype(dtype, copy=False), padding)
+    index = base + num_taps - 1
+    y = np.zeros(x.shape[:-1] + m.shape, dtype=dtype)
+    for j in range(num_taps):
+        y += bank[phase, j].astype(dtype) * padded[..., index - j]
+
+    return y
+
+
+def source_slice(start: int, stop: Optional[int], up: int,
+                 down: int) -> Tuple[slice, int]:
+    """returns the source samples to resample target samples `start:stop`
+    from, and the position of `start` in their resampled output
+
+    The source slice begins on a multiple of `down`, such that its resampled
+    samples fall onto the target grid, and extends by the filter half
+    length on both ends.
+    """
+    margin = -(-half_width * max(up, down) // up)
+    a = max(0, start * down // up - margin) // down * down
+    b = None if stop is None else -(-stop * down // up) + margin
+    return slice(a, b), start - a * up // down
+
+
+def get_resampled(channel, sli: slice, num_samples_per_record: int,
+                  dtype=np.float64) -> np.ndarray:
+    """returns samples `sli` of `channel` at `num_samples_per_record`"""
+    up, down = ratio(channel.num_samples_per_record, num_samples_per_record)
+    if up == down:
+        return channel.get(sli, dtype)
+
+    start = sli.start or 0
+    source, offset = source_slice(start, sli.stop, up, down)
+    resampled = resample(channel.get(source, dtype), up, down)
+    stop = None if sli.stop is None else offset + sli.stop - start
+    return resampled[offset:stop]
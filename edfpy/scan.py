@@ -0,0 +1,145 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .header import Header
+from .channel import Channel
+
+# `files` has one row per file with its header fields, `channels` one row
+# per channel with the index of its file, and `errors` lists `(path,
+# message)` of files that could not be scanned
+Catalog = namedtuple('Catalog', 'files channels errors')
+
+extensions = ('.edf', '.bdf', '.rec')
+header_dtype = np.dtype([(f.name, f"S{f.size}") for f in Header.fields])
+numeric = {int: np.int64, float: np.float64}
+
+
+def find(paths: Iterable[str]) -> Iterator[str]:
+    """yields `paths`, with directories walked for EDF and BDF files"""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(root, name)
+
+
+def read_raw(path: str) -> Tuple[bytes, bytes]:
+    """returns the header block and the channel block of `path`"""
+    with open(path, 'rb') as fp:
+        header = fp.read(Header.default_num_header_bytes)
+        if len(header) != Header.default_num_header_bytes:
+            raise ValueError("truncated header")
+
+        num_channels = int(header[-4:].strip(b'\x00 '))
+        size = Header.default_num_header_bytes * num_channels
+        channels = fp.read(size)
+        if len(channels) != size:
+            raise ValueError("truncated channel header")
+
+    return header, channels
+
+
+def try_read_raw(path: str):
+    """returns header blocks of `path`, or the error message"""
+    try:
+        return read_raw(path)
+    except (OSError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def decode(column: np.ndarray, dtype) -> np.ndarray:
+    """returns fixed-width byte strings `column` as `dtype`, see `normalize`"""
+    if dtype is str:
+        # latin1 maps each byte onto the code point of equal value
+        size = column.dtype.itemsize
+        codes = np.ascontiguousarray(column).view(np.uint8) \
+            .reshape(-1, size).astype(np.uint32)
+        return np.char.strip(codes.view(f"U{size}").reshape(-1), ' \x00')
+
+    column = np.char.strip(column, b' \x00')
+    try:
+        return column.astype(numeric[dtype])
+    except ValueError:
+        pass
+
+    values = np.empty(column.shape, dtype=numeric[dtype])
+    for i, value in enumerate(column):
+        try:
+            values[i] = float(value)
+        except ValueError:
+            values[i] = np.nan if dtype is float else -1
+
+    return values
+
+
+def scan_headers(paths: Iterable[str],
+                 workers: Optional[int] = None) -> Catalog:
+    """returns the catalog of headers of EDF files in `paths`
+
+    Only the `256 * (num_channels + 1)` header bytes of each file are read,
+    on `workers` threads if given.  The fields of all files are decoded
+    column by column as fixed-width byte arrays, without constructing
+    `Header` and `Channel` objects.  Unlike `ChannelTable.read`, which
+    decodes one file, columns are decoded once across all files, and
+    malformed numbers become NaN, or -1 for integers, instead of raising.
+
+        catalog = scan_headers(['/data/psg'], workers=16)
+        long = catalog.files[catalog.files['num_records'] > 3600]
+    """
+    paths = list(find(paths))
+    if workers:
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(try_read_raw, paths))
+    else:
+        results = [try_read_raw(path) for path in paths]
+
+    errors = [(path, r) for path, r in zip(paths, results)
+              if isinstance(r, str)]
+    scanned = [(path, r) for path, r in zip(paths, results)
+               if not isinstance(r, str)]
+    headers = np.frombuffer(b''.join(h for _, (h, _) in scanned),
+                            dtype=header_dtype)
+    counts = np.array([len(c) // Header.default_num_header_bytes
+                       for _, (_, c) in scanned], dtype=np.int64)
+
+    files = {'path': np.array([path for path, _ in scanned], dtype=str)}
+    files.update({f.name: decode(headers[f.name], f.type)
+                  for f in Header.fields})
+    files['channel_offset'] = np.cumsum(counts) - counts
+
+    columns: List[List[np.ndarray]] = [[] for _ in Channel.fields]
+    for (_, (_, block)), n in zip(scanned, counts):
+        offset = 0
+        for column, field in zip(columns, Channel.fields):
+            size = field.size * int(n)
+            column.append(np.frombuffer(block[offset:offset + size],
+                                        dtype=f"S{field.size}"))
+            offset += size
+
+    channels = {'file': np.repeat(np.arange(len(scanned)), counts)}
+    for column, field in zip(columns, Channel.fields):
+        raw = np.concatenate(column) if column else \
+            np.empty(0, dtype=f"S{field.size}")
+        channels[field.name] = decode(raw, field.type)
+
+    return Catalog(structured(files), structured(channels), errors)
+
+
+def structured(columns) -> np.ndarray:
+    """returns a structured array of equally long `columns` by name"""
+    dtype = [(name, column.dtype) for name, column in columns.items()]
+    n = len(next(iter(columns.values())))
+    arr = np.empty(n, dtype=dtype)
+    for name, column in columns.items():
+        arr[name] = column
+
+    return arr
@@ -0,0 +1,139 @@
+import os
+import json
+from zipfile import BadZipFile
+from hashlib import blake2b
+from typing import Optional, Dict, Any, Tuple, List
+
+import numpy as np
+
+from .header import Header
+from .channel import Channel, AnnotationChannel
+from .channel.annotation_channel import TalIndex
+
+
+class Sidecar:
+    """persistent cache of the parsed metadata of EDF files
+
+    The cache stores header and channel fields and the TAL index of
+    annotation channels as `.npz` file, either next to each EDF file or, by
+    hash of the absolute path, in `directory`.  An entry is
+    valid as long as size and modification time of the EDF file match, or,
+    with `validate='hash'`, size and content hash.  The content hash is
+    computed once per file and kept as long as size, modification time and
+    inode of the file stay the same.
+
+        sidecar = Sidecar('/var/cache/edfpy')
+        reader = Reader.open(filepath, sidecar=sidecar)
+    """
+
+    suffix = '.edfpy.npz'
+    version = 2
+
+    def __init__(self, directory: Optional[str] = None,
+                 validate: str = 'stat'):
+        if validate not in ('stat', 'hash'):
+            raise ValueError(f"unknown validation {validate}")
+
+        self.directory = directory
+        self.validate = validate
+        # content hash by absolute path, with the stat it was computed for
+        self.digests: Dict[str, Tuple[Tuple[int, int, int], str]] = {}
+
+    def path(self, filepath: str) -> str:
+        """returns the sidecar path of `filepath`"""
+        if self.directory is None:
+            return str(filepath) + self.suffix
+
+        name = blake2b(os.path.abspath(filepath).encode(), digest_size=16)
+        return os.path.join(self.directory, name.hexdigest() + self.suffix)
+
+    def key(self, filepath: str) -> List:
+        """returns the validation key of `filepath`"""
+        stat = os.stat(filepath)
+        if self.validate == 'stat':
+            return [stat.st_size, stat.st_mtime_ns]
+
+        return [stat.st_size, self.digest(filepath, stat)]
+
+    def digest(self, filepath: str, stat: os.stat_result) -> str:
+        """returns the content hash of `filepath` with `stat`"""
+        path = os.path.abspath(filepath)
+        version = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        cached = self.digests.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        digest = blake2b()
+        with open(filepath, 'rb') as fp:
+            for block in iter(lambda: fp.read(1 << 20), b''):
+                digest.update(block)
+
+        self.digests[path] = (version, digest.hexdigest())
+        return self.digests[path][1]
+
+    def load(self, filepath: str) -> Optional[Tuple[Dict[str, Any],
+                                                    Dict[str, np.ndarray]]]:
+        """returns cached metadata and arrays, or None if absent or stale"""
+        try:
+            with np.load(self.path(filepath), allow_pickle=False) as npz:
+                arrays = {k: npz[k] for k in npz.files}
+            meta = json.loads(arrays.pop('meta').tobytes())
+        except (OSError, ValueError, KeyError, BadZipFile):
+            return None
+
+        if meta['version'] != self.version \
+                or meta['key'] != self.key(filepath):
+            return None
+
+        return meta, arrays
+
+    def dump(self, filepath: str, reader):
+        """write the metadata of `reader` opened from `filepath`"""
+        channels = reader.channels
+        meta = {
+            'version': self.version,
+            'key': self.key(filepath),
+            'header': {f.name: getattr(reader.header, f.name)
+                       for f in Header.fields},
+            'channels': [{
+                'annotations': isinstance(c, AnnotationChannel),
+                'fields': dict(
+                    {f.name: getattr(c, f.name) for f in Channel.fields},
+                    label=c.label.original),
+            } for c in channels],
+        }
+        arrays: Dict[str, Any] = {
+            'meta': np.frombuffer(json.dumps(meta).encode(), np.uint8)
+        }
+        for c in channels:
+            if isinstance(c, AnnotationChannel) and 'index' in vars(c):
+                arrays.update({f"tal_{k}": v
+                               for k, v in c.index._asdict().items()})
+
+        path = self.path(filepath)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as fp:
+                np.savez(fp, **arrays)
+
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def restore(meta: Dict[str, Any],
+                arrays: Dict[str, np.ndarray]) -> Tuple[Header, List[Channel]]:
+        """returns header and channels from cached metadata"""
+        header = Header(**meta['header'])
+        channels = []
+        for spec in meta['channels']:
+            cls = AnnotationChannel if spec['annotations'] else Channel
+            channel = cls(**spec['fields'])
+            if isinstance(channel, AnnotationChannel) and arrays:
+                channel.index = TalIndex(**{
+                    k: arrays[f"tal_{k}"] for k in TalIndex._fields
+                })
+
+            channels.append(channel)
+
+        return header, channels
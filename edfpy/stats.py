@@ -0,0 +1,187 @@
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# per-channel table and `(channels, epochs)` table of statistics, both
+# structured arrays with a `label` field and one field per metric
+Stats = namedtuple('Stats', 'channels epochs')
+
+metrics = ('min', 'max', 'mean', 'std', 'rms', 'clipped', 'flat', 'dropouts',
+           'line_noise')
+
+
+class StatsBuilder:
+    """accumulate statistics of consecutive digital samples of a channel
+
+    Sums, extrema, clipping counts and the Fourier coefficient at the line
+    frequency are accumulated per epoch of `epoch_samples` samples in the
+    digital domain, and runs of constant samples are tracked across chunks.
+    `finish` converts the accumulators to physical units with the channel's
+    gain and bias:
+
+    - `min`, `max`, `mean`, `std`, `rms` of the physical signal
+    - `clipped`, the fraction of samples at the digital minimum or maximum
+    - `flat`, the longest run of constant samples in seconds
+    - `dropouts`, the number of such runs of at least `flat_samples`
+    - `line_noise`, the fraction of variance at `line_frequency`
+    """
+
+    def __init__(self, channel, sample_rate: float, epoch_samples: int,
+                 num_epochs: int, line_frequency: float = 50.0,
+                 flat_samples: int = 1):
+        self.gain, self.bias = channel.coefficients
+        self.limits = (channel.digimin, channel.digimax)
+        self.sample_rate = sample_rate
+        self.epoch_samples = epoch_samples
+        self.flat_samples = flat_samples
+        self.omega = 2 * np.pi * line_frequency / sample_rate
+        self.count = np.zeros(num_epochs)
+        self.sum = np.zeros(num_epochs)
+        self.sum2 = np.zeros(num_epochs)
+        self.min = np.full(num_epochs, np.inf)
+        self.max = np.full(num_epochs, -np.inf)
+        self.clipped = np.zeros(num_epochs)
+        self.fourier = np.zeros(num_epochs, dtype=complex)
+        self.phasors = np.zeros(num_epochs, dtype=complex)
+        self.flat = np.zeros(num_epochs)
+        self.dropouts = np.zeros(num_epochs)
+        self.longest = 0
+        self.num_dropouts = 0
+        # value and first sample of the run continuing into the next chunk
+        self.run: Optional[tuple] = None
+        self.num_samples = 0
+
+    def update(self, digital: np.ndarray):
+        """add the next consecutive `digital` samples"""
+        n0, size = self.num_samples, digital.size
+        if size == 0:
+            return
+
+        E = self.epoch_samples
+        starts = np.union1d([0], np.arange((-n0) % E, size, E))
+        epochs = np.minimum((n0 + starts) // E, self.count.size - 1)
+        x = digital.astype(np.float64)
+        np.add.at(self.count, epochs, np.diff(np.append(starts, size)))
+        np.add.at(self.sum, epochs, np.add.reduceat(x, starts))
+        np.add.at(self.sum2, epochs, np.add.reduceat(x * x, starts))
+        np.minimum.at(self.min, epochs, np.minimum.reduceat(x, starts))
+        np.maximum.at(self.max, epochs, np.maximum.reduceat(x, starts))
+        clipped = (digital <= self.limits[0]) | (digital >= self.limits[1])
+        np.add.at(self.clipped, epochs, np.add.reduceat(clipped, starts))
+        if self.omega < np.pi:
+            phasors = np.exp(-1j * self.omega * np.arange(n0, n0 + size))
+            np.add.at(self.fourier, epochs,
+                      np.add.reduceat(x * phasors, starts))
+            np.add.at(self.phasors, epochs, np.add.reduceat(phasors, starts))
+
+        self.update_runs(digital)
+        self.num_samples += size
+
+    def skip(self, num_samples: int):
+        """skip `num_samples` missing samples, e.g. of a gap between
+        records, which ends the current run of constant samples"""
+        if num_samples > 0:
+            self.end_run()
+            self.num_samples += num_samples
+
+    def end_run(self):
+        """close the run continuing up to the last sample"""
+        if self.run is not None:
+            self.close_runs(np.array([self.run[1]]),
+                            np.array([self.num_samples]))
+            self.run = None
+
+    def update_runs(self, digital: np.ndarray):
+        """close runs of constant samples ending in `digital`"""
+        n0 = self.num_samples
+        starts = n0 + np.flatnonzero(digital[1:] != digital[:-1]) + 1
+        if self.run is not None and self.run[0] != digital[0]:
+            starts = np.append(n0, starts)
+
+        first = self.run[1] if self.run is not None else n0
+        bounds = np.append(first, starts)
+        self.close_runs(bounds[:-1], bounds[1:])
+        self.run = (digital[-1], bounds[-1])
+
+    def close_runs(self, starts: np.ndarray, stops: np.ndarray):
+        lengths = stops - starts
+        if lengths.size == 0:
+            return
+
+        self.longest = max(self.longest, int(lengths.max()))
+        E = self.epoch_samples
+        last = self.count.size - 1
+        first_epochs = np.minimum(starts // E, last)
+        long = lengths >= self.flat_samples
+        self.num_dropouts += int(np.count_nonzero(long))
+        np.add.at(self.dropouts, first_epochs[long], 1)
+
+        # runs within one epoch, and the few spanning epochs one by one
+        within = np.minimum((stops - 1) // E, last) == first_epochs
+        np.maximum.at(self.flat, first_epochs[within], lengths[within])
+        for start, stop in zip(starts[~within], stops[~within]):
+            for k in range(start // E, min((stop - 1) // E, last) + 1):
+                overlap = min(stop, (k + 1) * E) - max(start, k * E)
+                self.flat[k] = max(self.flat[k], overlap)
+
+    def summarize(self, count, total, total2, minimum, maximum, clipped,
+                  fourier, phasors) -> Dict[str, np.ndarray]:
+        """returns physical statistics of accumulated digital samples"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = np.maximum(total2 / count - mean ** 2, 0.0)
+            centered = fourier - mean * phasors
+            line_noise = 2 * np.abs(centered) ** 2 / count ** 2 / var
+            line_noise = np.where(var > 0, line_noise, 0.0)
+            if self.omega >= np.pi:
+                line_noise[...] = np.nan
+
+            g, b = self.gain, self.bias
+            low, high = g * minimum + b, g * maximum + b
+            return {
+                'min': np.minimum(low, high),
+                'max': np.maximum(low, high),
+                'mean': g * mean + b,
+                'std': abs(g) * np.sqrt(var),
+                'rms': np.sqrt(g * g * total2 / count
+                               + 2 * g * b * mean + b * b),
+                'clipped': clipped / count,
+                'line_noise': line_noise,
+            }
+
+    def finish(self) -> Dict[str, np.ndarray]:
+        """returns statistics of the whole signal as 0-d arrays and of the
+        epochs, the latter under keys prefixed with `epochs.`"""
+        self.end_run()
+        accumulators = (self.count, self.sum, self.sum2, self.min, self.max,
+                        self.clipped, self.fourier, self.phasors)
+        totals = [a.sum() for a in accumulators]
+        totals[3], totals[4] = self.min.min(), self.max.max()
+        summary = self.summarize(*totals)
+        summary['flat'] = np.asarray(self.longest / self.sample_rate)
+        summary['dropouts'] = np.asarray(self.num_dropouts)
+        epochs = self.summarize(*accumulators)
+        epochs['flat'] = self.flat / self.sample_rate
+        epochs['dropouts'] = self.dropouts
+        summary.update({f"epochs.{k}": v for k, v in epochs.items()})
+        return summary
+
+
+def table(labels: Sequence[str], results: List[Dict[str, np.ndarray]],
+          names: Sequence[str], prefix: str = '') -> np.ndarray:
+    """returns the structured array of metrics `names` of `results` by
+    channel `labels`, of results under keys with `prefix` if given"""
+    columns = {name: np.array([r[prefix + name] for r in results],
+                              dtype=np.float64)
+               for name in names}
+    shape = (len(labels),) + (columns[names[0]].shape[1:] if names
+                              and labels else ())
+    width = max(map(len, labels), default=1)
+    arr = np.empty(shape, dtype=[('label', f"U{width}")]
+                   + [(name, np.float64) for name in names])
+    arr['label'] = np.reshape(labels, (-1,) + (1,) * (len(shape) - 1))
+    for name in names:
+        arr[name] = columns[name]
+
+    return arr
@@ -0,0 +1,145 @@
+from io import SEEK_END
+from collections import deque
+from typing import Deque, List, Dict, BinaryIO, Union, Sequence
+
+import numpy as np
+
+from .blob import write_blob
+from .header import Header
+from .channel import Channel, Label
+
+Samples = Union[Sequence[np.ndarray], Dict[str, np.ndarray]]
+
+
+class Writer:
+    """write EDF files incrementally, one chunk of samples at a time
+
+    Samples are buffered per channel only until a record is complete.  Full
+    records are written to `file` right away, and the number of records is
+    patched into the header on `close()`.
+
+        with Writer.open('out.edf', header, channels) as writer:
+            for chunk in chunks:
+                writer.write_physical(chunk)
+    """
+
+    def __init__(self, file: BinaryIO, header: Header,
+                 channels: List[Channel]):
+        self.file = file
+        self.header = header
+        self.channels = channels
+        self.record_lengths = [c.num_samples_per_record for c in channels]
+        self.pending: List[Deque[np.ndarray]] = [deque() for _ in channels]
+        self.num_pending = [0 for _ in channels]
+        self.num_records = 0
+        header.num_channels = len(channels)
+        header.num_header_bytes = \
+            Header.default_num_header_bytes * (len(channels) + 1)
+        header.num_records = -1  # unknown while writing
+        header.write(file)
+        Channel.write(file, channels)
+
+    @classmethod
+    def open(cls, filepath: str, header: Header,
+             channels: List[Channel]) -> 'Writer':
+        return cls(open(filepath, 'wb'), header, channels)
+
+    def __enter__(self) -> 'Writer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(check=exc_type is None)
+
+    def ordered(self, samples: Samples) -> List[np.ndarray]:
+        """return `samples` in channel order"""
+        if isinstance(samples, dict):
+            by_label = {Label(k): v for k, v in samples.items()}
+            return [by_label[c.label] for c in self.channels]
+
+        if len(samples) != len(self.channels):
+            raise ValueError(f"expected {len(self.channels)} arrays, "
+                             f"got {len(samples)}")
+
+        return list(samples)
+
+    def write_records(self, samples: Samples):
+        """write whole records of digital samples, one array per channel"""
+        arrs = [np.asarray(arr) for arr in self.ordered(samples)]
+        if any(self.num_pending):
+            raise ValueError("cannot write records after incomplete record")
+
+        num_records = {arr.size // n for arr, n in
+                       zip(arrs, self.record_lengths)}
+        complete = all(arr.size % n == 0 for arr, n in
+                       zip(arrs, self.record_lengths))
+        if len(num_records) > 1 or not complete:
+            raise ValueError("samples do not align with records")
+
+        write_blob(self.file, arrs, self.record_lengths,
+                   self.header.filetype)
+        self.num_records += num_records.pop() if num_records else 0
+
+    def write_digital(self, samples: Samples):
+        """buffer digital samples and write all completed records"""
+        for i, arr in enumerate(self.ordered(samples)):
+            arr = np.asarray(arr).reshape(-1)
+            self.pending[i].append(arr)
+            self.num_pending[i] += arr.size
+
+        num_records = min(n // q for n, q in
+                          zip(self.num_pending, self.record_lengths))
+        if num_records == 0:
+            return
+
+        arrs = [self.take(i, num_records * q)
+                for i, q in enumerate(self.record_lengths)]
+        write_blob(self.file, arrs, self.record_lengths,
+                   self.header.filetype)
+        self.num_records += num_records
+
+    def take(self, i: int, count: int) -> np.ndarray:
+        """returns the first `count` buffered samples of channel `i`
+
+        Only the buffered arrays covering these samples are concatenated;
+        the rest stay buffered as they are.
+        """
+        pending = self.pending[i]
+        taken: List[np.ndarray] = []
+        size = 0
+        while size < count:
+            arr = pending.popleft()
+            if size + arr.size > count:
+                pending.appendleft(arr[count - size:].copy())
+                arr = arr[:count - size]
+
+            taken.append(arr)
+            size += arr.size
+
+        self.num_pending[i] -= count
+        return np.concatenate(taken) if taken else np.empty(0)
+
+    def write_physical(self, samples: Samples):
+        """convert physical samples to digital and write them"""
+        digital = [c.to_digital(arr) for c, arr in
+                   zip(self.channels, self.ordered(samples))]
+        self.write_digital(digital)
+
+    def close(self, check: bool = True):
+        """patch the number of records into the header and close the file
+
+        Samples of an incomplete last record are discarded, and reported
+        with a `ValueError` after closing if `check`.  Leaving the `with`
+        block of a writer on an exception does not check, such that the
+        exception is not replaced.
+        """
+        if self.file.closed:
+            return
+
+        self.header.num_records = self.num_records
+        self.header.write(self.file)
+        self.file.seek(0, SEEK_END)
+        self.file.close()
+        incomplete = [c.label for c, n in
+                      zip(self.channels, self.num_pending) if n]
+        if check and incomplete:
+            raise ValueError(f"incomplete record discarded for {incomplete}")
@@ -1,3 +1,5 @@
+from io import SEEK_SET, SEEK_CUR, SEEK_END
+from mmap import mmap, ACCESS_READ
 from os.path import splitext
 from datetime import datetime
 
@@ -5,7 +7,9 @@ import numpy as np
 import pandas as pd
 import pytest
 
+from edfpy import instrument
 from edfpy.reader import Reader
+from edfpy.block_cache import BlockCache
 from edfpy.channel import Annotation
 
 
@@ -81,3 +85,293 @@ def test_edfp_annotations_channel(filename, sample_filepath):
     annots_channel = reader.channel_by_label['ANNOTATIONS']
     annotations = annots_channel.annotations
     assert annotations == expected
+
+
+class FakeGridOut:
+    """in-memory file of a GridFS-like store that serves fixed-size chunks"""
+
+    def __init__(self, data: bytes, chunk_size: int = 1024):
+        self.chunks = [data[i:i + chunk_size]
+                       for i in range(0, len(data), chunk_size)]
+        self.chunk_size = chunk_size
+        self.length = len(data)
+        self.position = 0
+        self.fetched = set()
+
+    def seek(self, pos: int, whence: int = SEEK_SET) -> int:
+        base = {SEEK_SET: 0, SEEK_CUR: self.position, SEEK_END: self.length}
+        self.position = base[whence] + pos
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        stop = self.length if size < 0 else min(self.position + size,
+                                                self.length)
+        parts = []
+        while self.position < stop:
+            k = self.position // self.chunk_size
+            self.fetched.add(k)
+            offset = self.position - k * self.chunk_size
+            part = self.chunks[k][offset:offset + stop - self.position]
+            parts.append(part)
+            self.position += len(part)
+
+        return b''.join(parts)
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf',
+                                      'edfp-sample.edf'])
+def test_from_buffer(sample_filepath):
+    expected = Reader.open(sample_filepath).get_physical_samples(1.0, 2.5)
+    with open(sample_filepath, 'rb') as fp:
+        data = fp.read()
+        buffered = mmap(fp.fileno(), 0, access=ACCESS_READ)
+
+    with buffered:
+        for buffer in [data, memoryview(data), buffered]:
+            reader = Reader.from_buffer(buffer)
+            signals = reader.get_physical_samples(1.0, 2.5)
+            assert signals.keys() == expected.keys()
+            for label, signal in signals.items():
+                assert np.all(signal == expected[label]), label
+
+        # the memory map cannot close while arrays of the reader view it
+        del reader
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_from_stream(sample_filepath):
+    reader = Reader.open(sample_filepath)
+    with open(sample_filepath, 'rb') as fp:
+        gridout = FakeGridOut(fp.read())
+
+    streamed = Reader.from_stream(gridout, block_records=2, max_blocks=3)
+    assert streamed.duration == reader.duration
+    expected = reader.get_physical_samples(3.0, 1.5)
+    gridout.fetched.clear()
+    signals = streamed.get_physical_samples(3.0, 1.5)
+    for label, signal in signals.items():
+        assert np.all(signal == expected[label]), label
+
+    # only chunks of records 2 to 5 are fetched
+    record_bytes = 2 * sum(c.num_samples_per_record
+                           for c in streamed.channels)
+    first = (streamed.header.num_header_bytes + 2 * record_bytes) // 1024
+    last = (streamed.header.num_header_bytes + 6 * record_bytes - 1) // 1024
+    assert gridout.fetched == set(range(first, last + 1))
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_get_physical_samples_dtype(sample_filepath, sample_data):
+    t0, dt = 1.0, 0.503  # seconds
+    reader = Reader.open(sample_filepath)
+    labels = list(sample_data.columns)
+    out = {label: np.empty(sample_data.loc[t0:t0 + dt].shape[0],
+                           dtype=np.float32) for label in labels}
+    signals = reader.get_physical_samples(t0, dt, labels, out=out)
+    for label, data in sample_data.items():
+        expected = data.loc[t0:t0 + dt]
+        assert signals[label] is out[label]
+        assert signals[label] == pytest.approx(expected, rel=1e-4), label
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+@pytest.mark.parametrize('duration, step', [(2.0, None), (2.0, 0.5)])
+def test_iter_windows(sample_filepath, duration, step):
+    reader = Reader.open(sample_filepath)
+    labels = reader.basic_labels[:2]
+    labels.append(labels[0].derive(labels[1])[0])
+    signals = reader.get_physical_samples(labels=labels)
+    batches = list(reader.iter_windows(duration, step, labels,
+                                       batch_size=7))
+    windows = np.concatenate(batches)
+    sr = reader.channels[0].num_samples_per_record \
+        / reader.header.record_duration
+    width, stride = int(duration * sr), int((step or duration) * sr)
+    num_samples = signals[labels[0]].size
+    assert all(b.shape[1:] == (len(labels), width) for b in batches)
+    assert windows.shape[0] == (num_samples - width) // stride + 1
+    onsets = reader.window_onsets(duration, step, labels)
+    assert onsets == pytest.approx(np.arange(windows.shape[0]) * stride / sr)
+    for k in [0, 1, windows.shape[0] - 1]:
+        for i, label in enumerate(labels):
+            expected = signals[label][k * stride:k * stride + width]
+            assert windows[k, i] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_get_physical_array(sample_filepath, sample_data):
+    t0, dt = 1.0, 2.0  # seconds
+    reader = Reader.open(sample_filepath)
+    labels = list(sample_data.columns)
+    signals = reader.get_physical_samples(t0, dt, labels)
+    expected = np.array([signals[label] for label in labels])
+    assert np.array_equal(reader.get_physical_array(t0, dt, labels),
+                          expected)
+    sr = reader.channels[0].num_samples_per_record \
+        / reader.header.record_duration
+    arr = reader.get_physical_array(t0, dt, labels, target_rate=sr)
+    assert np.array_equal(arr, expected)
+    arr = reader.get_physical_array(t0, dt, labels, target_rate=sr / 2)
+    assert arr.shape == (len(labels), expected.shape[1] // 2)
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int16])
+def test_read_matrix(sample_filepath, dtype):
+    reader = Reader.open(sample_filepath)
+    labels = reader.basic_labels[::-2]
+    channels = reader.matrix_channels(labels)
+    assert channels is not None
+    sli = slice(100, 1000)
+    arr = reader.read_matrix(channels, sli, dtype)
+    assert arr.dtype == dtype and arr.shape == (len(labels), 900)
+    for label, row in zip(labels, arr):
+        expected = reader.channel_by_label[label].get(sli, dtype)
+        assert row == pytest.approx(expected)
+
+    basic = reader.basic_labels
+    derived = basic[0].derive(basic[1])
+    assert reader.matrix_channels([labels[0], labels[0]]) is None
+    assert reader.matrix_channels(derived) is None
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_get_envelope(sample_filepath):
+    reader = Reader.open(sample_filepath)
+    labels = reader.basic_labels[:2]
+    labels.append(labels[0].derive(labels[1])[0])
+    signals = reader.get_physical_samples(labels=labels)
+    summaries = reader.get_envelope(labels=labels, max_points=500)
+    assert set(reader.envelopes) == set(labels)
+    for label, summary in summaries.items():
+        assert summary.t.size <= 500
+        assert summary.min.min() == pytest.approx(signals[label].min())
+        assert summary.max.max() == pytest.approx(signals[label].max())
+        assert summary.mean.mean() == pytest.approx(signals[label].mean(),
+                                                    abs=1e-3)
+
+    t0, dt = 3.0, 0.5  # seconds
+    signals = reader.get_physical_samples(t0, dt, labels)
+    summaries = reader.get_envelope(t0, dt, labels, max_points=500)
+    for label, summary in summaries.items():
+        assert np.array_equal(summary.mean, signals[label])
+        assert summary.t[0] == pytest.approx(t0)
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_block_cache(sample_filepath):
+    cache = BlockCache(max_bytes=1 << 20, block_records=4)
+    reader = Reader.open(sample_filepath, block_cache=cache)
+    expected = Reader.open(sample_filepath).get_physical_samples(1.0, 3.0)
+    for _ in range(2):
+        signals = reader.get_physical_samples(1.0, 3.0)
+        for label, signal in expected.items():
+            assert np.array_equal(signals[label], signal)
+
+    assert cache.info()['hits'] > 0
+
+
+@pytest.mark.parametrize('filename', ['edfp-sample.edf'])
+def test_instrument(sample_filepath):
+    with instrument.profile() as prof:
+        reader = Reader.open(sample_filepath)
+        reader.get_physical_samples(0.0, 1.0, ['1', '2', '1-2'])
+        reader.channels[-1].annotations
+
+    stages = prof.as_dict()
+    for name in ['reader.open', 'header.read', 'channel.read',
+                 'reader.get_physical_samples', 'blob.read_slices',
+                 'channel.scale', 'derivation.resolve', 'annotations.index',
+                 'annotations.parse']:
+        assert stages[name]['calls'] >= 1, name
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_get_digital_records(sample_filepath):
+    t0, dt = 2.0, 3.0  # seconds, whole records
+    reader = Reader.open(sample_filepath)
+    records = reader.get_digital_records(t0, dt)
+    gains, biases = reader.coefficients()
+    signals = reader.get_physical_samples(t0, dt)
+    for (label, digital), gain, bias in zip(records.items(), gains, biases):
+        assert digital.shape[0] == 3
+        assert np.shares_memory(digital, reader.channel_by_label[label]
+                                .signal.blob)
+        assert gain * digital.reshape(-1) + bias == \
+            pytest.approx(signals[label])
+
+    with pytest.raises(ValueError):
+        reader.get_digital_records(labels=[reader.labels[-1]])
+
+
+@pytest.mark.parametrize('workers', [None, 3])
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf'])
+def test_map_chunks(sample_filepath, workers):
+    reader = Reader.open(sample_filepath)
+    labels = reader.basic_labels[:2]
+    labels.append(labels[0].derive(labels[1])[0])
+    expected = reader.get_physical_samples(labels=labels, dtype=np.float32)
+    max_bytes = 40 * 1024
+    chunks = list(reader.map_chunks(lambda t0, s: (t0, s), labels,
+                                    max_bytes, np.float32, workers))
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0.0 and chunks[1][0] > 0.0
+    for label in labels:
+        signal = np.concatenate([s[label] for _, s in chunks])
+        assert np.array_equal(signal, expected[label])
+        assert max(s[label].nbytes for _, s in chunks) * len(labels) \
+            <= max_bytes
+
+    total = reader.reduce(lambda t0, s: s[labels[0]].sum(),
+                          lambda a, b: a + b, labels[:1], max_bytes,
+                          workers=workers)
+    signal = reader.get_physical_samples(labels=labels[:1])[labels[0]]
+    assert total == pytest.approx(signal.sum())
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'sample2.edf',
+                                      'edfp-sample.edf'])
+def test_stats(sample_filepath):
+    reader = Reader.open(sample_filepath)
+    signals = reader.get_physical_samples(
+        labels=[c.label for c in reader.basic_channels()])
+    qc = reader.stats(chunk_bytes=10000)
+    assert qc.epochs is None
+    assert qc.channels['label'].tolist() == list(signals)
+    for row, signal in zip(qc.channels, signals.values()):
+        assert row['min'] == pytest.approx(signal.min())
+        assert row['max'] == pytest.approx(signal.max())
+        assert row['mean'] == pytest.approx(signal.mean(), abs=1e-9)
+        assert row['std'] == pytest.approx(signal.std())
+        assert row['rms'] == pytest.approx(np.sqrt(np.mean(signal ** 2)))
+
+    qc = reader.stats(metrics=['mean', 'clipped'], epoch=1.0)
+    assert qc.channels.dtype.names == ('label', 'mean', 'clipped')
+    num_epochs = int(np.ceil(reader.duration))
+    assert qc.epochs.shape == (len(signals), num_epochs)
+    signal = next(iter(signals.values()))
+    size = int(reader.basic_channels()[0].num_samples_per_record
+               / reader.header.record_duration)
+    means = [signal[i:i + size].mean() for i in range(0, signal.size, size)]
+    assert qc.epochs[0]['mean'] == pytest.approx(means)
+
+    with pytest.raises(ValueError):
+        reader.stats(metrics=['median'])
+
+
+@pytest.mark.parametrize('filename', ['sample.edf', 'edfp-sample.edf'])
+def test_channel_table(sample_filepath):
+    reader = Reader.open(sample_filepath)
+    table = reader.channel_table
+    assert reader.channel_table is table
+    assert table.labels == [c.label for c in reader.channels]
+    with open(sample_filepath, 'rb') as fp:
+        fp.seek(256)
+        read = type(table).read(fp, reader.header.num_channels,
+                                reader.header.filetype)
+
+    assert np.array_equal(read.rows, table.rows)
+    assert read.annotations == table.annotations
@@ -1,5 +1,71 @@
+import numpy as np
 from pytest import fixture
 
+from edfpy.header import Header
+from edfpy.writer import Writer
+from edfpy.channel import Channel, AnnotationChannel
+
+
+@fixture
+def header():
+    """returns the header of an EDF file to be written"""
+    return Header(version='0', patient_id='X', recording_id='X',
+                  startdate='01.01.20', starttime='00.00.00',
+                  num_header_bytes=0, reserved='', num_records=0,
+                  record_duration=1, num_channels=0)
+
+
+def channels(labels, rates, physical_range=(-100.0, 100.0)):
+    """returns channels `labels` of 16-bit samples at `rates` samples per
+    record, labels ending with `Annotations` as annotation channels"""
+    minimum, maximum = physical_range
+    result = []
+    for label, n in zip(labels, rates):
+        annotations = label.endswith('Annotations')
+        cls = AnnotationChannel if annotations else Channel
+        result.append(cls(
+            label=label, channel_type='' if annotations else 'EEG',
+            physical_dimension='' if annotations else 'uV',
+            physical_minimum=-1.0 if annotations else minimum,
+            physical_maximum=1.0 if annotations else maximum,
+            digital_minimum=-32768, digital_maximum=32767, prefiltering='',
+            num_samples_per_record=n, reserved=''))
+
+    return result
+
+
+@fixture
+def make_channels():
+    return channels
+
+
+@fixture
+def write_edf(tmp_path, header):
+    """returns a function writing samples of channels `labels` at `rates`
+    samples per record to file `filename` in `tmp_path`, and returning its
+    path; floating point samples are written as physical samples
+
+        path = write_edf(['C3-M2', 'EMG'], [8, 4], digital)
+    """
+    def write(labels, rates, digital, reserved='', filename='test.edf',
+              physical_range=(-100.0, 100.0)) -> str:
+        header.reserved = reserved
+        filepath = str(tmp_path / filename)
+        arrays = list(digital.values()) if isinstance(digital, dict) \
+            else list(digital)
+        physical = arrays and \
+            all(np.asarray(a).dtype.kind == 'f' for a in arrays)
+        with Writer.open(filepath, header, channels(
+                labels, rates, physical_range)) as writer:
+            if physical:
+                writer.write_physical(digital)
+            else:
+                writer.write_digital(digital)
+
+        return filepath
+
+    return write
+
 
 @fixture
 def test_header_bytes():
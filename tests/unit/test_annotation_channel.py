@@ -0,0 +1,81 @@
+import pytest
+import numpy as np
+
+from edfpy.blob import BlobSlice
+from edfpy.channel import AnnotationChannel, Annotation
+from edfpy.channel.annotation_channel import scan_tals
+
+records = [
+    b'+0\x14\x14\x00+17.5\x150.5\x14Arousal\x14\x00',
+    b'+1\x14\x14\x00',
+    b'+2\x14\x14\x00+2.25\x151\x14Blink\x14\x00+0.5\x150\x14Start\x14\x00',
+    b'+3\x14\x14\x00-1.5\x152\x14Early\x14\x00',
+]
+width = 64
+
+
+@pytest.fixture
+def raw():
+    return np.frombuffer(b''.join(r.ljust(width, b'\x00') for r in records),
+                         dtype=np.uint8).reshape(len(records), width)
+
+
+@pytest.fixture
+def channel(raw):
+    channel = AnnotationChannel(label='EDF Annotations',
+                                num_samples_per_record=width // 2)
+    blob = raw.view('<i2')
+    channel.signal = BlobSlice(blob, (0, blob.shape[1]))
+    return channel
+
+
+def test_scan_tals(raw):
+    index = scan_tals(raw)
+    assert index.record_onsets.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert index.onsets.tolist() == [17.5, 2.25, 0.5, -1.5]
+    assert index.records.tolist() == [0, 2, 2, 3]
+    tal = raw.reshape(-1)[index.starts[0]:index.stops[0]].tobytes()
+    assert tal == b'+17.5\x150.5\x14Arousal'
+
+
+@pytest.mark.parametrize('scan_records', [1, 3, 1024])
+def test_index(channel, raw, scan_records):
+    """test the index scanned in blocks of records equals one scan"""
+    channel.scan_records = scan_records
+    expected = scan_tals(raw)
+    for field, arr in zip(expected._fields, channel.index):
+        assert np.array_equal(arr, getattr(expected, field)), field
+
+
+def test_annotations(channel):
+    assert channel.annotations == [
+        Annotation(17.5, 0.5, 'Arousal'),
+        Annotation(2.25, 1.0, 'Blink'),
+        Annotation(0.5, 0.0, 'Start'),
+        Annotation(-1.5, 2.0, 'Early'),
+    ]
+
+
+def test_annotations_in_record(channel):
+    assert channel.annotations_in_record(1) == []
+    assert [a.label for a in channel.annotations_in_record(2)] == \
+        ['Blink', 'Start']
+
+
+@pytest.mark.parametrize('t0, t1, expected', [
+    (0.0, 3.0, ['Start', 'Blink']),
+    (-5.0, 100.0, ['Early', 'Start', 'Blink', 'Arousal']),
+    (2.25, 17.5, ['Blink']),
+    (20.0, 30.0, []),
+])
+def test_annotations_between(channel, t0, t1, expected):
+    annotations = channel.annotations_between(t0, t1)
+    assert [a.label for a in annotations] == expected
+    assert len(channel.parsed) == len(expected)
+
+
+def test_sorted_onsets(channel):
+    onsets = channel.sorted_onsets
+    assert list(onsets) == sorted(channel.index.onsets)
+    channel.annotations_between(0.0, 3.0)
+    assert channel.sorted_onsets is onsets
@@ -1,7 +1,22 @@
+from io import BytesIO
+
 import pytest
 import numpy as np
 
-from edfpy.blob import read_blob, write_blob
+from edfpy.blob import (read_blob, read_slices, write_blob, decode_int24,
+                        encode_int24, BlobSlice, Stream, StreamBlob)
+
+
+class ShortReads(BytesIO):
+    """stream returning at most `limit` bytes per read, like a socket"""
+
+    def __init__(self, data: bytes, limit: int):
+        super().__init__(data)
+        self.limit = limit
+
+    def read(self, size=-1):
+        size = self.limit if size < 0 else min(size, self.limit)
+        return super().read(size)
 
 
 def blob_from_arrays(arrs, record_lengths):
@@ -80,3 +95,108 @@ def test_blob_slice_slices(tmp_path):
 
     with pytest.raises(ValueError):
         bslice[::2]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_read_slices(tmp_path, stream):
+    """test read_slices() against BlobSlice.__getitem__()"""
+    record_lengths = [8, 16, 4]
+    signals = [
+        np.arange(4 * 128, 6 * 128).astype(np.int16),
+        np.arange(4 * 128).astype(np.int16),
+        np.arange(6 * 128, 7 * 128).astype(np.int16),
+    ]
+    filepath = tmp_path / 'test_read_slices'
+    with open(filepath, 'wb') as fp:
+        fp.write(blob_from_arrays(signals, record_lengths))
+
+    bslices = read_blob(filepath, 0, record_lengths, 'EDF')
+    if stream:
+        blob = StreamBlob(Stream(BytesIO(filepath.read_bytes()),
+                                 block_records=3),
+                          '<i2', 0, sum(record_lengths))
+        bslices = [BlobSlice(blob, (bs.locs.start, bs.locs.stop))
+                   for bs in bslices]
+
+    requests = [
+        (bslices[0], slice(3, 70)),
+        (bslices[1], slice(None)),
+        (bslices[2], slice(-20, -1)),
+        (bslices[1], slice(11, 11)),
+    ]
+    # a tiny chunk size forces scattering over several chunks
+    samples = read_slices(requests, chunk_bytes=64)
+    for signal, (bslice, sl) in zip(samples, requests):
+        expected = bslice[sl]
+        assert signal.shape == expected.shape
+        assert np.all(signal == expected)
+
+
+def test_int24_roundtrip():
+    expected = np.array([[0, 1, -1, 2**23 - 1, -2**23, 1000, -1000]])
+    raw = encode_int24(expected)
+    assert raw.dtype == np.uint8
+    assert raw.shape == (1, 3 * expected.shape[1])
+    assert raw[0, :3].tolist() == [0, 0, 0]
+    assert raw[0, 6:9].tolist() == [0xff, 0xff, 0xff]
+    decoded = decode_int24(raw)
+    assert decoded.dtype == np.int32
+    assert np.all(decoded == expected)
+
+
+def test_read_bdf_blob(tmp_path):
+    record_lengths = [8, 16, 4]
+    expected_signals = [
+        np.arange(-4 * 128, -2 * 128) * 2**14,
+        np.arange(4 * 128) - 2**23,
+        np.arange(6 * 128, 7 * 128) * 2**12,
+    ]
+    filepath = tmp_path / 'test_read_bdf_blob'
+    with open(filepath, 'wb') as fp:
+        records = [arr.reshape((-1, n))
+                   for arr, n in zip(expected_signals, record_lengths)]
+        fp.write(encode_int24(np.concatenate(records, axis=1)).tobytes())
+
+    signals = read_blob(filepath, 0, record_lengths, 'BDF')
+    for signal, expected in zip(signals, expected_signals):
+        assert signal[:].dtype == np.int32
+        assert np.all(signal[:] == expected)
+        assert np.all(signal[5:-7] == expected[5:-7])
+
+    requests = [(signal, slice(3, 70)) for signal in signals]
+    for signal, expected in zip(read_slices(requests), expected_signals):
+        assert np.all(signal == expected[3:70])
+
+
+def test_stream_blob():
+    """test StreamBlob reads blocks on demand and evicts the oldest"""
+    records = np.arange(10 * 6, dtype='<i2').reshape(10, 6)
+    stream = Stream(BytesIO(b'header' + records.tobytes()), block_records=3,
+                    max_blocks=2)
+    blob = StreamBlob(stream, '<i2', 6, 6)
+    assert blob.shape == (10, 6)
+    assert np.all(blob[2:7, 1:3] == records[2:7, 1:3])
+    assert blob.num_reads == 3 and list(blob.blocks) == [1, 2]
+    assert np.all(blob[4:6] == records[4:6])
+    assert blob.num_reads == 3 and list(blob.blocks) == [2, 1]
+    assert np.all(blob[9:] == records[9:])
+    assert blob.num_reads == 4 and list(blob.blocks) == [1, 3]
+    assert blob[5:5].shape == (0, 6)
+    bslice = BlobSlice(blob, (2, 5))
+    assert np.all(bslice[4:20] == records[:, 2:5].flatten()[4:20])
+
+
+def test_stream_blob_short_reads():
+    records = np.arange(10 * 6, dtype='<i2').reshape(10, 6)
+    data = b'header' + records.tobytes()
+    stream = Stream(ShortReads(data, limit=5), block_records=4)
+    blob = StreamBlob(stream, '<i2', 6, 6)
+    assert np.all(blob[1:10] == records[1:10])
+
+    # the stream is truncated after the blob was opened
+    stream = Stream(BytesIO(data), block_records=4)
+    blob = StreamBlob(stream, '<i2', 6, 6)
+    stream.fileobj.truncate(len(data) - 4)
+    assert np.all(blob[:8] == records[:8])
+    with pytest.raises(EOFError):
+        blob[8:]
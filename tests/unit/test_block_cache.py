@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+
+from edfpy.blob import BlobSlice
+from edfpy.channel import Channel
+from edfpy.block_cache import BlockCache
+
+
+@pytest.fixture
+def channel():
+    channel = Channel(label='C3', physical_dimension='uV',
+                      physical_minimum=-100.0, physical_maximum=100.0,
+                      digital_minimum=-32768, digital_maximum=32767,
+                      num_samples_per_record=8)
+    blob = np.random.default_rng(0).integers(
+        -32768, 32767, size=(100, 8 + 4), dtype=np.int16)
+    channel.signal = BlobSlice(blob, (0, 8))
+    return channel
+
+
+def cached(channel, cache):
+    channel.cache = cache
+    channel.cache_key = ('test', 0)
+    return channel
+
+
+@pytest.mark.parametrize('sli', [
+    slice(None), slice(0, 8), slice(3, 5), slice(7, 9), slice(60, 700),
+    slice(-30, None), slice(790, 900), slice(5, 5),
+])
+def test_get(channel, sli):
+    expected = channel[sli]
+    cache = BlockCache(block_records=4)
+    values = cached(channel, cache)[sli]
+    assert np.array_equal(values, expected)
+    values[:] = 0.0  # does not write through to cached blocks
+    assert np.array_equal(channel[sli], expected)
+
+
+def test_hits_and_misses(channel):
+    cache = BlockCache(block_records=4)
+    cached(channel, cache)
+    channel[0:40]
+    assert cache.info()['misses'] == 2
+    channel[10:30]
+    assert cache.info()['hits'] == 1
+    out = np.empty(20, dtype=np.float32)
+    channel.get(slice(10, 30), out=out)
+    assert cache.info()['misses'] == 3
+
+
+def test_eviction(channel):
+    block_bytes = 4 * 8 * 8
+    cache = BlockCache(max_bytes=3 * block_bytes, block_records=4)
+    cached(channel, cache)
+    channel[:]
+    info = cache.info()
+    assert info['num_blocks'] == 3
+    assert info['num_bytes'] == 3 * block_bytes
+    assert [key[1] for key in cache.blocks] == [22, 23, 24]
+
+
+def test_threads(channel):
+    expected = channel[:]
+    cache = BlockCache(max_bytes=10 * 4 * 8 * 8, block_records=4)
+    cached(channel, cache)
+    slices = [slice(i, i + 50) for i in range(0, 750, 7)] * 4
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(channel.__getitem__, slices))
+
+    for sli, values in zip(slices, results):
+        assert np.array_equal(values, expected[sli])
+
+    info = cache.info()
+    assert info['hits'] + info['misses'] > len(slices)
+    assert info['num_bytes'] <= info['max_bytes']
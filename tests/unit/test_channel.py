@@ -1,8 +1,10 @@
 from io import BytesIO
 
 import pytest
+import numpy as np
 
-from edfpy.channel import Channel, Label
+from edfpy.blob import BlobSlice
+from edfpy.channel import Channel, Label, AnnotationChannel
 
 
 def test_read(channel_bytes, channel_content):
@@ -16,6 +18,16 @@ def test_read(channel_bytes, channel_content):
             assert getattr(channel, key) == exp[key], key
 
 
+@pytest.mark.parametrize('filetype', ['EDF+C', 'BDF+C', 'BDF+D'])
+def test_read_annotation_channel(channel_bytes, filetype):
+    """test the last channel of EDF+/BDF+ is read as annotation channel"""
+    file = BytesIO(channel_bytes)
+    channels = Channel.read(file, 5, filetype)
+    assert not any(isinstance(c, AnnotationChannel) for c in channels[:-1])
+    assert isinstance(channels[-1], AnnotationChannel)
+    assert channels[-1].label == 'F8-T4'
+
+
 def test_write(channel_bytes, channel_content):
     """test write channel-fields to file"""
     contents = channel_content
@@ -119,3 +131,91 @@ def test_children():
         'label': str(expected),
     })
     assert channel.children == [expected]
+
+
+@pytest.fixture
+def scaled_channel():
+    channel = Channel(label='C3', physical_dimension='uV',
+                      physical_minimum=-100.0, physical_maximum=100.0,
+                      digital_minimum=-2048, digital_maximum=2047,
+                      num_samples_per_record=4)
+    blob = np.arange(-8, 8, dtype='<i2').reshape(4, 4)
+    channel.signal = BlobSlice(blob, (0, 4))
+    return channel
+
+
+def test_coefficients(scaled_channel):
+    gain, bias = scaled_channel.coefficients
+    assert gain * -2048 + bias == pytest.approx(-100.0)
+    assert gain * 2047 + bias == pytest.approx(100.0)
+    scaled_channel.physical_maximum = 300.0
+    gain, bias = scaled_channel.coefficients
+    assert gain * 2047 + bias == pytest.approx(300.0)
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int16])
+def test_get_dtype(scaled_channel, dtype):
+    expected = scaled_channel[2:13]
+    samples = scaled_channel.get(slice(2, 13), dtype)
+    assert samples.dtype == dtype
+    if np.dtype(dtype).kind == 'f':
+        assert samples == pytest.approx(expected, rel=1e-6)
+    else:
+        assert np.all(samples == np.arange(-6, 5))
+
+
+def test_get_out(scaled_channel):
+    out = np.zeros(16, dtype=np.float32)
+    samples = scaled_channel.get(slice(0, 11), out=out[:11])
+    assert np.shares_memory(samples, out)
+    assert out[:11] == pytest.approx(scaled_channel[:11], rel=1e-6)
+    assert np.all(out[11:] == 0)
+
+
+def test_derivation_get(scaled_channel):
+    other = Channel(label='C4', physical_dimension='uV',
+                    num_samples_per_record=4)
+    other.signal = scaled_channel.signal
+    other.physical_minimum, other.physical_maximum = -50.0, 50.0
+    other.digital_minimum, other.digital_maximum = -2048, 2047
+    derivation = scaled_channel.derive(other)
+    expected = scaled_channel[1:9] - other[1:9]
+    out = np.empty(8, dtype=np.float32)
+    assert derivation.get(slice(1, 9), out=out) is out
+    assert out == pytest.approx(expected, rel=1e-6)
+    with pytest.raises(ValueError):
+        derivation.get(slice(None), np.int16)
+
+
+@pytest.fixture
+def interleaved_channel():
+    channel = Channel(label='C3', num_samples_per_record=4)
+    blob = np.arange(4 * 6, dtype='<i2').reshape(4, 6)
+    channel.signal = BlobSlice(blob, (1, 5))
+    return channel
+
+
+def test_records(interleaved_channel):
+    records = interleaved_channel.records(1, 3)
+    blob = interleaved_channel.signal.blob
+    assert records.shape == (2, 4)
+    assert np.shares_memory(records, blob)
+    assert np.all(records == blob[1:3, 1:5])
+
+
+@pytest.mark.parametrize('sli, view', [
+    (slice(5, 7), True),
+    (slice(4, 8), True),
+    (slice(3, 6), False),
+    (slice(None), False),
+])
+def test_digital(interleaved_channel, sli, view):
+    blob = interleaved_channel.signal.blob
+    expected = blob[:, 1:5].reshape(-1)[sli]
+    samples = interleaved_channel.digital(sli)
+    assert samples.dtype == np.int16
+    assert np.all(samples == expected)
+    assert np.shares_memory(samples, blob) == view
+    copied = interleaved_channel.digital(sli, copy=True)
+    assert np.all(copied == expected)
+    assert not np.shares_memory(copied, blob)
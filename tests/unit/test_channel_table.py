@@ -0,0 +1,33 @@
+from io import BytesIO
+
+import pytest
+
+from edfpy.channel import Channel, ChannelTable, AnnotationChannel
+
+
+def test_read(channel_bytes, channel_content):
+    """test read channel-field bytes into a table"""
+    table = ChannelTable.read(BytesIO(channel_bytes), len(channel_content))
+    assert len(table) == len(channel_content)
+    assert table.rows.itemsize == 256
+    assert table.labels == [c['label'] for c in channel_content]
+    for expected, channel in zip(channel_content, table):
+        assert type(channel) is Channel
+        for key, value in expected.items():
+            assert getattr(channel, key) == value, key
+
+
+@pytest.mark.parametrize('filetype', ['EDF', 'EDF+C'])
+def test_from_channels(channel_bytes, filetype):
+    """test tables of channels write the bytes they were read from"""
+    channels = Channel.read(BytesIO(channel_bytes), 5, filetype)
+    table = ChannelTable.from_channels(channels)
+    assert table.annotations == (filetype == 'EDF+C')
+    assert isinstance(table[-1], AnnotationChannel) == table.annotations
+    assert isinstance(table[4], AnnotationChannel) == table.annotations
+    assert not isinstance(table[0], AnnotationChannel)
+    file = BytesIO()
+    Channel.write(file, table.channels())
+    assert file.getvalue() == channel_bytes
+    read = ChannelTable.read(BytesIO(channel_bytes), 5, filetype)
+    assert (read.rows == table.rows).all()
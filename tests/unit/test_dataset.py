@@ -0,0 +1,98 @@
+import os
+
+import pytest
+import numpy as np
+
+from edfpy.reader import Reader
+from edfpy.dataset import Dataset, Request, read_shared, collect
+
+
+@pytest.fixture
+def paths(write_edf):
+    return [write_edf(['C3-M2', 'C4-M2'], [8, 8],
+                      [np.arange(40, dtype=np.int16) * (i + 1),
+                       -np.arange(40, dtype=np.int16)],
+                      filename=f'{i}.edf')
+            for i in range(3)]
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_dataset(paths, executor):
+    requests = [Request(path, ['C3-M2', 'C3-C4'], t0, 2.0)
+                for path in paths for t0 in (0.0, 1.5)]
+    dataset = Dataset(requests, executor=executor, max_workers=2)
+    expected = [Reader.open(r.path).get_physical_samples(r.t0, r.dt, r.labels)
+                for r in requests]
+
+    results = list(dataset)
+    assert len(results) == len(dataset)
+    for signals, expect in zip(results, expected):
+        assert signals.keys() == expect.keys()
+        for label, arr in expect.items():
+            assert np.array_equal(signals[label], arr)
+
+    completed = {(r.path, r.t0): signals
+                 for r, signals in dataset.as_completed()}
+    for r, expect in zip(requests, expected):
+        for label, arr in expect.items():
+            assert np.array_equal(completed[(r.path, r.t0)][label], arr)
+
+
+def test_read_shared(paths):
+    """test samples are read into views of the shared memory block"""
+    request = Request(paths[1], ['C3-M2', 'C3-C4', 'C3-M2'], 1.5, 2.0)
+    expected = Reader.open(request.path).get_physical_samples(
+        request.t0, request.dt, request.labels, np.float32)
+    original = Reader.get_physical_samples
+    filled = []
+
+    def spy(self, t0, dt, labels, dtype, out=None):
+        signals = original(self, t0, dt, labels, dtype, out)
+        filled.extend(ll for ll, x in signals.items() if x is out[ll])
+        return signals
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Reader, 'get_physical_samples', spy)
+        shared = read_shared(request, np.float32)
+
+    assert filled == list(expected)
+    signals = collect(shared)
+    assert signals.keys() == expected.keys()
+    for label, arr in expected.items():
+        assert signals[label].dtype == np.float32
+        assert np.array_equal(signals[label], arr)
+
+
+def test_dataset_executor():
+    with pytest.raises(ValueError):
+        Dataset([], executor='mpi')
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'),
+                    reason="shared memory blocks not listed in /dev/shm")
+@pytest.mark.parametrize('method', ['__iter__', 'as_completed'])
+def test_dataset_stop_early(paths, method):
+    """test blocks of requests in flight are released on early stop"""
+    before = set(os.listdir('/dev/shm'))
+    requests = [Request(path, ['C3-M2'], t0, 1.0)
+                for path in paths for t0 in range(5)]
+    dataset = Dataset(requests, executor='process', max_workers=2)
+    for _ in getattr(dataset, method)():
+        break
+
+    assert set(os.listdir('/dev/shm')) <= before
+
+
+def test_dataset_readers(paths):
+    """test workers open every file once"""
+    requests = [Request(path, ['C3-M2'], t0, 1.0)
+                for t0 in range(3) for path in paths]
+    opened = []
+    dataset = Dataset(requests, max_workers=1)
+    original = Reader.open
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Reader, 'open', lambda path: opened.append(path)
+                   or original(path))
+        assert len(list(dataset)) == len(requests)
+
+    assert sorted(opened) == sorted(paths)
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+
+from edfpy.channel import Channel, Label, DerivationGraph
+
+
+def channel(label, num_samples_per_record=4, physical_dimension='uV'):
+    return Channel(label=label, physical_dimension=physical_dimension,
+                   num_samples_per_record=num_samples_per_record)
+
+
+@pytest.mark.parametrize('labels, requested, children', [
+    (['F3-M2', 'C3-M2'], 'F3-C3', ['F3-M2', 'C3-M2']),
+    (['F3-M2', 'M1-M2', 'C3-M1'], 'F3-C3', ['F3-M2', 'M1-M2', 'C3-M1']),
+    (['F3', 'M2', 'C3-M2'], 'F3-C3', ['F3', 'M2', 'C3-M2']),
+    (['F3-M2', 'M2'], 'F3', ['F3-M2', 'M2']),
+    (['F3-M2'], 'M2-F3', ['F3-M2']),
+])
+def test_resolve(labels, requested, children):
+    graph = DerivationGraph([channel(label) for label in labels])
+    derivation = graph[Label(requested)]
+    assert derivation.label == Label(requested)
+    assert derivation.children == list(map(Label, children))
+    assert graph[Label(requested)] is derivation
+
+
+def test_resolve_values():
+    """test derivations along a path sum up the signals"""
+    signals = {
+        Label('F3-M2'): np.array([1.0, 2.0]),
+        Label('M1-M2'): np.array([10.0, 20.0]),
+        Label('C3-M1'): np.array([100.0, 200.0]),
+    }
+    graph = DerivationGraph([channel(label) for label in signals])
+    expected = {
+        'F3-C3': np.array([-109.0, -218.0]),
+        'C3-F3': np.array([109.0, 218.0]),
+        'M2-F3': np.array([-1.0, -2.0]),
+    }
+    for label, values in expected.items():
+        assert np.all(graph[Label(label)].from_dict(signals) == values)
+
+
+@pytest.mark.parametrize('requested', ['F3-F3', 'F3-O1'])
+def test_resolve_raises(requested):
+    graph = DerivationGraph([
+        channel('F3-M2'),
+        channel('C3-M2', num_samples_per_record=8),
+        channel('O1-M2', physical_dimension='mV'),
+    ])
+    assert Label(requested) not in graph
+    with pytest.raises(KeyError):
+        graph[Label(requested)]
+
+
+def test_resolve_across_rates():
+    """test paths of equal rate are preferred, else channels are resampled"""
+    graph = DerivationGraph([
+        channel('F3-M2'),
+        channel('C3-M2', num_samples_per_record=8),
+        channel('F3-M1'),
+        channel('M1-M2'),
+    ])
+    assert graph[Label('F3-M2')].children == [Label('F3-M2')]
+    derivation = graph[Label('C3-F3')]
+    assert derivation.children == [Label('C3-M2'), Label('F3-M2')]
+    assert derivation.num_samples_per_record == 8
+    signals = {
+        Label('C3-M2'): np.full(64, 3.0),
+        Label('F3-M2'): np.full(32, 1.0),
+    }
+    values = derivation.from_dict(signals)
+    assert values.shape == (64,)
+    assert values[16:48] == pytest.approx(2.0, abs=1e-2)
+
+
+def test_lazy():
+    """test nothing but the basic labels is resolved up front"""
+    labels = [f"C{i}" for i in range(50)]
+    graph = DerivationGraph([channel(label) for label in labels])
+    assert set(graph.resolved) == set(map(Label, labels))
+    assert graph[Label('C3-C42')].children == [Label('C3'), Label('C42')]
+    assert Label('C3-C42') in graph.resolved
@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+
+from edfpy.channel import Label
+from edfpy.envelope import (Envelope, EnvelopeBuilder, save_envelopes,
+                            load_envelopes)
+
+
+@pytest.fixture
+def signal():
+    return np.random.default_rng(0).normal(size=10_000)
+
+
+def build(signal, chunks):
+    builder = EnvelopeBuilder(base=16, factor=4, dtype=np.float64)
+    for chunk in np.array_split(signal, chunks):
+        builder.update(chunk)
+
+    return builder.finish()
+
+
+def test_build_in_chunks(signal):
+    envelope = build(signal, 1)
+    chunked = build(signal, 7)
+    assert len(envelope.levels) == len(chunked.levels)
+    for level, expected in zip(chunked.levels, envelope.levels):
+        assert level == pytest.approx(expected)
+
+
+def test_levels(signal):
+    envelope = build(signal, 3)
+    assert envelope.num_samples == signal.size
+    assert envelope.levels[-1].shape[1] <= 4
+    for k, level in enumerate(envelope.levels):
+        size = envelope.block_size(k)
+        assert level.shape[1] == -(-signal.size // size)
+        last = signal[(level.shape[1] - 1) * size:]
+        assert level[:, -1] == pytest.approx(
+            [last.min(), last.max(), last.mean()])
+        assert level[0].min() == signal.min()
+        assert level[1].max() == signal.max()
+
+
+def test_select(signal):
+    envelope = build(signal, 1)
+    level, blocks = envelope.select(100, 9000, max_points=200)
+    assert level == 1
+    assert blocks.shape[1] <= 200
+    level, blocks = envelope.select(100, 9000, max_points=1)
+    assert level == len(envelope.levels) - 1
+
+
+def test_save_load(tmp_path, signal):
+    envelopes = {Label('C3-M2'): build(signal, 1),
+                 Label('O1'): build(signal[:100], 1)}
+    filepath = str(tmp_path / 'envelopes.npz')
+    save_envelopes(filepath, envelopes)
+    loaded = load_envelopes(filepath)
+    assert set(loaded) == set(envelopes)
+    for label, envelope in envelopes.items():
+        assert isinstance(loaded[label], Envelope)
+        assert loaded[label].num_samples == envelope.num_samples
+        for level, expected in zip(loaded[label].levels, envelope.levels):
+            assert np.array_equal(level, expected)
+
+    assert set(load_envelopes(filepath, ['O1'])) == {Label('O1')}
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+import numpy as np
+
+from edfpy.reader import Reader
+from edfpy.export import export, filename, NpyStore
+
+
+@pytest.fixture
+def reader(write_edf):
+    path = write_edf(['C3-M2', 'C4-M2', 'EMG'], [8, 8, 4],
+                     [np.arange(80, dtype=np.int16),
+                      -np.arange(80, dtype=np.int16),
+                      np.arange(40, dtype=np.int16) * 3],
+                     filename='export.edf')
+    return Reader.open(path)
+
+
+class FailingStore(NpyStore):
+    """fails to write chunks after `limit` writes"""
+
+    def __init__(self, directory: str, limit: int):
+        super().__init__(directory)
+        self.limit = limit
+        self.slices = []
+
+    def write(self, label, sli, samples):
+        if len(self.slices) >= self.limit:
+            raise OSError("disk full")
+
+        self.slices.append((label, sli))
+        super().write(label, sli, samples)
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_export(reader, tmp_path, workers):
+    labels = ['C3-M2', 'EMG', 'C3-C4']
+    store = export(reader, NpyStore(str(tmp_path / 'npy')), labels,
+                   chunk_records=3, workers=workers)
+    expected = reader.get_physical_samples(labels=labels, dtype=np.float32)
+    for label in labels:
+        arr = np.load(store.filepath(label))
+        assert arr.dtype == np.float32
+        assert np.array_equal(arr, expected[label])
+
+    with open(tmp_path / 'npy' / 'meta.json') as fp:
+        meta = json.load(fp)
+
+    assert meta['labels'] == labels
+    assert meta['sample_rates'] == [8.0, 4.0, 8.0]
+    assert meta['header']['num_records'] == 10
+    assert set(meta['channels']) == {'C3-M2', 'EMG'}
+    assert meta['files']['C3-C4'] == 'C3-C4.npy'
+
+
+def test_export_resume(reader, tmp_path):
+    directory = str(tmp_path / 'npy')
+    with pytest.raises(OSError):
+        export(reader, FailingStore(directory, limit=5), chunk_records=3)
+
+    with open(tmp_path / 'npy' / 'manifest.json') as fp:
+        assert json.load(fp)['done'] == [0]
+
+    store = export(reader, FailingStore(directory, limit=100),
+                   chunk_records=3)
+    assert [sli.start for _, sli in store.slices[::3]] == [24, 48, 72]
+    expected = reader.get_physical_samples(dtype=np.float32)
+    for label, arr in expected.items():
+        assert np.array_equal(np.load(store.filepath(label)), arr)
+
+    # a different chunking starts over
+    store = export(reader, FailingStore(directory, limit=100),
+                   chunk_records=5)
+    assert len(store.slices) == 6
+
+
+def test_export_resume_recreated(reader, tmp_path):
+    """test an array created anew on resume is written completely"""
+    directory = str(tmp_path / 'npy')
+    with pytest.raises(OSError):
+        export(reader, FailingStore(directory, limit=6), chunk_records=3)
+
+    (tmp_path / 'npy' / 'EMG.npy').unlink()
+    store = export(reader, FailingStore(directory, limit=100),
+                   chunk_records=3)
+    assert len(store.slices) == 12
+    expected = reader.get_physical_samples(dtype=np.float32)
+    for label, arr in expected.items():
+        assert np.array_equal(np.load(store.filepath(label)), arr)
+
+
+@pytest.mark.parametrize('label, expected', [
+    ('C3-M2', 'C3-M2'),
+    ('A/B', 'A_B'),
+    ('..', '_..'),
+    ('SPO2 %', 'SPO2__'),
+])
+def test_filename(tmp_path, label, expected):
+    assert filename(label) == expected
+    store = NpyStore(str(tmp_path))
+    assert store.filepath(label) == str(tmp_path / f"{expected}.npy")
+
+
+def test_filename_collision(tmp_path):
+    store = NpyStore(str(tmp_path))
+    store.create('A/B', 4, np.float32, 4)
+    with pytest.raises(ValueError):
+        store.create('A:B', 4, np.float32, 4)
+
+
+def test_export_digital(reader, tmp_path):
+    store = export(reader, NpyStore(str(tmp_path / 'npy')), ['EMG'],
+                   dtype=np.int16)
+    assert np.array_equal(np.load(store.filepath('EMG')),
+                          np.arange(40) * 3)
+    with pytest.raises(ValueError):
+        export(reader, NpyStore(str(tmp_path / 'npy')), ['C3-C4'],
+               dtype=np.int16)
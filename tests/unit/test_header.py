@@ -32,6 +32,19 @@ def test_read_edfp(test_edfp_header_bytes):
     assert fields.filetype == 'EDF+C'
 
 
+def test_read_bdf(test_header_bytes):
+    bdf_header_bytes = b'\xffBIOSEMI' + test_header_bytes[8:192] \
+        + b'24BIT'.ljust(44) + test_header_bytes[236:]
+    fields = Header.read(BytesIO(bdf_header_bytes))
+    assert fields.version == Header.bdf_version
+    assert fields.filetype == 'BDF'
+    fields.reserved = 'BDF+C'
+    assert fields.filetype == 'BDF+C'
+    file = BytesIO()
+    fields.write(file)
+    assert file.getvalue()[:8] == b'\xffBIOSEMI'
+
+
 def test_write(test_header_bytes):
     expected = {
         'version': '0',
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+
+from edfpy import instrument
+from edfpy.blob import BlobSlice, read_slices
+
+
+def blob_slice():
+    blob = np.arange(10 * 6, dtype=np.int16).reshape(10, 6)
+    return BlobSlice(blob, (0, 4))
+
+
+def test_disabled():
+    assert not instrument.profiles
+    blob_slice()[:]
+    with instrument.profile() as prof:
+        pass
+
+    assert prof.as_dict() == {}
+
+
+def test_profile():
+    bs = blob_slice()
+    records = []
+    with instrument.profile(callback=lambda *r: records.append(r)) as prof:
+        bs[0:10]
+        bs[4:12]
+        read_slices([(bs, slice(0, 40))])
+
+    bs[:]  # not recorded after the context
+    stages = prof.as_dict()
+    assert stages['blob.getitem']['calls'] == 2
+    assert stages['blob.getitem']['records'] == 3 + 2
+    assert stages['blob.getitem']['bytes'] == (3 + 2) * 4 * 2
+    assert stages['blob.getitem']['seconds'] >= 0.0
+    assert stages['blob.read_slices']['records'] == 10
+    assert stages['blob.read_slices']['bytes'] == 10 * 6 * 2
+    assert json.loads(prof.to_json()) == stages
+    assert [name for name, _ in records].count('blob.getitem') == 4
+
+
+def test_nested_stages_and_allocations():
+    with instrument.profile(trace_allocations=True) as prof:
+        with instrument.stage('outer'):
+            with instrument.stage('inner'):
+                x = np.ones(1 << 16)
+
+    stages = prof.as_dict()
+    assert stages['outer']['calls'] == stages['inner']['calls'] == 1
+    assert stages['outer']['seconds'] >= stages['inner']['seconds']
+    assert stages['inner']['allocated'] >= x.nbytes
@@ -1,6 +1,10 @@
+import pickle
+
 import pytest
 
 from edfpy.channel import Label
+from edfpy.channel.label import label as label_module
+from edfpy.channel.label.label import register_synonyms
 
 
 @pytest.mark.parametrize('original, left, right', [
@@ -118,3 +122,56 @@ def test_derive(first, second, expected):
 def test_derive_raises(first, second):
     with pytest.raises(ValueError):
         first.derive(second)
+
+
+def test_interning():
+    label = Label('EEG C3-A2')
+    assert Label('EEG C3-A2') is label
+    assert Label('C3-M2') is not label
+    assert Label('C3-M2') == label
+    assert Label('C3-M2').original == 'C3-M2'
+    assert label.original == 'EEG C3-A2'
+
+
+def test_pickle():
+    label = Label('EMG FP1/A1')
+    unpickled = pickle.loads(pickle.dumps(label))
+    assert unpickled is label
+    assert Label('Fp1-M1').original == 'Fp1-M1'
+
+
+@pytest.fixture
+def site_synonyms(monkeypatch):
+    monkeypatch.setattr(label_module, 'part_synonyms',
+                        dict(label_module.part_synonyms))
+    Label.cache_clear()
+    yield
+    Label.cache_clear()
+
+
+def test_register_synonyms(site_synonyms):
+    assert Label('EEG Cz_ref-M2') == 'CZ_REF-M2'
+    register_synonyms({'Cz_ref': 'CZ'})
+    assert Label('EEG Cz_ref-M2') == 'CZ-M2'
+    with pytest.raises(ValueError):
+        register_synonyms({'Cz-ref': 'CZ'})
+
+
+@pytest.mark.parametrize('synonym', ['', 'C Z'])
+def test_register_synonyms_invalid(site_synonyms, synonym):
+    with pytest.raises(ValueError):
+        register_synonyms({'Cz_ref': synonym})
+
+
+def test_register_synonyms_upper_case(site_synonyms):
+    register_synonyms({'Cz_ref': 'Cz', 'c3a2': 'c3-m2'})
+    assert Label('EEG Cz_ref-M2') == 'CZ-M2'
+    assert Label('C3A2').parts == ['C3', 'M2']
+    assert Label('Cz-M2') == Label('EEG Cz_ref-M2')
+
+
+def test_register_synonyms_built_in(site_synonyms):
+    register_synonyms({'FRONTPOL1': 'Fp1', 'LMAST': 'A1'})
+    assert Label('FRONTPOL1-LMAST') == Label('Fp1-M1')
+    assert Label('EEG frontpol1-LMAST').parts == ['Fp1', 'M1']
+    assert Label('FRONTPOL1-M2') == Label('EEG FP1-M2')
@@ -0,0 +1,98 @@
+import pytest
+import numpy as np
+
+from edfpy.reader import Reader
+from edfpy.montage import Montage, neighbours, electrode
+
+
+@pytest.fixture
+def reader(write_edf):
+    rng = np.random.default_rng(0)
+    digital = rng.integers(-1000, 1000, (len(neighbours), 64), dtype=np.int16)
+    return Reader.open(write_edf([f"{e}-M2" for e in neighbours],
+                                 [16] * len(neighbours), list(digital),
+                                 filename='montage.edf'))
+
+
+def referenced(reader, dtype=np.float64):
+    """returns physical samples of electrodes referenced to M2"""
+    labels = [f"{e}-M2" for e in neighbours]
+    return dict(zip(map(electrode, neighbours),
+                    reader.get_physical_array(labels=labels, dtype=dtype)))
+
+
+@pytest.mark.parametrize('name', ['double_banana', 'transverse'])
+def test_bipolar(reader, name):
+    montage = Montage.builtin(name)
+    arr = montage.apply(reader)
+    expected = reader.get_physical_samples(labels=montage.labels)
+    assert arr.shape == (len(montage.labels), 64)
+    for label, row in zip(montage.labels, arr):
+        assert row == pytest.approx(expected[label])
+
+
+def test_average(reader):
+    montage = Montage.builtin('average')
+    signals = referenced(reader)
+    mean = np.mean(list(signals.values()), axis=0)
+    arr = montage.apply(reader, 1.0, 2.0, dtype=np.float32)
+    assert arr.dtype == np.float32 and arr.shape == (19, 32)
+    for label, row in zip(montage.labels, arr):
+        expected = signals[label.left] - mean
+        assert row == pytest.approx(expected[16:48], abs=1e-3)
+
+
+def test_laplacian(reader):
+    montage = Montage.builtin('laplacian')
+    signals = referenced(reader)
+    arr = montage.apply(reader)
+    for (e, others), row in zip(neighbours.items(), arr):
+        mean = np.mean([signals[electrode(o)] for o in others], axis=0)
+        expected = signals[electrode(e)] - mean
+        assert row == pytest.approx(expected)
+
+
+def test_compile(reader):
+    montage = Montage({'C3-C4': {'C3': 1, 'C4': -1},
+                       'Cz': {'Cz': 2, 'C3': -1, 'C4': -1}})
+    labels, weights = montage.compile(reader)
+    assert labels == ['C3-M2', 'CZ-M2', 'C4-M2']
+    assert weights == pytest.approx(np.array([[1, 0, -1], [-1, 2, -1]]))
+    assert montage.compile(reader)[1] is weights
+
+
+def test_compile_redundant(write_edf):
+    """test rows of redundant channels that disagree follow the channels
+    a reader resolves the labels with"""
+    rng = np.random.default_rng(1)
+    digital = list(rng.integers(-1000, 1000, (3, 64), dtype=np.int16))
+    reader = Reader.open(write_edf(['F3-C3', 'F3-M2', 'C3-M2'], [16] * 3,
+                                   digital))
+    labels = ['F3-C3', 'F3-M2', 'C3-F3', 'M2-C3']
+    montage = Montage.bipolar(labels)
+    channels, weights = montage.compile(reader)
+    assert sorted(channels) == ['C3-M2', 'F3-C3', 'F3-M2']
+    assert set(np.unique(weights)) <= {-1.0, 0.0, 1.0}
+    expected = reader.get_physical_samples(labels=labels)
+    for label, row in zip(montage.labels, montage.apply(reader)):
+        assert np.array_equal(row, expected[label])
+
+
+def test_compile_raises(reader):
+    with pytest.raises(ValueError):
+        Montage.bipolar(['C3-X1']).compile(reader)
+
+    with pytest.raises(ValueError):
+        Montage({'C3': {'C3': 1}}).compile(reader)
+
+    with pytest.raises(ValueError):
+        Montage.builtin('longitudinal')
+
+    with pytest.raises(ValueError):
+        Montage.bipolar(['C3-C4']).apply(reader, dtype=np.int16)
+
+
+def test_electrode():
+    assert electrode('Fz') == 'FZ'
+    with pytest.raises(ValueError):
+        electrode('-M2')
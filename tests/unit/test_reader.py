@@ -1,7 +1,13 @@
 from datetime import datetime
+
+import numpy as np
+import pytest
+
+from edfpy.blob import encode_int24
+from edfpy.block_cache import BlockCache
 from edfpy.header import Header
 from edfpy.reader import Reader
-from edfpy.channel import Channel, Label
+from edfpy.channel import Channel, Label, AnnotationChannel, Annotation
 
 
 def test_duration():
@@ -57,3 +63,230 @@ def test_required_from_requested():
     reader = Reader(None, [first, second])
     requested = [Label('F4-T4')]
     assert set(reader.required_from_requested(requested)) == set(expected)
+
+
+def test_open_bdfp(tmp_path):
+    """test reading samples and annotations of a BDF+ file"""
+    eeg = Channel(label='C3', channel_type='EEG', physical_dimension='uV',
+                  physical_minimum=-8388608, physical_maximum=8388607,
+                  digital_minimum=-8388608, digital_maximum=8388607,
+                  prefiltering='', num_samples_per_record=4, reserved='')
+    annotations = AnnotationChannel(
+        label='BDF Annotations', channel_type='', physical_dimension='',
+        physical_minimum=-1, physical_maximum=1, digital_minimum=-8388608,
+        digital_maximum=8388607, prefiltering='', num_samples_per_record=10,
+        reserved='')
+    header = Header(version=Header.bdf_version, patient_id='X',
+                    recording_id='X', startdate='01.01.20',
+                    starttime='00.00.00', num_header_bytes=3 * 256,
+                    reserved='BDF+C', num_records=2, record_duration=1,
+                    num_channels=2)
+    tals = [b'+0\x14\x14\x00+0.5\x150.2\x14Blink\x14\x00', b'+1\x14\x14\x00']
+    digital = np.array([[-8388608, -1, 0, 8388607],
+                        [1, 2, 3, 4]])
+    filepath = tmp_path / 'test.bdf'
+    with open(filepath, 'wb') as fp:
+        header.write(fp)
+        Channel.write(fp, [eeg, annotations])
+        for samples, tal in zip(digital, tals):
+            fp.write(encode_int24(samples).tobytes())
+            fp.write(tal.ljust(30, b'\x00'))
+
+    reader = Reader.open(str(filepath))
+    assert reader.header.filetype == 'BDF+C'
+    assert reader.sample_bytes(Label('C3')) == 3
+    signals = reader.get_physical_samples(labels=['C3'])
+    assert np.allclose(signals['C3'], digital.flatten())
+    signals = reader.get_physical_samples(labels=['C3'], dtype=np.int32)
+    assert signals['C3'].tolist() == digital.flatten().tolist()
+    with pytest.raises(ValueError):
+        reader.get_physical_samples(labels=['C3'], dtype=np.int16)
+
+    with pytest.raises(ValueError):
+        next(reader.iter_windows(1.0, labels=['C3'], dtype=np.int16))
+
+    with pytest.raises(ValueError):
+        reader.channels[0].to_physical(digital[0], dtype=np.int16)
+
+    assert reader.channel_by_label['ANNOTATIONS'].annotations == [
+        Annotation(0.5, 0.2, 'Blink')
+    ]
+
+
+def test_iter_windows_sampling_rates():
+    channels = [Channel(label=label, physical_dimension='uV',
+                        num_samples_per_record=n)
+                for label, n in [('C3', 256), ('C4', 128)]]
+    reader = Reader(Header(record_duration=1, num_records=10), channels)
+    with pytest.raises(ValueError):
+        next(reader.iter_windows(2.0, labels=['C3', 'C4']))
+
+
+def sine(label, rate, t0=0.0):
+    t = t0 + np.arange(20 * rate) / rate
+    return np.sin(2 * np.pi * (1.0 if label == 'C3-M2' else 2.0) * t)
+
+
+@pytest.fixture
+def two_rates(write_edf):
+    """file of 20 records of sines `C3-M2` at 64 Hz and `F3-M2` at 32 Hz"""
+    rates = {'C3-M2': 64, 'F3-M2': 32}
+    return write_edf(list(rates), list(rates.values()),
+                     {ll: sine(ll, r) for ll, r in rates.items()},
+                     physical_range=(-2.0, 2.0))
+
+
+def test_get_physical_array_target_rate(two_rates):
+    reader = Reader.open(two_rates)
+    labels = ['C3-M2', 'F3-M2', 'C3-F3']
+    with pytest.raises(ValueError):
+        reader.get_physical_array(labels=labels)
+
+    arr = reader.get_physical_array(5.0, 10.0, labels, target_rate=64)
+    assert arr.shape == (3, 640)
+    expected = [sine(ll, 64, 5.0)[:640] for ll in labels[:2]]
+    expected.append(expected[0] - expected[1])
+    assert arr == pytest.approx(np.array(expected), abs=1e-2)
+    derivation = reader.derivation_by_label[Label('C3-F3')]
+    assert derivation[320:960] == pytest.approx(arr[2], abs=1e-2)
+
+
+def test_block_cache_rewritten_file(write_edf):
+    """test a rewritten file is not served from blocks of its former self"""
+    cache = BlockCache()
+    for sign in (1, -1):
+        filepath = write_edf(['C3'], [8],
+                             [sign * np.arange(16, dtype=np.int16)])
+        reader = Reader.open(filepath, block_cache=cache)
+        signal = reader.get_physical_samples(labels=['C3'])[Label('C3')]
+        assert np.array_equal(signal, reader.channels[0].to_physical(
+            sign * np.arange(16)))
+
+
+def test_derivation_across_rates_in_chunks(two_rates):
+    """test chunks of a derivation across rates match one read"""
+    reader = Reader.open(two_rates)
+    label = Label('C3-F3')
+    expected = reader.derivation_by_label[label].get(slice(None))
+    whole = reader.get_physical_samples(labels=[label])[label]
+    assert whole == pytest.approx(expected, abs=1e-12)
+
+    chunks = reader.map_chunks(lambda t0, s: s[label], [label],
+                               max_bytes=1000)
+    assert np.concatenate(list(chunks)) == pytest.approx(expected, abs=1e-12)
+
+    parts = [reader.get_physical_samples(t0, 2.5, [label])[label]
+             for t0 in np.arange(0.0, 20.0, 2.5)]
+    assert np.concatenate(parts) == pytest.approx(expected, abs=1e-12)
+
+
+def test_map_chunks_in_flight(two_rates):
+    """test the budget is shared by the chunks of workers and the one
+    yielded last"""
+    reader = Reader.open(two_rates)
+    label = Label('C3-M2')
+    max_bytes = 6 * 64 * (8 + 4)
+    sizes = reader.map_chunks(lambda t0, s: s[label].size, [label],
+                              max_bytes, workers=2)
+    assert set(sizes) == {2 * 64}
+
+
+@pytest.mark.parametrize('t0, dt', [
+    (0.0, None), (0.3, 2.7), (5.01, 3.33), (19.5, 5.0), (22.0, 1.0),
+])
+def test_num_samples(two_rates, t0, dt):
+    reader = Reader.open(two_rates)
+    labels = ['C3-M2', 'F3-M2', 'C3-F3']
+    signals = reader.get_physical_samples(t0, dt, labels)
+    assert [reader.num_samples(ll, t0, dt) for ll in labels] == \
+        [signals[Label(ll)].size for ll in labels]
+
+
+def test_reduce_initial(write_edf):
+    reader = Reader.open(write_edf(['C3'], [8], [np.empty(0, np.int16)]))
+    assert reader.header.num_records == 0
+    assert reader.reduce(lambda t0, s: 1, max, initial=0) == 0
+    with pytest.raises(TypeError):
+        reader.reduce(lambda t0, s: 1, max)
+
+
+def test_envelopes_across_rates_in_chunks(two_rates):
+    """test envelopes built chunk by chunk match one chunk"""
+    reader = Reader.open(two_rates)
+    label = Label('C3-F3')
+    reader.build_envelopes([label], base=16, factor=2, chunk_bytes=200)
+    chunked = reader.envelopes[label]
+    reader.build_envelopes([label], base=16, factor=2)
+    for level, expected in zip(chunked.levels, reader.envelopes[label].levels):
+        assert level == pytest.approx(expected, abs=1e-6)
+
+
+def test_discontinuous(write_edf):
+    """test gaps between record onsets of EDF+D files"""
+    onsets = [0, 1, 2, 5, 6, 10]
+    samples = np.arange(4 * len(onsets), dtype=np.int16)
+    tals = b''.join(f'+{t}\x14\x14\x00'.encode().ljust(16, b'\x00')
+                    for t in onsets)
+    filepath = write_edf(['C3', 'EDF Annotations'], [4, 8],
+                         [samples, np.frombuffer(tals, '<i2')],
+                         reserved='EDF+D',
+                         physical_range=(-32768.0, 32767.0))
+    reader = Reader.open(filepath)
+    assert reader.discontinuous
+    assert reader.record_onsets.tolist() == onsets
+    assert reader.duration == 11.0
+    assert reader.record_at(4.5) == 2
+    assert reader.record_at(5.0) == 3
+    assert reader.segments() == [(0, 3), (3, 5), (5, 6)]
+
+    segments = reader.get_segments(1.5, 8.0, ['C3'])
+    assert [onset for onset, _ in segments] == [1.5, 5.0]
+    assert segments[0][1][Label('C3')].tolist() == [6, 7, 8, 9, 10, 11]
+    assert segments[1][1][Label('C3')].tolist() == list(range(12, 20))
+
+    signal = reader.get_physical_samples(1.5, 8.0, ['C3'])[Label('C3')]
+    assert signal.size == 32
+    expected = [6, 7, 8, 9, 10, 11] + [np.nan] * 8 + list(range(12, 20)) \
+        + [np.nan] * 10
+    assert np.array_equal(signal, expected, equal_nan=True)
+    assert reader.num_samples('C3', 1.5, 8.0) == 32
+    signal = reader.get_physical_samples(labels=['C3'])[Label('C3')]
+    assert signal.size == 44
+    assert reader.num_samples('C3') == 44
+    assert signal[40:].tolist() == [20, 21, 22, 23]
+
+    # 4 samples as float64 and int16 per record
+    assert reader.chunks([Label('C3')], 96) == [(0, 2), (2, 3), (3, 5),
+                                                (5, 6)]
+    chunks = list(reader.map_chunks(lambda t0, s: (t0, s[Label('C3')]),
+                                    ['C3'], max_bytes=96))
+    assert [t0 for t0, _ in chunks] == [0.0, 2.0, 5.0, 10.0]
+    assert np.concatenate([x for _, x in chunks]).tolist() == \
+        samples.tolist()
+
+    records = reader.get_digital_records(4.5, 2.0, ['C3'])[Label('C3')]
+    assert records.tolist() == [list(range(12, 16)), list(range(16, 20))]
+
+    signal = reader.get_physical_samples(labels=['C3'])[Label('C3')]
+    arr = reader.get_physical_array(labels=['C3'], target_rate=4)
+    assert np.array_equal(arr[0], signal, equal_nan=True)
+    arr = reader.get_physical_array(labels=['C3'], target_rate=2)
+    assert arr.shape == (1, 22)
+    assert np.flatnonzero(np.isnan(arr[0])).tolist() == \
+        list(range(6, 10)) + list(range(14, 20))
+
+    qc = reader.stats(['C3'], metrics=['mean'], epoch=1.0)
+    means = qc.epochs['mean'][0]
+    assert np.flatnonzero(np.isnan(means)).tolist() == [3, 4, 7, 8, 9]
+    assert means[[0, 5, 10]].tolist() == [1.5, 13.5, 21.5]
+
+    reader.build_envelopes(['C3'], base=4, factor=2)
+    summary = reader.get_envelope(5.0, 6.0, ['C3'], max_points=4)[Label('C3')]
+    assert summary.t.tolist() == [5.0, 6.0, 10.0]
+    assert summary.mean.tolist() == [13.5, 17.5, 21.5]
+
+    # windows start anew at each segment and never span a gap
+    windows = np.concatenate(list(reader.iter_windows(2.0, 1.0, ['C3'])))
+    assert windows[:, 0].tolist() == [list(range(0, 8)), list(range(4, 12)),
+                                      list(range(12, 20))]
+    assert reader.window_onsets(2.0, 1.0, ['C3']).tolist() == [0.0, 1.0, 5.0]
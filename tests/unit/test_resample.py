@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+
+from edfpy.resample import ratio, kernel, resample, source_slice
+
+
+@pytest.mark.parametrize('source, target, expected', [
+    (256, 512, (2, 1)),
+    (512, 256, (1, 2)),
+    (100, 256, (64, 25)),
+    (256, 1, (1, 256)),
+    (0.5, 200, (400, 1)),
+])
+def test_ratio(source, target, expected):
+    assert ratio(source, target) == expected
+
+
+def test_kernel_cached():
+    bank = kernel(3, 2)
+    assert kernel(3, 2) is bank
+    assert bank.shape[0] == 3
+    assert not bank.flags.writeable
+    assert bank.sum() == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize('source, target', [
+    (256, 512), (512, 256), (100, 256), (200, 128), (256, 1), (1, 256),
+])
+def test_resample_sine(source, target):
+    f = min(source, target) / 10
+    x = np.sin(2 * np.pi * f * np.arange(60 * source) / source)
+    y = resample(x, *ratio(source, target))
+    assert y.size == 60 * target
+    expected = np.sin(2 * np.pi * f * np.arange(y.size) / target)
+    interior = slice(y.size // 10, -(y.size // 10))
+    assert y[interior] == pytest.approx(expected[interior], abs=1e-2)
+
+
+def test_resample_channels():
+    x = np.random.default_rng(0).normal(size=(3, 1000)).astype(np.float32)
+    y = resample(x, 3, 2)
+    assert y.shape == (3, 1500)
+    assert y.dtype == np.float32
+    assert y[1] == pytest.approx(resample(x[1], 3, 2))
+
+
+@pytest.mark.parametrize('up, down', [(2, 1), (1, 2), (64, 25), (16, 25)])
+def test_source_slice(up, down):
+    """test resampling a slice matches resampling the whole signal"""
+    x = np.random.default_rng(0).normal(size=2000)
+    y = resample(x, up, down)
+    start, stop = y.size // 3, y.size // 2
+    source, offset = source_slice(start, stop, up, down)
+    part = resample(x[source], up, down)[offset:offset + stop - start]
+    assert part == pytest.approx(y[start:stop])
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from edfpy.header import Header
+from edfpy.reader import Reader
+from edfpy.writer import Writer
+from edfpy.channel import Channel, AnnotationChannel
+from edfpy.scan import scan_headers
+
+
+@pytest.fixture
+def directory(tmp_path):
+    for i, num_channels in enumerate([1, 3, 2]):
+        reserved = 'EDF+C' if i == 1 else ''
+        header = Header(version='0', patient_id=f'P{i}', recording_id='X',
+                        startdate='01.01.20', starttime='00.00.00',
+                        num_header_bytes=0, reserved=reserved,
+                        num_records=0, record_duration=0.5, num_channels=0)
+        channels = [
+            Channel(label=f'C{j}-M2', channel_type='EEG',
+                    physical_dimension='uV', physical_minimum=-10.5 * j,
+                    physical_maximum=100.0, digital_minimum=-2048,
+                    digital_maximum=2047, prefiltering='HP:0.1Hz',
+                    num_samples_per_record=4 * (j + 1), reserved='')
+            for j in range(num_channels)
+        ]
+        if reserved:
+            channels[-1] = AnnotationChannel(**{
+                f.name: getattr(channels[-1], f.name) for f in Channel.fields
+            })
+
+        subdirectory = tmp_path / f'{i % 2}'
+        subdirectory.mkdir(exist_ok=True)
+        with Writer.open(str(subdirectory / f'{i}.edf'), header,
+                         channels) as writer:
+            writer.write_digital([np.zeros(c.num_samples_per_record * 3,
+                                           dtype=np.int16)
+                                  for c in channels])
+
+    (tmp_path / 'notes.txt').write_text('not an EDF file')
+    (tmp_path / 'broken.edf').write_bytes(b'0' * 100)
+    return tmp_path
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_scan_headers(directory, workers):
+    catalog = scan_headers([str(directory)], workers=workers)
+    assert [path for path, _ in catalog.errors] == \
+        [str(directory / 'broken.edf')]
+    assert len(catalog.files) == 3
+    assert catalog.files['num_channels'].sum() == len(catalog.channels)
+    for i, row in enumerate(catalog.files):
+        with open(row['path'], 'rb') as fp:
+            header, channels = Reader.read_header(fp)
+
+        for field in Header.fields:
+            assert row[field.name] == getattr(header, field.name)
+
+        offset = row['channel_offset']
+        scanned = catalog.channels[offset:offset + header.num_channels]
+        assert (scanned['file'] == i).all()
+        for channel, scanned_channel in zip(channels, scanned):
+            for field in Channel.fields:
+                expected = getattr(channel, field.name)
+                if field.name == 'label':
+                    expected = expected.original
+
+                assert scanned_channel[field.name] == expected
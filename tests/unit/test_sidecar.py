@@ -0,0 +1,88 @@
+import os
+from hashlib import blake2b
+
+import pytest
+import numpy as np
+
+from edfpy.header import Header
+from edfpy.reader import Reader
+from edfpy import sidecar as sidecar_module
+from edfpy.sidecar import Sidecar
+from edfpy.channel import Channel
+from edfpy.channel import annotation_channel
+
+
+@pytest.fixture
+def filepath(write_edf):
+    tals = [b'+0\x14\x14\x00+0.5\x151\x14Blink\x14\x00', b'+1\x14\x14\x00']
+    return write_edf(
+        ['EEG F3-A2', 'EEG C3-A2', 'EDF Annotations'], [4, 4, 16],
+        [np.concatenate([np.arange(4) + i for i in range(2)]),
+         np.concatenate([-np.arange(4) - i for i in range(2)]),
+         np.frombuffer(b''.join(t.ljust(32, b'\x00') for t in tals), '<i2')],
+        reserved='EDF+C')
+
+
+def test_cold_and_warm_open(tmp_path, filepath, monkeypatch):
+    sidecar = Sidecar(str(tmp_path))
+    cold = Reader.open(filepath, sidecar=sidecar)
+    assert os.path.exists(sidecar.path(filepath))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("parsed although cached")
+
+    monkeypatch.setattr(Header, 'read', fail)
+    monkeypatch.setattr(Channel, 'read', fail)
+    monkeypatch.setattr(annotation_channel, 'scan_tals', fail)
+    warm = Reader.open(filepath, sidecar=sidecar)
+    assert warm.basic_labels == cold.basic_labels
+    assert [c.label.original for c in warm.channels] == \
+        [c.label.original for c in cold.channels]
+    for field in Header.fields:
+        assert getattr(warm.header, field.name) == \
+            getattr(cold.header, field.name)
+
+    annotations = warm.channel_by_label['ANNOTATIONS']
+    assert annotations.annotations == cold.channel_by_label[
+        'ANNOTATIONS'].annotations
+    expected = cold.get_physical_samples(labels=['F3-C3'])
+    signals = warm.get_physical_samples(labels=['F3-C3'])
+    assert np.all(signals['F3-C3'] == expected['F3-C3'])
+
+
+def test_stale(tmp_path, filepath, monkeypatch):
+    sidecar = Sidecar(str(tmp_path), validate='hash')
+    Reader.open(filepath, sidecar=sidecar)
+    assert sidecar.load(filepath) is not None
+    with open(filepath, 'r+b') as fp:
+        fp.seek(8)
+        fp.write(b'Y')
+
+    assert sidecar.load(filepath) is None
+    reader = Reader.open(filepath, sidecar=sidecar)
+    assert reader.header.patient_id == 'Y'
+    assert sidecar.load(filepath) is not None
+
+
+def test_hash_once(tmp_path, filepath, monkeypatch):
+    """test the content is hashed once while the file is unchanged"""
+    hashes = []
+
+    def counting_blake2b(*args, **kwargs):
+        hashes.append(args)
+        return blake2b(*args, **kwargs)
+
+    monkeypatch.setattr(sidecar_module, 'blake2b', counting_blake2b)
+    sidecar = Sidecar(validate='hash')
+    Reader.open(filepath, sidecar=sidecar)
+    Reader.open(filepath, sidecar=sidecar)
+    assert sidecar.load(filepath) is not None
+    assert hashes == [()]
+
+
+def test_next_to_file(filepath):
+    sidecar = Sidecar()
+    assert sidecar.path(filepath) == filepath + Sidecar.suffix
+    assert sidecar.load(filepath) is None
+    Reader.open(filepath, sidecar=sidecar)
+    assert sidecar.load(filepath) is not None
@@ -0,0 +1,103 @@
+import pytest
+import numpy as np
+
+from edfpy.channel import Channel
+from edfpy.stats import StatsBuilder, table, metrics
+
+
+@pytest.fixture
+def channel():
+    return Channel(label='C3-M2', physical_dimension='uV',
+                   physical_minimum=-100.0, physical_maximum=100.0,
+                   digital_minimum=-1000, digital_maximum=1000,
+                   num_samples_per_record=100)
+
+
+def build(channel, digital, chunk, epoch_samples, **kwargs):
+    num_epochs = -(-digital.size // epoch_samples)
+    builder = StatsBuilder(channel, 100.0, epoch_samples, num_epochs,
+                           **kwargs)
+    for i in range(0, digital.size, chunk):
+        builder.update(digital[i:i + chunk])
+
+    return builder.finish()
+
+
+@pytest.mark.parametrize('chunk', [7, 100, 1000])
+def test_stats_builder(channel, chunk):
+    rng = np.random.default_rng(0)
+    digital = rng.integers(-1000, 1001, 1000).astype(np.int16)
+    digital[300:350] = 17
+    physical = channel.to_physical(digital)
+    result = build(channel, digital, chunk, 200, flat_samples=20)
+    assert result['min'] == pytest.approx(physical.min())
+    assert result['max'] == pytest.approx(physical.max())
+    assert result['mean'] == pytest.approx(physical.mean())
+    assert result['std'] == pytest.approx(physical.std())
+    assert result['rms'] == pytest.approx(np.sqrt(np.mean(physical ** 2)))
+    clipped = np.mean((digital == -1000) | (digital == 1000))
+    assert result['clipped'] == pytest.approx(clipped)
+    assert result['flat'] == 0.5
+    assert result['dropouts'] == 1
+    assert all(result[k].ndim == 0 for k in result if '.' not in k)
+
+    epochs = physical.reshape(5, 200)
+    assert result['epochs.mean'] == pytest.approx(epochs.mean(axis=1))
+    assert result['epochs.std'] == pytest.approx(epochs.std(axis=1))
+    assert result['epochs.min'] == pytest.approx(epochs.min(axis=1))
+    assert result['epochs.flat'][1] == 0.5
+    assert result['epochs.dropouts'].tolist() == [0, 1, 0, 0, 0]
+
+
+def test_stats_builder_runs(channel):
+    """runs of constant samples across chunks and epochs"""
+    digital = np.zeros(1000, dtype=np.int16)
+    digital[:150] = 5
+    digital[900:] = np.arange(1, 101)
+    result = build(channel, digital, 64, 200, flat_samples=100)
+    assert result['flat'] == 7.5
+    assert result['dropouts'] == 2
+    assert result['epochs.flat'].tolist() == [1.5, 2.0, 2.0, 2.0, 1.0]
+    assert result['epochs.dropouts'].tolist() == [2, 0, 0, 0, 0]
+
+
+def test_stats_builder_skip(channel):
+    """test skipped samples of a gap end runs and leave epochs empty"""
+    builder = StatsBuilder(channel, 100.0, 100, 3, flat_samples=50)
+    builder.update(np.full(100, 5, dtype=np.int16))
+    builder.skip(100)
+    builder.update(np.full(100, 5, dtype=np.int16))
+    result = builder.finish()
+    assert result['flat'] == 1.0
+    assert result['dropouts'] == 2
+    assert result['epochs.dropouts'].tolist() == [1, 0, 1]
+    assert np.isnan(result['epochs.mean'][1])
+    assert result['mean'] == pytest.approx(channel.to_physical(5))
+
+
+def test_stats_builder_line_noise(channel):
+    t = np.arange(2000) / 100.0
+    noise = np.random.default_rng(0).normal(0, 10, t.size)
+    hum = 500 * np.sin(2 * np.pi * 50.0 * t + 0.3)
+    result = build(channel, np.round(hum).astype(np.int16), 300, 1000,
+                   line_frequency=20.0)
+    assert result['line_noise'] == pytest.approx(0.0, abs=1e-3)
+
+    hum = 500 * np.sin(2 * np.pi * 20.0 * t + 0.3)
+    result = build(channel, np.round(hum + noise).astype(np.int16), 300,
+                   1000, line_frequency=20.0)
+    assert result['line_noise'] == pytest.approx(1.0, abs=0.01)
+    epochs = result['epochs.line_noise']
+    assert epochs == pytest.approx([1.0, 1.0], abs=0.01)
+
+
+def test_table(channel):
+    digital = np.arange(100, dtype=np.int16)
+    results = [build(channel, digital, 10, 50) for _ in range(2)]
+    arr = table(['C3-M2', 'C4-M2'], results, metrics)
+    assert arr.shape == (2,)
+    assert arr['label'].tolist() == ['C3-M2', 'C4-M2']
+    assert arr.dtype.names == ('label',) + metrics
+    arr = table(['C3-M2', 'C4-M2'], results, ['mean'], 'epochs.')
+    assert arr.shape == (2, 2)
+    assert arr['label'][:, 1].tolist() == ['C3-M2', 'C4-M2']
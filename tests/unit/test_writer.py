@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+
+from edfpy.reader import Reader
+from edfpy.writer import Writer
+
+
+@pytest.fixture
+def channels(make_channels):
+    return make_channels(['C3', 'C4'], [8, 4])
+
+
+def test_write_digital_in_chunks(tmp_path, header, channels):
+    """test chunks not aligned with records are buffered"""
+    expected = [np.arange(5 * 8, dtype=np.int16),
+                -np.arange(5 * 4, dtype=np.int16)]
+    filepath = tmp_path / 'test.edf'
+    with Writer.open(filepath, header, channels) as writer:
+        for a, b in [(0, 3), (3, 17), (17, 25), (25, 40)]:
+            writer.write_digital({
+                'C3': expected[0][a:b],
+                'C4': expected[1][a // 2:b // 2],
+            })
+            assert writer.num_records == b // 8
+
+    reader = Reader.open(str(filepath))
+    assert reader.header.num_records == 5
+    assert reader.header.num_header_bytes == 3 * 256
+    for channel, arr in zip(channels, expected):
+        signal = reader.channel_by_label[channel.label].signal
+        assert np.all(signal[:] == arr)
+
+
+def test_write_physical(tmp_path, header, channels):
+    rng = np.random.default_rng(0)
+    expected = [rng.uniform(-100, 100, 3 * 8), rng.uniform(-100, 100, 3 * 4)]
+    filepath = tmp_path / 'test.edf'
+    with Writer.open(filepath, header, channels) as writer:
+        writer.write_physical(expected)
+
+    signals = Reader.open(str(filepath)).get_physical_samples()
+    resolution = 200.0 / 65535
+    for channel, arr in zip(channels, expected):
+        assert signals[channel.label] == pytest.approx(arr, abs=resolution)
+
+
+def test_write_records(tmp_path, header, channels):
+    expected = [np.arange(2 * 8), np.arange(2 * 4)]
+    filepath = tmp_path / 'test.edf'
+    with Writer.open(filepath, header, channels) as writer:
+        writer.write_records(expected)
+        writer.write_records(expected)
+        with pytest.raises(ValueError):
+            writer.write_records([np.arange(8), np.arange(3)])
+
+    reader = Reader.open(str(filepath))
+    assert reader.header.num_records == 4
+    signal = reader.channel_by_label['C4'].signal
+    assert np.all(signal[:] == np.tile(expected[1], 2))
+
+
+def test_close_incomplete_record(tmp_path, header, channels):
+    filepath = tmp_path / 'test.edf'
+    writer = Writer.open(filepath, header, channels)
+    writer.write_digital([np.arange(10), np.arange(5)])
+    with pytest.raises(ValueError):
+        writer.close()
+
+    assert Reader.open(str(filepath)).header.num_records == 1
+
+
+def test_exit_on_exception_keeps_exception(tmp_path, header, channels):
+    filepath = tmp_path / 'test.edf'
+    with pytest.raises(KeyError):
+        with Writer.open(filepath, header, channels) as writer:
+            writer.write_digital([np.arange(10), np.arange(5)])
+            raise KeyError('C3')
+
+    assert Reader.open(str(filepath)).header.num_records == 1
+
+
+def test_write_digital_unbalanced_chunks(tmp_path, header, channels):
+    """test samples of one channel buffered far ahead of the other"""
+    expected = [np.arange(10 * 8, dtype=np.int16),
+                -np.arange(10 * 4, dtype=np.int16)]
+    filepath = tmp_path / 'test.edf'
+    with Writer.open(filepath, header, channels) as writer:
+        writer.write_digital([expected[0], expected[1][:0]])
+        for a in range(0, 40, 3):
+            writer.write_digital([expected[0][:0], expected[1][a:a + 3]])
+            assert writer.num_records == min(a + 3, 40) // 4
+            assert writer.num_pending[0] == 80 - 8 * writer.num_records
+
+    reader = Reader.open(str(filepath))
+    for channel, arr in zip(channels, expected):
+        signal = reader.channel_by_label[channel.label].signal
+        assert np.all(signal[:] == arr)